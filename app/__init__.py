@@ -1,16 +1,203 @@
-from flask import Flask
+from flask import Flask, Request, current_app
 from config import config
+import logging
 import os
+from .services.admission_service import AdmissionController
+from .services.ai_service import AIService, RESUME_ANALYSIS_SCHEMA
+from .services.asset_service import AssetManifest
+from .services.batch_service import BatchRunner
+from .services.call_policy import CallPolicy
+from .services.cache_service import AnalysisCache
+from .services.client_registry import ClientRegistry
+from .services.jd_profile_service import JDProfileIndex
+from .services.metrics import Metrics
+from .services.job_service import JobStore, JobQueue
+from .services.model_catalog import ModelCatalog
+from .services.prescreen_service import Prescreener
+from .services.report_service import ReportCache
+from .services.revision_service import RevisionPlanner
+from .services.scheduler_service import RequestScheduler
+from .services.similarity_service import NearDuplicateIndex
+from .services.upload_service import UploadStore
+
+class UploadRequest(Request):
+    """Request whose body limit is BATCH_MAX_CONTENT_LENGTH for batch uploads and MAX_CONTENT_LENGTH elsewhere."""
+
+    @property
+    def max_content_length(self):
+        if self.endpoint == 'main.create_batch':
+            return current_app.config['BATCH_MAX_CONTENT_LENGTH']
+        return super().max_content_length
+
 
 def create_app(config_name='default'):
     app = Flask(__name__)
+    app.request_class = UploadRequest
     app.config.from_object(config[config_name])
     
     # Ensure upload folder exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs(app.config['DATA_FOLDER'], exist_ok=True)
+
+    # Under gunicorn the root logger is unconfigured; send service logs to stderr like before.
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=app.config['LOG_LEVEL'], format='%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s')
+
+    metrics = app.extensions['metrics'] = Metrics(
+        directory=app.config['METRICS_DIR'] or os.path.join(app.config['DATA_FOLDER'], 'metrics'),
+        flush_interval=app.config['METRICS_FLUSH_INTERVAL'],
+    )
+
+    app.extensions['uploads'] = UploadStore(
+        app.config['UPLOAD_FOLDER'],
+        max_bytes=app.config['UPLOAD_MAX_BYTES'],
+        ttl=app.config['UPLOAD_TTL'],
+    )
+
+    assets = app.extensions['assets'] = AssetManifest(
+        app.static_folder,
+        app.config['ASSETS_DIR'] or os.path.join(app.config['DATA_FOLDER'], 'assets'),
+    )
+    if app.config['ASSETS_AUTO_BUILD']:
+        assets.ensure_built()
+
+    app.extensions['analysis_cache'] = AnalysisCache(
+        max_entries=app.config['ANALYSIS_CACHE_SIZE'],
+        ttl=app.config['ANALYSIS_CACHE_TTL'],
+        directory=app.config['ANALYSIS_CACHE_DIR'],
+        max_bytes=app.config['ANALYSIS_CACHE_MAX_BYTES'],
+    )
+    app.extensions['genai_clients'] = ClientRegistry(
+        max_clients=app.config['GENAI_CLIENT_POOL_SIZE'],
+        idle_ttl=app.config['GENAI_CLIENT_IDLE_TTL'],
+        metrics=metrics,
+    )
+    api_keys = app.config['GOOGLE_API_KEYS'] or [app.config['GOOGLE_API_KEY']]
+    app.extensions['scheduler'] = None
+    if any(api_keys):
+        app.extensions['scheduler'] = RequestScheduler(
+            api_keys,
+            app.config['GEMINI_MODELS'],
+            app.extensions['genai_clients'],
+            rpm=app.config['GEMINI_RPM_PER_KEY'],
+            tpm=app.config['GEMINI_TPM_PER_KEY'],
+            max_waiters=app.config['SCHEDULER_MAX_WAITERS'],
+            max_wait=app.config['SCHEDULER_MAX_WAIT'],
+        )
+    app.extensions['model_catalog'] = ModelCatalog(
+        app.extensions['genai_clients'],
+        next((k for k in api_keys if k), None),
+        ttl=app.config['MODEL_CATALOG_TTL'],
+    )
+    app.extensions['near_duplicates'] = None
+    if app.config['NEAR_DUPLICATE_THRESHOLD'] or app.config['NEAR_DUPLICATE_WARM_THRESHOLD']:
+        app.extensions['near_duplicates'] = NearDuplicateIndex(
+            os.path.join(app.config['DATA_FOLDER'], 'near_duplicates'),
+            threshold=app.config['NEAR_DUPLICATE_THRESHOLD'],
+            warm_threshold=app.config['NEAR_DUPLICATE_WARM_THRESHOLD'],
+            max_entries=app.config['NEAR_DUPLICATE_MAX_ENTRIES'],
+            ttl=app.config['ANALYSIS_CACHE_TTL'],
+        )
+    app.extensions['jd_profiles'] = JDProfileIndex(os.path.join(app.config['DATA_FOLDER'], 'jd_profiles'))
+    app.extensions['ai_service'] = AIService(
+        app.config['GOOGLE_API_KEY'],
+        cache=app.extensions['analysis_cache'],
+        execution_mode=app.config['ANALYSIS_EXECUTION_MODE'],
+        clients=app.extensions['genai_clients'],
+        scheduler=app.extensions['scheduler'],
+        catalog=app.extensions['model_catalog'],
+        jd_profiles=app.extensions['jd_profiles'] if app.config['JD_PROFILE_MIN_CHARS'] else None,
+        jd_profile_min_chars=app.config['JD_PROFILE_MIN_CHARS'],
+        resume_token_budget=app.config['RESUME_TOKEN_BUDGET'],
+        jd_token_budget=app.config['JD_TOKEN_BUDGET'],
+        metrics=metrics,
+        revisions=RevisionPlanner(RESUME_ANALYSIS_SCHEMA["properties"], max_change=app.config['INCREMENTAL_MAX_CHANGE']),
+        similar=app.extensions['near_duplicates'],
+        policy=CallPolicy(
+            deadline=app.config['GEMINI_DEADLINE'],
+            attempt_timeout=app.config['GEMINI_CALL_TIMEOUT'],
+            max_attempts=app.config['GEMINI_MAX_ATTEMPTS'],
+            backoff_base=app.config['GEMINI_BACKOFF_BASE'],
+            backoff_max=app.config['GEMINI_BACKOFF_MAX'],
+            hedge_percentile=app.config['GEMINI_HEDGE_PERCENTILE'],
+            hedge_min_samples=app.config['GEMINI_HEDGE_MIN_SAMPLES'],
+            hedge_min_delay=app.config['GEMINI_HEDGE_MIN_DELAY'],
+            hedge_workers=app.config['GEMINI_HEDGE_WORKERS'],
+            metrics=metrics,
+        ),
+    )
+    app.extensions['admission'] = AdmissionController(
+        max_in_flight=app.config['ADMISSION_MAX_IN_FLIGHT'],
+        max_queue=app.config['ADMISSION_MAX_QUEUE'],
+        queue_timeout=app.config['ADMISSION_QUEUE_TIMEOUT'],
+        global_max=app.config['ADMISSION_GLOBAL_MAX'],
+        directory=os.path.join(app.config['DATA_FOLDER'], 'admission'),
+        per_client=app.config['ADMISSION_PER_CLIENT'],
+        metrics=metrics,
+    )
+    app.extensions['jobs'] = JobQueue(
+        JobStore(
+            app.config['JOB_DB_PATH'],
+            stale_after=app.config['JOB_STALE_AFTER'],
+            retention=app.config['JOB_RETENTION'],
+        ),
+        max_workers=app.config['JOB_WORKERS'],
+        max_pending=app.config['JOB_MAX_PENDING'],
+    )
+    app.extensions['reports'] = ReportCache(
+        os.path.join(app.config['DATA_FOLDER'], 'reports'),
+        max_bytes=app.config['REPORT_CACHE_MAX_BYTES'],
+    )
+    app.extensions['prescreener'] = Prescreener()
+    app.extensions['batches'] = BatchRunner(
+        os.path.join(app.config['DATA_FOLDER'], 'batches'),
+        app.extensions['ai_service'],
+        concurrency=app.config['BATCH_CONCURRENCY'],
+        extract_workers=app.config['PDF_WORKERS'],
+        max_running=app.config['BATCH_MAX_RUNNING'],
+        prescreener=app.extensions['prescreener'],
+        threshold=app.config['PRESCREEN_THRESHOLD'],
+        top_k=app.config['PRESCREEN_TOP_K'],
+        layout=app.config['PDF_LAYOUT'],
+        max_pdf_bytes=app.config['BATCH_MAX_PDF_BYTES'],
+    )
     
+    _register_collectors(app)
+
     # Register blueprints
     from .routes import main as main_blueprint
     app.register_blueprint(main_blueprint)
+
+    from .cli import register_commands
+    register_commands(app)
     
     return app
+
+
+def _register_collectors(app):
+    """Exposes counters the services already keep in their stats() through /metrics."""
+    ext = app.extensions
+
+    def collect():
+        cache = ext['analysis_cache'].stats()
+        profiles = ext['jd_profiles'].stats()
+        clients = ext['genai_clients'].stats()
+        reports = ext['reports'].stats()
+        samples = [
+            ('cache_lookups_total', {'cache': 'analysis', 'result': 'hit'}, cache['hits']),
+            ('cache_lookups_total', {'cache': 'analysis', 'result': 'miss'}, cache['misses']),
+            ('cache_lookups_total', {'cache': 'jd_profile', 'result': 'hit'}, profiles['hits']),
+            ('cache_lookups_total', {'cache': 'jd_profile', 'result': 'miss'}, profiles['built'] + profiles['failures']),
+            ('cache_lookups_total', {'cache': 'report', 'result': 'hit'}, reports['hits']),
+            ('cache_lookups_total', {'cache': 'report', 'result': 'miss'}, reports['rendered']),
+            ('genai_clients_total', {'result': 'created'}, clients['created']),
+            ('genai_clients_total', {'result': 'reused'}, clients['reused']),
+        ]
+        scheduler = ext['scheduler']
+        if scheduler is not None:
+            stats = scheduler.stats()
+            samples.append(('scheduler_events_total', {'event': 'failover'}, stats['failovers']))
+            samples.append(('scheduler_events_total', {'event': 'rejected'}, stats['rejected']))
+        return samples
+
+    ext['metrics'].add_collector(collect)
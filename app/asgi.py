@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .routes import index_async
+
+logger = logging.getLogger(__name__)
+
+# Request bodies up to this size are held in memory; larger ones (PDF and batch uploads) are spooled to a temp file.
+SPOOL_MAX_BYTES = 1024 * 1024
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope whose body has been read in full into the file object `body`."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    root_path = scope.get("root_path", "")
+    path = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1")
+        value = value.decode("latin-1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _headers(pairs):
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in pairs]
+
+
+class AsgiApp:
+    """Serves the Flask app over ASGI, with analyses awaited on the event loop.
+
+    POST / runs routes.index_async(), whose Gemini calls go through the SDK's
+    async client, so one worker holds many analyses in flight for the cost of
+    a coroutine each instead of a process or thread. Every other route runs
+    unchanged through a WSGI bridge on the loop's thread pool (`threads`
+    workers), which also takes PDF extraction and the other blocking steps of
+    the async route."""
+
+    def __init__(self, flask_app, threads=32):
+        self.flask_app = flask_app
+        self.threads = threads
+        self.routes = {("POST", "/"): index_async}
+        self._executor = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self._ensure_executor()
+        limit = self._body_limit(scope)
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            size = await self._read_body(receive, body, limit)
+            if size is None:
+                return
+            if limit and size > limit:
+                await self._send_plain(send, 413, b"Request Entity Too Large")
+                return
+            body.seek(0)
+            environ = build_environ(scope, body)
+            view = self.routes.get((environ["REQUEST_METHOD"], environ["PATH_INFO"]))
+            if view is not None:
+                await self._dispatch(view, environ, send)
+            else:
+                await self._bridge(environ, send)
+        finally:
+            body.close()
+
+    def _ensure_executor(self):
+        # Route-level asyncio.to_thread() calls use the loop's default executor, so size that one.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="asgi")
+            asyncio.get_running_loop().set_default_executor(self._executor)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._ensure_executor()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _body_limit(self, scope):
+        """The route's upload limit, as UploadRequest applies it under WSGI."""
+        if scope["method"] == "POST" and scope["path"].rstrip("/").endswith("/api/batches"):
+            return self.flask_app.config.get("BATCH_MAX_CONTENT_LENGTH")
+        return self.flask_app.config.get("MAX_CONTENT_LENGTH")
+
+    async def _read_body(self, receive, body, limit):
+        """Writes the request body into the spooled file `body` and returns its size, or None on a disconnect.
+
+        Past `limit` only the size is kept. Once the body outgrows memory the
+        writes go to disk, so they are made from the thread pool."""
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if chunk and (not limit or size <= limit):
+                if size > SPOOL_MAX_BYTES:
+                    await asyncio.to_thread(body.write, chunk)
+                else:
+                    body.write(chunk)
+            if not message.get("more_body"):
+                return size
+
+    async def _dispatch(self, view, environ, send):
+        """Runs an async view through Flask's request hooks, like Flask.full_dispatch_request()."""
+        app = self.flask_app
+        ctx = app.request_context(environ)
+        ctx.push()
+        error = None
+        try:
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await view()
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            body = response.get_data()
+        finally:
+            ctx.pop(error)
+        await send({"type": "http.response.start", "status": response.status_code, "headers": _headers(response.headers.items())})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _bridge(self, environ, send):
+        """Runs the WSGI app in a worker thread and relays its response chunk by chunk (SSE included)."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=16)
+        closed = threading.Event()
+
+        def put(message):
+            if not closed.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        def run():
+            response = {}
+
+            def start_response(status, headers, exc_info=None):
+                response["status"] = int(status.split(" ", 1)[0])
+                response["headers"] = headers
+
+            try:
+                iterable = self.flask_app(environ, start_response)
+                try:
+                    put({"type": "http.response.start", "status": response["status"], "headers": _headers(response["headers"])})
+                    response["started"] = True
+                    for chunk in iterable:
+                        if closed.is_set():
+                            break
+                        if chunk:
+                            put({"type": "http.response.body", "body": chunk, "more_body": True})
+                finally:
+                    close = getattr(iterable, "close", None)
+                    if close is not None:
+                        close()
+            except Exception as e:
+                logger.exception("[ASGI] WSGI app failed: %s", e)
+                if not response.get("started"):
+                    put({"type": "http.response.start", "status": 500, "headers": [(b"content-type", b"text/plain")]})
+            finally:
+                put(None)
+
+        worker = loop.run_in_executor(None, run)
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                await send(message)
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            closed.set()
+            # Unblock a worker still waiting to hand over a chunk.
+            while not queue.empty():
+                queue.get_nowait()
+            await worker
+
+    @staticmethod
+    async def _send_plain(send, status, body):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,63 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .services.batch_service import BatchScreener, iter_pdf_sources
+
+
+@click.command('screen-resumes')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--jd', 'jd_file', required=True, type=click.File('r', encoding='utf-8'), help='Job description text file.')
+@click.option('--out', 'output_dir', required=True, type=click.Path(file_okay=False), help='Output directory; re-use it to resume.')
+@click.option('--concurrency', default=None, type=int, help='Analyses in flight at once.')
+@click.option('--min-score', default=None, type=int, help='Local pre-screen score (0-100) needed for a full analysis.')
+@click.option('--top-k', default=None, type=int, help='Only fully analyze the best K candidates by pre-screen score.')
+@click.option('--top', default=10, show_default=True, help='How many top candidates to print.')
+@with_appcontext
+def screen_resumes_command(source, jd_file, output_dir, concurrency, min_score, top_k, top):
+    """Rank every PDF in SOURCE (a directory or .zip) against one job description."""
+    screener = BatchScreener(
+        current_app.extensions['ai_service'],
+        output_dir,
+        concurrency=concurrency or current_app.config['BATCH_CONCURRENCY'],
+        extract_workers=current_app.config['PDF_WORKERS'],
+        prescreener=current_app.extensions['prescreener'],
+        threshold=min_score if min_score is not None else current_app.config['PRESCREEN_THRESHOLD'],
+        top_k=top_k if top_k is not None else current_app.config['PRESCREEN_TOP_K'],
+        layout=current_app.config['PDF_LAYOUT'],
+    )
+
+    def progress(record, manifest):
+        finished = manifest['completed'] + manifest['failed'] + manifest['gated']
+        if record.get('gated'):
+            outcome = f"gated (pre-screen {record['prescreen_score']})"
+        else:
+            outcome = record.get('error') or f"score {record.get('overall_score')}"
+        click.echo(f"[{finished}] {record['file']}: {outcome}")
+
+    manifest = screener.run(
+        iter_pdf_sources(source, current_app.config['BATCH_MAX_PDF_BYTES']), jd_file.read(), progress=progress
+    )
+    click.echo(
+        f"Done: {manifest['completed']} screened, {manifest['gated']} gated, {manifest['failed']} failed, "
+        f"{manifest['skipped']} already done. Rankings written to {output_dir}"
+    )
+    for rank, record in enumerate(screener.rankings()[:top], 1):
+        click.echo(f"{rank:>3}. {record.get('overall_score', '-')!s:>4}  {record.get('candidate') or '-'}  ({record['file']})")
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Write content-hashed, precompressed copies of app/static for /assets."""
+    assets = current_app.extensions['assets']
+    files = assets.build()
+    for name, entry in sorted(files.items()):
+        encodings = ', '.join(entry['encodings']) or 'identity only'
+        click.echo(f"{name} -> {entry['path']} ({encodings})")
+    click.echo(f"Wrote {len(files)} assets to {assets.directory}")
+
+
+def register_commands(app):
+    app.cli.add_command(screen_resumes_command)
+    app.cli.add_command(build_assets_command)
@@ -1,55 +1,630 @@
-from flask import Blueprint, render_template, request, current_app
+from flask import Blueprint, render_template, request, current_app, jsonify, url_for, redirect, Response, stream_with_context, g, abort, send_file, send_from_directory
+from werkzeug.http import is_resource_modified
+from datetime import datetime, timezone
+import asyncio
+import hashlib
+import json
+import logging
 import os
+import re
+import time
+import uuid
+from .services.admission_service import OverloadedError
 from .services.pdf_service import PDFService
-from .services.ai_service import AIService
+from .services.report_service import REPORT_VERSION
+from .services.job_service import QueueFullError, PENDING, RUNNING, DONE
 
 main = Blueprint('main', __name__)
+logger = logging.getLogger(__name__)
+
+
+@main.app_context_processor
+def inject_submit_mode():
+    return {'submit_mode': current_app.config['SUBMIT_MODE']}
+
+
+@main.app_context_processor
+def inject_asset_url():
+    return {'asset_url': asset_url}
+
+
+def asset_url(filename):
+    """Fingerprinted /assets URL for a static file, or the plain /static one when assets are not built."""
+    hashed = current_app.extensions['assets'].url(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('main.asset', filename=hashed)
+
+
+def _ai_service():
+    return current_app.extensions['ai_service']
+
+
+def _metrics():
+    return current_app.extensions['metrics']
+
+
+@main.before_app_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@main.after_app_request
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.endpoint or 'unmatched'
+        _metrics().observe('http_request_duration_seconds', time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        _metrics().inc('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+
+def _admission():
+    return current_app.extensions['admission']
+
+
+def _client_id():
+    # Fair-share key; behind a proxy, configure ProxyFix so this is the real client address.
+    return request.remote_addr
+
+
+def _busy_message(error):
+    return f"The analyzer is at capacity right now. Please try again in {error.retry_after} seconds."
+
+
+def _render_index(**context):
+    with _metrics().timer('render'):
+        return render_template('index.html', **context)
+
+
+def _extract(pdf_source):
+    with _metrics().timer('pdf_extract'):
+        result = PDFService.extract(
+            pdf_source,
+            parallel_min_pages=current_app.config['PDF_PARALLEL_MIN_PAGES'],
+            workers=current_app.config['PDF_WORKERS'],
+            layout=current_app.config['PDF_LAYOUT'],
+        )
+    # Page structure is only available here, so running headers and footers are stripped now.
+    return result.compacted_text()
+
+
+def _load_resume():
+    """Resolves the resume for this request, either a fresh upload or a retry of an earlier one.
+
+    New uploads are extracted straight from memory unless the same file was
+    kept before, in which case its stored text is reused; call
+    _persist_upload() when the file needs to be kept for a retry.
+
+    Returns (resume_text, filename, error_message)."""
+    uploads = current_app.extensions['uploads']
+    resume_file = request.files.get('resume')
+    existing_upload = request.form.get('existing_upload')
+
+    # Handle new upload
+    if resume_file and resume_file.filename and resume_file.filename.endswith('.pdf'):
+        data = resume_file.stream.read()
+        key = uploads.make_key(data)
+        text = uploads.get_text(key)
+        if text is None:
+            text = _extract(data)
+        g.upload = (key, data, text)
+        return text, resume_file.filename, None
+    # Handle retry with a kept upload
+    elif existing_upload:
+        text = uploads.get_text(existing_upload)
+        if text is None:
+            pdf_path = uploads.path(existing_upload)
+            if pdf_path is None:
+                return None, None, "File not found. Please upload again."
+            text = _extract(pdf_path)
+        g.upload = (existing_upload, None, text)
+        return text, request.form.get('existing_filename'), None
+
+    return None, None, "Please upload a PDF resume."
+
+
+def _previous_analysis():
+    """Inputs and result of the analysis this form was resubmitted from, when it can seed an incremental run."""
+    result_id = request.form.get('previous_result')
+    if not result_id:
+        return None
+    job = current_app.extensions['jobs'].store.get(result_id)
+    if job is None or job['status'] != DONE or not job['result'] or job['result'].get('error'):
+        return None
+    return {"resume_text": job['resume_text'], "job_description": job['job_description'], "result": job['result']}
+
+
+def _persist_upload():
+    """Keeps this request's PDF and its extracted text so a later retry can skip both; returns the upload key."""
+    upload = g.get('upload')
+    if upload is None:
+        return None
+    key, data, text = upload
+    with _metrics().timer('upload_save'):
+        current_app.extensions['uploads'].put(key, data, text)
+    return key
+
 
 @main.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
+        job_description = request.form.get('job_description')
         try:
-            resume_file = request.files.get('resume')
-            job_description = request.form.get('job_description')
             user_api_key = request.form.get('api_key')
-            existing_filename = request.form.get('existing_filename')
-            
-            pdf_path = None
-            filename = None
-
-            # Handle new upload
-            if resume_file and resume_file.filename and resume_file.filename.endswith('.pdf'):
-                filename = resume_file.filename
-                pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                resume_file.save(pdf_path)
-            # Handle retry with existing file
-            elif existing_filename:
-                filename = existing_filename
-                pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                if not os.path.exists(pdf_path):
-                     return render_template('index.html', result={"error": "File not found. Please upload again."}, job_description=job_description)
-            
-            if pdf_path:
-                # Analyze
-                resume_text = PDFService.extract_text(pdf_path)
-                ai_service = AIService(current_app.config['GOOGLE_API_KEY'])
-                
-                # Use user api key if provided, otherwise default
-                result = ai_service.analyze_resume(resume_text, job_description, api_key=user_api_key)
-                
-                # If resource exhausted, pass back the filename so we can retry
-                if result.get('error') == 'RESOURCE_EXHAUSTED':
-                    return render_template('index.html', result=result, job_description=job_description, existing_filename=filename)
-                
-                return render_template('index.html', result=result, job_description=job_description)
-            else:
-                 return render_template('index.html', result={"error": "Please upload a PDF resume."}, job_description=job_description)
+
+            resume_text, filename, error = _load_resume()
+            if error:
+                return _render_index(result={"error": error}, job_description=job_description)
+
+            # Use user api key if provided, otherwise default
+            try:
+                with _admission().admit(_client_id()):
+                    result = _ai_service().analyze_resume(
+                        resume_text, job_description, api_key=user_api_key, previous=_previous_analysis()
+                    )
+            except OverloadedError as e:
+                return _busy_page(e, job_description)
+
+            return _analysis_done(result, resume_text, job_description, filename)
 
         except Exception as e:
-            import sys
-            import traceback
-            print(f"SYSTEM BREACH: Internal Error: {str(e)}", file=sys.stderr)
-            traceback.print_exc(file=sys.stderr)
-            return render_template('index.html', result={"error": f"Internal System Error: {str(e)}"}, job_description=job_description if job_description else "")
-            
-    return render_template('index.html', result=None, job_description="")
+            return _analysis_failed(e, job_description)
+
+    return _render_index(result=None, job_description="")
+
+
+async def index_async():
+    """POST / for the ASGI server (app.asgi): the same steps as index(), but the analysis is awaited.
+
+    Runs inside the request context. Parsing the upload, PDF extraction, the
+    job store and template rendering are blocking, so they run in the loop's
+    thread pool; only the wait on Gemini stays on the event loop."""
+    job_description = None
+    try:
+        job_description, user_api_key, (resume_text, filename, error), previous = await asyncio.to_thread(
+            lambda: (request.form.get('job_description'), request.form.get('api_key'), _load_resume(), _previous_analysis())
+        )
+        if error:
+            return await asyncio.to_thread(_render_index, result={"error": error}, job_description=job_description)
+
+        admission = _admission()
+        try:
+            # acquire() may wait in the admission queue; that wait must not block the loop either.
+            ticket = await asyncio.to_thread(admission.acquire, _client_id())
+        except OverloadedError as e:
+            return await asyncio.to_thread(_busy_page, e, job_description)
+        try:
+            result = await _ai_service().analyze_resume_async(
+                resume_text, job_description, api_key=user_api_key, previous=previous
+            )
+        finally:
+            admission.release(ticket)
+
+        return await asyncio.to_thread(_analysis_done, result, resume_text, job_description, filename)
+
+    except Exception as e:
+        return await asyncio.to_thread(_analysis_failed, e, job_description)
+
+
+def _busy_page(error, job_description):
+    html = _render_index(result={"error": _busy_message(error)}, job_description=job_description)
+    return html, 503, {'Retry-After': str(error.retry_after)}
+
+
+def _analysis_done(result, resume_text, job_description, filename):
+    # If resource exhausted, keep the upload; the result page passes back its key so we can retry
+    upload_key = _persist_upload() if result.get('error') == 'RESOURCE_EXHAUSTED' else None
+
+    # POST-redirect-GET: reloading the result page must never re-run the analysis.
+    store = current_app.extensions['jobs'].store
+    result_id = store.create(resume_text, job_description, filename=filename, status=RUNNING, upload_key=upload_key)
+    store.complete(result_id, result)
+    return redirect(url_for('main.result_page', result_id=result_id), 303)
+
+
+def _analysis_failed(error, job_description):
+    # exc_info is passed explicitly: under ASGI this runs on a pool thread, outside the except block.
+    logger.error("SYSTEM BREACH: Internal Error: %s", error, exc_info=error)
+    return _render_index(result={"error": f"Internal System Error: {str(error)}"}, job_description=job_description if job_description else "")
+
+
+@main.route('/api/jobs', methods=['POST'])
+def submit_job():
+    job_description = request.form.get('job_description') or ""
+    resume_text, filename, error = _load_resume()
+    if error:
+        return jsonify({"error": error}), 400
+
+    # The outcome is only known later, so keep the file in case the job asks for a retry.
+    upload_key = _persist_upload()
+    previous = _previous_analysis()
+    analyze = _ai_service().analyze_resume
+    try:
+        job_id = current_app.extensions['jobs'].submit(
+            resume_text,
+            job_description,
+            lambda resume, jd, api_key=None: analyze(resume, jd, api_key=api_key, previous=previous),
+            api_key=request.form.get('api_key'),
+            filename=filename,
+            upload_key=upload_key,
+        )
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': str(_admission().retry_after())}
+
+    return jsonify({
+        "job_id": job_id,
+        "status": PENDING,
+        "status_url": url_for('main.job_status', job_id=job_id),
+        "result_url": url_for('main.result_page', result_id=job_id),
+    }), 202
+
+
+@main.route('/health')
+def health():
+    """Cheap liveness and diagnostics view; never calls the Gemini API synchronously."""
+    ext = current_app.extensions
+    scheduler = ext['scheduler']
+    return jsonify({
+        "status": "ok",
+        "model": ext['ai_service'].model,
+        "model_catalog": ext['model_catalog'].snapshot(),
+        "analysis_cache": ext['analysis_cache'].stats(),
+        "jd_profiles": ext['jd_profiles'].stats(),
+        "near_duplicates": ext['near_duplicates'].stats() if ext['near_duplicates'] is not None else None,
+        "genai_clients": ext['genai_clients'].stats(),
+        "scheduler": scheduler.stats() if scheduler is not None else None,
+        "admission": ext['admission'].stats(),
+    })
+
+
+@main.route('/metrics')
+def metrics():
+    """Prometheus text exposition, summed across every worker process sharing METRICS_DIR."""
+    return Response(_metrics().render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+@main.route('/assets/<path:filename>')
+def asset(filename):
+    """Serves a fingerprinted static file, precompressed when the client accepts it.
+
+    The content hash is part of the name, so responses are cacheable forever."""
+    assets = current_app.extensions['assets']
+    encodings = assets.encodings(filename)
+    if encodings is None:
+        abort(404)
+    encoding = next((e for e in encodings if request.accept_encodings[e]), None)
+    suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding, '')
+    response = send_from_directory(
+        assets.directory,
+        filename + suffix,
+        mimetype=assets.mimetype(filename),
+        max_age=current_app.config['ASSET_MAX_AGE'],
+    )
+    if encoding:
+        response.content_encoding = encoding
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@main.route('/api/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """Runs the analysis over Server-Sent Events, pushing each top-level section as soon as it is generated.
+
+    The finished result is stored as a job so the page can open the fully rendered report afterwards."""
+    job_description = request.form.get('job_description') or ""
+    resume_text, filename, error = _load_resume()
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        ticket = _admission().acquire(_client_id())
+    except OverloadedError as e:
+        return jsonify({"error": _busy_message(e)}), 503, {'Retry-After': str(e.retry_after)}
+
+    try:
+        upload_key = _persist_upload()
+        store = current_app.extensions['jobs'].store
+        job_id = store.create(resume_text, job_description, filename=filename, status=RUNNING, upload_key=upload_key)
+    except Exception:
+        _admission().release(ticket)
+        raise
+    result_url = url_for('main.result_page', result_id=job_id)
+    events = _ai_service().stream_analysis(
+        resume_text, job_description, api_key=request.form.get('api_key'), previous=_previous_analysis()
+    )
+
+    def generate():
+        yield _sse("job", {"job_id": job_id, "result_url": result_url})
+        try:
+            for event in events:
+                if event[0] == "section":
+                    yield _sse("section", {"name": event[1], "data": event[2]})
+                    continue
+                store.complete(job_id, event[1])
+                if event[0] == "error":
+                    yield _sse("error", {"error": event[1]["error"], "result_url": result_url})
+                else:
+                    yield _sse("done", {"result_url": result_url})
+        except Exception as e:
+            store.fail(job_id, f"Internal System Error: {str(e)}")
+            yield _sse("error", {"error": str(e), "result_url": result_url})
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    # Runs when the server closes the response, even if the client left before the stream started.
+    admission = _admission()
+    response.call_on_close(lambda: admission.release(ticket))
+    return response
+
+
+@main.route('/api/prescreen', methods=['POST'])
+def prescreen():
+    """Local keyword/skill/quantification scores for one resume; no LLM call is made."""
+    job_description = request.form.get('job_description')
+    if not job_description:
+        return jsonify({"error": "A job description is required."}), 400
+    resume_text, filename, error = _load_resume()
+    if error:
+        return jsonify({"error": error}), 400
+    scores = current_app.extensions['prescreener'].score(resume_text, job_description)
+    return jsonify(dict(scores, filename=filename))
+
+
+@main.route('/api/parse', methods=['POST'])
+def parse_resume():
+    """Layout-aware section model of one resume PDF; no LLM call is made.
+
+    With a job_description, every section also gets the local pre-screen scores."""
+    resume_file = request.files.get('resume')
+    existing_upload = request.form.get('existing_upload')
+    if resume_file and resume_file.filename and resume_file.filename.endswith('.pdf'):
+        source = resume_file.stream.read()
+        filename = resume_file.filename
+    elif existing_upload and current_app.extensions['uploads'].path(existing_upload):
+        source = current_app.extensions['uploads'].path(existing_upload)
+        filename = request.form.get('existing_filename')
+    else:
+        return jsonify({"error": "Please upload a PDF resume."}), 400
+
+    with _metrics().timer('pdf_extract'):
+        structured = PDFService.extract(
+            source,
+            parallel_min_pages=current_app.config['PDF_PARALLEL_MIN_PAGES'],
+            workers=current_app.config['PDF_WORKERS'],
+            layout=True,
+        ).structured
+    body = structured.to_dict()
+    job_description = request.form.get('job_description')
+    if job_description and len(structured):
+        scores = current_app.extensions['prescreener'].score_many([section.text for section in structured], job_description)
+        for section, score in zip(body["sections"], scores):
+            section["prescreen"] = score
+    return jsonify(dict(body, filename=filename))
+
+
+_BATCH_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+def _batch_or_404(batch_id):
+    batches = current_app.extensions['batches']
+    if not _BATCH_ID.match(batch_id) or not batches.exists(batch_id):
+        return None
+    return batches
+
+
+@main.route('/api/batches', methods=['POST'])
+def create_batch():
+    """Screens a zip of PDFs, or a directory under BATCH_ROOT, against one job description."""
+    job_description = request.form.get('job_description')
+    if not job_description:
+        return jsonify({"error": "A job description is required."}), 400
+
+    batches = current_app.extensions['batches']
+    batch_id = uuid.uuid4().hex
+    archive = request.files.get('resumes')
+    directory = request.form.get('directory')
+
+    if archive and archive.filename and archive.filename.lower().endswith('.zip'):
+        os.makedirs(batches.batch_dir(batch_id), exist_ok=True)
+        source = os.path.join(batches.batch_dir(batch_id), 'source.zip')
+        archive.save(source)
+    elif directory:
+        root = current_app.config['BATCH_ROOT']
+        if not root:
+            return jsonify({"error": "Directory batches are disabled on this server."}), 400
+        root = os.path.realpath(root)
+        source = os.path.realpath(os.path.join(root, directory))
+        if os.path.commonpath([root, source]) != root or not os.path.isdir(source):
+            return jsonify({"error": "Directory not found."}), 400
+    else:
+        return jsonify({"error": "Upload a .zip of PDF resumes or name a directory."}), 400
+
+    batches.create(batch_id, source, job_description)
+    batches.start(batch_id)
+    return jsonify({
+        "batch_id": batch_id,
+        "status_url": url_for('main.batch_status', batch_id=batch_id),
+        "results_url": url_for('main.batch_results', batch_id=batch_id),
+    }), 202
+
+
+@main.route('/api/batches/<batch_id>')
+def batch_status(batch_id):
+    batches = _batch_or_404(batch_id)
+    if batches is None:
+        return jsonify({"error": "Batch not found."}), 404
+    manifest = batches.screener(batch_id).status() or {"state": "queued"}
+    # A 'running' manifest with no live runner was interrupted (e.g. the worker restarted).
+    if manifest.get('state') == 'running' and not batches.is_running(batch_id):
+        manifest['state'] = 'interrupted'
+    return jsonify(dict(manifest, batch_id=batch_id))
+
+
+@main.route('/api/batches/<batch_id>/resume', methods=['POST'])
+def resume_batch(batch_id):
+    batches = _batch_or_404(batch_id)
+    if batches is None:
+        return jsonify({"error": "Batch not found."}), 404
+    started = batches.start(batch_id)
+    return jsonify({"batch_id": batch_id, "resumed": started}), 202
+
+
+@main.route('/api/batches/<batch_id>/results')
+def batch_results(batch_id):
+    """Ranking of everything screened so far, highest overall_score first, as JSONL (default) or CSV."""
+    batches = _batch_or_404(batch_id)
+    if batches is None:
+        return jsonify({"error": "Batch not found."}), 404
+    screener = batches.screener(batch_id)
+    ranked = screener.rankings()
+    if request.args.get('format') == 'csv':
+        return Response(screener.rankings_csv(ranked), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename=batch-{batch_id}.csv'})
+    body = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in ranked)
+    return Response(body, mimetype='application/x-ndjson')
+
+
+@main.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = current_app.extensions['jobs'].store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify({
+        "job_id": job_id,
+        "status": job['status'],
+        "error": job['error'],
+        "created_at": job['created_at'],
+        "updated_at": job['updated_at'],
+        "result_url": url_for('main.result_page', result_id=job_id),
+    })
+
+
+@main.route('/api/jobs/<job_id>/result')
+def job_result(job_id):
+    job = current_app.extensions['jobs'].store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+    if job['status'] in (PENDING, RUNNING):
+        return jsonify({"job_id": job_id, "status": job['status']}), 202
+    return jsonify(job['result'] or {"error": job['error']})
+
+
+@main.route('/jobs/<job_id>')
+def job_page(job_id):
+    job = current_app.extensions['jobs'].store.get(job_id)
+    if job is None:
+        return _render_index(result={"error": "Analysis not found. Please upload again."}, job_description=""), 404
+    if job['status'] in (PENDING, RUNNING):
+        # The page picks up polling where the submitting page left off.
+        return _render_index(result=None, job_description=job['job_description'], pending_job_id=job_id)
+    return redirect(url_for('main.result_page', result_id=job_id), 303)
+
+
+def _page_version():
+    # Part of the HTML ETag so a redeployed template invalidates cached result pages.
+    version = current_app.extensions.get('page_version')
+    if version is None:
+        source, _, _ = current_app.jinja_loader.get_source(current_app.jinja_env, 'index.html')
+        # The page embeds fingerprinted asset URLs, so a rebuilt asset changes the version too.
+        assets = json.dumps(current_app.extensions['assets'].load(), sort_keys=True)
+        version = current_app.extensions['page_version'] = hashlib.sha256((source + assets).encode('utf-8')).hexdigest()[:12]
+    return version
+
+
+def _cached(job, etag, build):
+    """Answers conditional GETs for a finished result with 304 and marks the response cacheable.
+
+    Completed results never change, so the browser may keep them; they are
+    `private` because they carry the candidate's personal details, which no
+    shared cache or reverse proxy may store. Failed ones are revalidated
+    because a retry replaces them."""
+    last_modified = datetime.fromtimestamp(int(job['updated_at']), tz=timezone.utc)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    if job['status'] == DONE:
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config['RESULT_CACHE_MAX_AGE']
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def _result_etag(job, variant):
+    payload = f"{job['id']}:{job['updated_at']}:{variant}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+@main.route('/results/<result_id>')
+def result_page(result_id):
+    job = current_app.extensions['jobs'].store.get(result_id)
+    if job is None:
+        return _render_index(result={"error": "Analysis not found. Please upload again."}, job_description=""), 404
+    if job['status'] in (PENDING, RUNNING):
+        return redirect(url_for('main.job_page', job_id=result_id), 303)
+
+    result = job['result'] or {"error": job['error']}
+    retry = result.get('error') == 'RESOURCE_EXHAUSTED' and job['upload_key']
+    # A revised resume or JD submitted from this page only regenerates what the edit affects.
+    previous_result = result_id if job['status'] == DONE and not result.get('error') else None
+    existing_filename = job['filename'] if retry else None
+    existing_upload = job['upload_key'] if retry else None
+    report_url = url_for('main.result_report', result_id=result_id) if not result.get('error') else None
+
+    def build():
+        html = _render_index(
+            result=result,
+            job_description=job['job_description'],
+            existing_filename=existing_filename,
+            existing_upload=existing_upload,
+            previous_result=previous_result,
+            report_url=report_url,
+        )
+        return Response(html, mimetype='text/html')
+
+    return _cached(job, _result_etag(job, f"html:{_page_version()}"), build)
+
+
+@main.route('/api/results/<result_id>')
+def result_json(result_id):
+    job = current_app.extensions['jobs'].store.get(result_id)
+    if job is None:
+        return jsonify({"error": "Result not found."}), 404
+    if job['status'] in (PENDING, RUNNING):
+        return jsonify({"result_id": result_id, "status": job['status']}), 202
+    return _cached(job, _result_etag(job, "json"), lambda: jsonify(job['result'] or {"error": job['error']}))
+
+
+@main.route('/results/<result_id>/report.pdf')
+def result_report(result_id):
+    """The stored result as a text-based PDF, rendered once per result version and then served from disk."""
+    job = current_app.extensions['jobs'].store.get(result_id)
+    if job is None:
+        return jsonify({"error": "Result not found."}), 404
+    if job['status'] != DONE or not job['result'] or job['result'].get('error'):
+        return jsonify({"error": "No report is available for this result."}), 409
+
+    def build():
+        version = f"{int(job['updated_at'])}-{REPORT_VERSION}"
+        with _metrics().timer('report_render'):
+            path = current_app.extensions['reports'].get_or_render(result_id, version, job['result'])
+        name = (job['result'].get('candidate_info') or {}).get('name') or 'Resume'
+        filename = re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or 'Resume'
+        return send_file(path, mimetype='application/pdf', as_attachment=True,
+                         download_name=f"{filename}_Report.pdf", conditional=False)
+
+    return _cached(job, _result_etag(job, f"pdf:{REPORT_VERSION}"), build)
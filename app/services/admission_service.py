@@ -0,0 +1,205 @@
+import logging
+import math
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the global cap is then disabled
+    fcntl = None
+
+from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class OverloadedError(Exception):
+    """Raised when an analysis is shed instead of queued; carries a Retry-After hint in seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Server is busy ({reason}); retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class GlobalSlots:
+    """Host-wide concurrency cap shared by every worker process through lock files.
+
+    Each of the `limit` slots is a file in `directory`; holding an exclusive
+    flock on it holds the slot. The kernel drops the lock when the holder
+    exits, so a crashed worker can never leak a slot."""
+
+    def __init__(self, directory, limit):
+        self.directory = directory
+        self.limit = limit
+        os.makedirs(directory, exist_ok=True)
+
+    def try_acquire(self):
+        """Returns an open file holding a slot, or None when all slots are taken."""
+        start = random.randrange(self.limit)
+        for offset in range(self.limit):
+            path = os.path.join(self.directory, f"slot-{(start + offset) % self.limit:04d}.lock")
+            f = open(path, "a+")
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except OSError:
+                f.close()
+        return None
+
+    @staticmethod
+    def release(handle):
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        finally:
+            handle.close()
+
+
+class Ticket:
+    """An admitted analysis; hand it back to AdmissionController.release()."""
+
+    def __init__(self, client, started, slot=None):
+        self.client = client
+        self.started = started
+        self.slot = slot
+
+
+class AdmissionController:
+    """Caps concurrent analyses and sheds the excess with a Retry-After hint.
+
+    At most `max_in_flight` analyses run per process and, when `global_max`
+    is set, per host across all workers. Up to `max_queue` more wait in FIFO
+    order for at most `queue_timeout` seconds; anything beyond that is
+    rejected at once. With `per_client` set, one client can hold at most that
+    many running or queued analyses, so a single burst cannot take the whole
+    queue."""
+
+    def __init__(self, max_in_flight=4, max_queue=8, queue_timeout=10.0, global_max=0, directory=None,
+                 per_client=0, metrics=None):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.per_client = per_client
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.slots = None
+        if global_max and directory:
+            if fcntl is None:
+                logger.warning("[ADMISSION] fcntl is unavailable; the global in-flight cap is disabled")
+            else:
+                self.slots = GlobalSlots(directory, global_max)
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._queue = []
+        self._clients = {}
+        self._avg_duration = None
+        self.admitted = 0
+        self.rejected = {}
+
+    def acquire(self, client=None):
+        """Blocks until the analysis may run and returns a Ticket, or raises OverloadedError."""
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        with self._cond:
+            if self.per_client and client is not None and self._clients.get(client, 0) >= self.per_client:
+                raise self._reject("client_limit")
+            if self._in_flight >= self.max_in_flight or self._queue:
+                if len(self._queue) >= self.max_queue:
+                    raise self._reject("queue_full")
+                marker = object()
+                self._queue.append(marker)
+                self._count_client(client, 1)
+                try:
+                    while self._queue[0] is not marker or self._in_flight >= self.max_in_flight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._count_client(client, -1)
+                            raise self._reject("queue_timeout")
+                        self._cond.wait(remaining)
+                finally:
+                    self._queue.remove(marker)
+                    # The next waiter may be admissible now that the head of the queue moved.
+                    self._cond.notify_all()
+            else:
+                self._count_client(client, 1)
+            self._in_flight += 1
+
+        slot = None
+        if self.slots is not None:
+            slot = self._global_slot(deadline)
+            if slot is None:
+                with self._cond:
+                    self._release_local(client)
+                    raise self._reject("global_limit")
+
+        with self._cond:
+            self.admitted += 1
+        self.metrics.inc("admissions_total", outcome="admitted")
+        self.metrics.observe("stage_duration_seconds", time.monotonic() - started, stage="admission_wait")
+        return Ticket(client, time.monotonic(), slot)
+
+    @contextmanager
+    def admit(self, client=None):
+        ticket = self.acquire(client)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def release(self, ticket):
+        if ticket.slot is not None:
+            GlobalSlots.release(ticket.slot)
+        duration = time.monotonic() - ticket.started
+        with self._cond:
+            self._avg_duration = duration if self._avg_duration is None else 0.8 * self._avg_duration + 0.2 * duration
+            self._release_local(ticket.client)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._queue),
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "global_max": self.slots.limit if self.slots is not None else None,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+            }
+
+    def retry_after(self):
+        """Seconds until a slot is likely to free up, from the recent average analysis time."""
+        with self._cond:
+            return self._retry_after()
+
+    def _global_slot(self, deadline):
+        while True:
+            slot = self.slots.try_acquire()
+            if slot is not None or time.monotonic() >= deadline:
+                return slot
+            time.sleep(min(0.05, max(0.0, deadline - time.monotonic())))
+
+    def _release_local(self, client):
+        self._in_flight -= 1
+        self._count_client(client, -1)
+        self._cond.notify_all()
+
+    def _count_client(self, client, delta):
+        if client is None:
+            return
+        count = self._clients.get(client, 0) + delta
+        if count > 0:
+            self._clients[client] = count
+        else:
+            self._clients.pop(client, None)
+
+    def _reject(self, reason):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        self.metrics.inc("admissions_total", outcome=reason)
+        return OverloadedError(reason, self._retry_after())
+
+    def _retry_after(self):
+        average = self._avg_duration or 10.0
+        backlog = (len(self._queue) + 1) / max(1, self.max_in_flight)
+        return max(1, min(120, math.ceil(average * backlog)))
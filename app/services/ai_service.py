@@ -1,8 +1,27 @@
-from google import genai
-import json
+import asyncio
+import hashlib
 import json
+import logging
 import os
-import sys
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .cache_service import normalize_text
+from .call_policy import CallPolicy
+from .client_registry import ClientRegistry
+from .jd_profile_service import JD_PROFILE_SCHEMA, build_profile_prompt, render_profile
+from .json_stream import TopLevelObjectStream, salvage_members
+from .metrics import Metrics
+from .scheduler_service import is_key_error, is_quota_error
+from .text_compaction import compact_text, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Rough output size of a complete report, used to reserve tokens-per-minute budget before a call.
+OUTPUT_TOKEN_ESTIMATE = 6000
+PROFILE_TOKEN_ESTIMATE = 800
 
 # Define the schema once to keep the service clean
 RESUME_ANALYSIS_SCHEMA = {
@@ -184,17 +203,261 @@ RESUME_ANALYSIS_SCHEMA = {
     ]
 }
 
+# Fingerprint of the schema; any edit to it invalidates previously cached analyses.
+RESUME_ANALYSIS_SCHEMA_VERSION = hashlib.sha256(
+    json.dumps(RESUME_ANALYSIS_SCHEMA, sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+# Independent groups of top-level sections for parallel execution. Output tokens are
+# generated sequentially, so splitting the document lets the groups generate side by side.
+SECTION_GROUPS = {
+    "scoring": ["candidate_info", "ats_analysis"],
+    "market": ["market_intel", "advanced_insights"],
+    "recruiter": ["recruiter_review"],
+    "tailoring": ["resume_tailoring"],
+    "growth": ["skill_gap_analysis", "career_roadmap", "interview_prep"],
+}
+
+
+def section_schema(sections):
+    """Narrows RESUME_ANALYSIS_SCHEMA to the given top-level sections."""
+    return {
+        "type": "object",
+        "properties": {name: RESUME_ANALYSIS_SCHEMA["properties"][name] for name in sections},
+        "required": list(sections),
+    }
+
+
+def empty_from_schema(schema):
+    """Builds a blank value shaped like the schema so the template can render a section that failed."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: empty_from_schema(prop) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return []
+    if kind == "integer":
+        return 0
+    return ""
+
+
+def conforms(value, schema):
+    """True when `value` has the types, enums and required keys the schema asks for."""
+    kind = schema.get("type")
+    if kind == "object":
+        if not isinstance(value, dict):
+            return False
+        properties = schema.get("properties", {})
+        if any(name not in value for name in schema.get("required", [])):
+            return False
+        return all(conforms(value[name], prop) for name, prop in properties.items() if name in value)
+    if kind == "array":
+        return isinstance(value, list) and all(conforms(item, schema["items"]) for item in value)
+    if kind == "integer":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if not isinstance(value, str):
+        return False
+    return "enum" not in schema or value in schema["enum"]
+
+
+class MalformedResponseError(ValueError):
+    """The model's response was not valid JSON or lacked requested sections."""
+
+
+def error_class(error):
+    """Coarse error class used for the errors_total metric."""
+    if is_quota_error(error):
+        return "quota"
+    if is_key_error(error):
+        return "invalid_key"
+    if isinstance(error, MalformedResponseError):
+        return "malformed_json"
+    if isinstance(error, TimeoutError):
+        return "timeout"
+    return "other"
+
+
 class AIService:
-    def __init__(self, api_key):
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key, cache=None, execution_mode="single", clients=None, scheduler=None, catalog=None,
+                 jd_profiles=None, jd_profile_min_chars=600, resume_token_budget=None, jd_token_budget=None,
+                 metrics=None, policy=None, revisions=None, similar=None):
+        self.api_key = api_key
+        self.model = MODEL_NAME
+        self.cache = cache
+        self.execution_mode = execution_mode
+        self.clients = clients if clients is not None else ClientRegistry()
+        self.scheduler = scheduler
+        self.catalog = catalog
+        self.jd_profiles = jd_profiles
+        self.jd_profile_min_chars = jd_profile_min_chars
+        self.resume_token_budget = resume_token_budget
+        self.jd_token_budget = jd_token_budget
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.policy = policy if policy is not None else CallPolicy(metrics=self.metrics)
+        self.revisions = revisions
+        self.similar = similar
 
-    def analyze_resume(self, resume_content, job_description, api_key=None):
+    @property
+    def client(self):
+        return self.clients.get(self.api_key)
+
+    def _client_for(self, api_key):
         # Use provided key if available, otherwise default to instance client
-        client = self.client
-        if api_key:
-            client = genai.Client(api_key=api_key)
+        return self.clients.get(api_key or self.api_key)
+
+    def _cache_key(self, resume_content, job_description):
+        if self.cache is None:
+            return None
+        return self.cache.make_key(resume_content, job_description, self.model, RESUME_ANALYSIS_SCHEMA_VERSION)
+
+    def _compact_inputs(self, resume_content, job_description):
+        """Normalizes both inputs and cuts each to its token budget before it reaches a prompt."""
+        with self.metrics.timer("compact"):
+            resume = compact_text(resume_content, self.resume_token_budget)
+            jd = compact_text(job_description, self.jd_token_budget)
+        for label, compacted in (("resume", resume), ("job description", jd)):
+            if compacted.truncated:
+                logger.warning(
+                    "[TOKEN BUDGET] Truncated %s from ~%d to ~%d tokens", label, compacted.original_tokens, compacted.tokens
+                )
+        return resume.text, jd.text
+
+    def _parse(self, text, sections=None):
+        """Decodes a JSON response, optionally checking each requested section against the schema."""
+        with self.metrics.timer("json_parse"):
+            try:
+                data = json.loads(text)
+            except ValueError as e:
+                raise MalformedResponseError(f"Response is not valid JSON: {e}") from e
+        if sections is not None:
+            properties = RESUME_ANALYSIS_SCHEMA["properties"]
+            bad = [
+                name for name in sections
+                if not isinstance(data, dict) or name not in data or not conforms(data[name], properties[name])
+            ]
+            if bad:
+                raise MalformedResponseError(f"Response is missing or has invalid sections: {', '.join(bad)}")
+        return data
+
+    def _repair(self, text, error, sections, resume_content, job_description, api_key=None, jd_profile=None, deadline=None,
+                models=None):
+        """Keeps the valid sections of a malformed response and regenerates only the rest.
+
+        Returns (result, regenerated_sections). Re-raises `error` when nothing
+        was salvageable, since regenerating everything costs as much as the
+        original call, and raises MalformedResponseError when the narrowed
+        retry is itself unusable."""
+        salvaged, missing = self._salvage(text, error, sections)
+        with self.metrics.timer("repair"):
+            try:
+                repaired = self._generate_sections(
+                    resume_content, job_description, missing, api_key, jd_profile=jd_profile, repair=False, deadline=deadline,
+                    models=models,
+                )
+            except Exception:
+                self.metrics.inc("section_repairs_total", len(missing), outcome="failed")
+                raise
+        self.metrics.inc("section_repairs_total", len(missing), outcome="ok")
+        salvaged.update(repaired)
+        return {name: salvaged[name] for name in sections}, missing
+
+    async def _repair_async(self, text, error, sections, resume_content, job_description, api_key=None, jd_profile=None,
+                            deadline=None, models=None):
+        salvaged, missing = self._salvage(text, error, sections)
+        with self.metrics.timer("repair"):
+            try:
+                repaired = await self._generate_sections_async(
+                    resume_content, job_description, missing, api_key, jd_profile=jd_profile, repair=False, deadline=deadline,
+                    models=models,
+                )
+            except Exception:
+                self.metrics.inc("section_repairs_total", len(missing), outcome="failed")
+                raise
+        self.metrics.inc("section_repairs_total", len(missing), outcome="ok")
+        salvaged.update(repaired)
+        return {name: salvaged[name] for name in sections}, missing
+
+    def _salvage(self, text, error, sections):
+        """(valid sections, sections to regenerate) from a malformed response; re-raises when nothing is valid."""
+        properties = RESUME_ANALYSIS_SCHEMA["properties"]
+        with self.metrics.timer("json_salvage"):
+            members, _ = salvage_members(text)
+            salvaged = {name: members[name] for name in sections if name in members and conforms(members[name], properties[name])}
+        missing = [name for name in sections if name not in salvaged]
+        if not salvaged:
+            raise error
+        logger.warning(
+            "[JSON REPAIR] Salvaged %d of %d sections (%s); regenerating %s",
+            len(salvaged), len(sections), error, ", ".join(missing),
+        )
+        return salvaged, missing
+
+    def jd_profile(self, job_description, api_key=None, deadline=None, build=False):
+        """Structured profile of the JD from the index; with `build`, one is built (once per unique JD) if missing.
+
+        Analyses only look the profile up, so a single analysis never waits on
+        an extra model call; a batch builds it up front (see
+        profile_job_description()). Returns None when profiling is disabled,
+        the JD is too short for a profile to be any smaller, or there is no
+        profile."""
+        if self.jd_profiles is None or len(normalize_text(job_description)) < self.jd_profile_min_chars:
+            return None
+        key = self.jd_profiles.make_key(job_description, self.model)
+        if not build:
+            return self.jd_profiles.lookup(key)
+
+        def build():
+            response = self._generate(
+                build_profile_prompt(job_description),
+                schema=JD_PROFILE_SCHEMA,
+                api_key=api_key,
+                temperature=0.0,
+                output_tokens=PROFILE_TOKEN_ESTIMATE,
+                deadline=deadline,
+            )
+            return self._parse(response.text)
+
+        with self.metrics.timer("jd_profile"):
+            return self.jd_profiles.get_or_build(key, build)
+
+    async def jd_profile_async(self, job_description, api_key=None, deadline=None, build=False):
+        if self.jd_profiles is None or len(normalize_text(job_description)) < self.jd_profile_min_chars:
+            return None
+        key = self.jd_profiles.make_key(job_description, self.model)
+        if not build:
+            return await asyncio.to_thread(self.jd_profiles.lookup, key)
+
+        async def build():
+            response = await self._generate_async(
+                build_profile_prompt(job_description),
+                schema=JD_PROFILE_SCHEMA,
+                api_key=api_key,
+                temperature=0.0,
+                output_tokens=PROFILE_TOKEN_ESTIMATE,
+                deadline=deadline,
+            )
+            return self._parse(response.text)
+
+        with self.metrics.timer("jd_profile"):
+            return await self.jd_profiles.get_or_build_async(key, build)
 
-        prompt = f"""
+    def profile_job_description(self, job_description, api_key=None):
+        """Builds the profile every analysis against this JD will then reuse; called once before a batch."""
+        _, job_description = self._compact_inputs("", job_description)
+        return self.jd_profile(job_description, api_key, self.policy.deadline(), build=True)
+
+    @staticmethod
+    def build_prompt(resume_content, job_description, sections=None, jd_profile=None):
+        if jd_profile is not None:
+            target = f"Target Role Profile (distilled from the JD):\n{render_profile(jd_profile)}"
+        else:
+            target = f"Target Job Description (JD): {job_description}"
+        focus = ""
+        if sections:
+            focus = f"""
+        SCOPE: This request covers ONLY these sections of the full report: {", ".join(sections)}.
+        Other sections are produced separately; apply the same rules to the ones requested here.
+        """
+        return f"""
         You are the 'Supreme AI Career Architect' - an ensemble of elite personas acting as one mind:
         1. THE CYNICAL SCANNER (ATS): A cold algorithm that calculates keyword density and formatting parsing.
         2. THE GOOGLE BAR RAISER: A Principal Engineer who demands 'zero tolerance' for fluff and enforces the X-Y-Z bullet point formula.
@@ -202,7 +465,7 @@ class AIService:
 
         INPUT DATA:
         - Candidate Resume: {resume_content}
-        - Target Job Description (JD): {job_description}
+        - {target}
 
         MISSION:
         Perform a ruthlessly detailed analysis of the candidate's fit for the role. 
@@ -218,49 +481,568 @@ class AIService:
         5. NO BOLDING: Do NOT use bolding (**) in any part of the response text.
         6. COVER LETTER: Must follow strict High-Fidelity Business Format (Salutation, 3-Paragraph Body, Sign-off). Do NOT include a Date. Ensure double spacing between paragraphs for readability.
         
+        {focus}
         Generate the response filling the provided JSON schema.
         """
+
+    def _generation_config(self, schema=RESUME_ANALYSIS_SCHEMA, temperature=0.7, timeout=None):
+        config = {
+            "response_mime_type": "application/json",
+            "response_schema": schema,
+            "temperature": temperature,
+        }
+        if timeout:
+            # Per-request HTTP timeout, in milliseconds, so a stuck call frees its worker.
+            config["http_options"] = {"timeout": max(1, int(timeout * 1000))}
+        return config
+
+    def _generate(self, prompt, schema=RESUME_ANALYSIS_SCHEMA, api_key=None, stream=False, temperature=0.7, output_tokens=None,
+                  deadline=None, models=None):
+        """Sends one generation request under the call policy (timeouts, retries, hedging).
+
+        User-supplied keys go straight to their own client. Otherwise the
+        scheduler, when configured, picks a key/model pair with remaining quota
+        and fails over on 429s, and a hedged duplicate prefers a different pair
+        than the attempts already in flight. Streams are never hedged. The
+        model that answered is added to `models` when a set is passed."""
+        estimated = estimate_tokens(prompt)
+        # Latency percentiles are tracked per request shape: full report, section group or JD profile.
+        kind = ("stream:" if stream else "") + ",".join(schema["properties"])
+
+        def call(client, model, timeout):
+            config = self._generation_config(schema, temperature, timeout)
+            if not stream:
+                with self.metrics.timer("generate"):
+                    response = client.models.generate_content(model=model, contents=prompt, config=config)
+                self._log_usage(model, estimated, getattr(response, "usage_metadata", None))
+                if models is not None:
+                    models.add(model)
+                return response
+            # The streaming request is only sent on first iteration; pull the first chunk
+            # here so quota errors surface inside the scheduler's failover loop.
+            started = time.perf_counter()
+            with self.metrics.timer("generate_first_chunk"):
+                chunks = iter(client.models.generate_content_stream(model=model, contents=prompt, config=config))
+                first = next(chunks, None)
+            chunks = itertools.chain([first] if first is not None else [], chunks)
+            if models is not None:
+                models.add(model)
+            return self._logged_stream(model, estimated, started, chunks)
+
+        if api_key or self.scheduler is None:
+            # A user's own key gets retries but no hedging, which would double their quota use.
+            client = self._client_for(api_key)
+            return self.policy.run(lambda timeout: call(client, self.model, timeout), deadline, kind=kind)
+        tokens = self._reserved_tokens(estimated, schema, output_tokens)
+        used = set()
+
+        def attempt(timeout):
+            return self.scheduler.execute(
+                lambda client, model: call(client, model, timeout), tokens, on_lease=lambda key, model: used.add((key, model))
+            )
+
+        def hedge(timeout):
+            return self.scheduler.execute(lambda client, model: call(client, model, timeout), tokens, avoid=set(used))
+
+        return self.policy.run(attempt, deadline, hedge=None if stream else hedge, kind=kind)
+
+    async def _generate_async(self, prompt, schema=RESUME_ANALYSIS_SCHEMA, api_key=None, temperature=0.7, output_tokens=None,
+                              deadline=None, models=None):
+        """_generate() through the SDK's async client (client.aio), for callers on an event loop.
+
+        Same routing, retries and hedging; a losing hedge is cancelled. There
+        is no streaming variant."""
+        estimated = estimate_tokens(prompt)
+        kind = ",".join(schema["properties"])
+
+        async def call(client, model, timeout):
+            config = self._generation_config(schema, temperature, timeout)
+            with self.metrics.timer("generate"):
+                response = await client.aio.models.generate_content(model=model, contents=prompt, config=config)
+            self._log_usage(model, estimated, getattr(response, "usage_metadata", None))
+            if models is not None:
+                models.add(model)
+            return response
+
+        if api_key or self.scheduler is None:
+            client = self._client_for(api_key)
+            return await self.policy.run_async(lambda timeout: call(client, self.model, timeout), deadline, kind=kind)
+        tokens = self._reserved_tokens(estimated, schema, output_tokens)
+        used = set()
+
+        def attempt(timeout):
+            return self.scheduler.execute_async(
+                lambda client, model: call(client, model, timeout), tokens, on_lease=lambda key, model: used.add((key, model))
+            )
+
+        def hedge(timeout):
+            return self.scheduler.execute_async(lambda client, model: call(client, model, timeout), tokens, avoid=set(used))
+
+        return await self.policy.run_async(attempt, deadline, hedge=hedge, kind=kind)
+
+    @staticmethod
+    def _reserved_tokens(estimated, schema, output_tokens=None):
+        if output_tokens is None:
+            share = len(schema["properties"]) / len(RESUME_ANALYSIS_SCHEMA["properties"])
+            output_tokens = int(OUTPUT_TOKEN_ESTIMATE * share)
+        return estimated + output_tokens
+
+    def _logged_stream(self, model, estimated, started, chunks):
+        # The final chunk carries the usage totals for the whole stream.
+        usage = None
+        for chunk in chunks:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk
+        self.metrics.observe("stage_duration_seconds", time.perf_counter() - started, stage="generate_stream")
+        self._log_usage(model, estimated, usage)
+
+    def _log_usage(self, model, estimated, usage):
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        response_tokens = getattr(usage, "candidates_token_count", None)
+        total_tokens = getattr(usage, "total_token_count", None)
+        if prompt_tokens:
+            self.metrics.inc("tokens_total", prompt_tokens, model=model, kind="prompt")
+        if response_tokens:
+            self.metrics.inc("tokens_total", response_tokens, model=model, kind="response")
+        logger.info(
+            "[TOKENS] model=%s prompt=%s (estimated %d) response=%s total=%s",
+            model, prompt_tokens, estimated, response_tokens, total_tokens,
+        )
+
+    def analyze_resume(self, resume_content, job_description, api_key=None, previous=None):
+        """Full analysis report for a resume against a JD.
+
+        `previous` ({"resume_text", "job_description", "result"} of an earlier
+        analysis the user is revising) lets a small edit regenerate only the
+        sections that depend on what changed; see RevisionPlanner. Without
+        one, an earlier analysis of near-identical inputs is served as is or
+        used as `previous`; see NearDuplicateIndex."""
+        cache_key = self._cache_key(resume_content, job_description)
+        cached = self._cached(cache_key, self.execution_mode)
+        if cached is not None:
+            return cached
+        signature, cached, previous = self._near_duplicate(
+            cache_key, self.execution_mode, resume_content, job_description, previous
+        )
+        if cached is not None:
+            return cached
+
+        result = self._analyze(resume_content, job_description, api_key, previous, cache_key)
+        self._remember(cache_key, signature, result, resume_content, job_description)
+        return result
+
+    def _analyze(self, resume_content, job_description, api_key, previous, cache_key):
+        plan = self._revision_plan(previous, resume_content, job_description)
+        resume_content, job_description = self._compact_inputs(resume_content, job_description)
+        deadline = self.policy.deadline()
+        models = set()
+        if plan is not None:
+            return self._reanalyze(
+                plan, previous["result"], resume_content, job_description, api_key, cache_key, deadline, models
+            )
+        if self.execution_mode == "parallel":
+            return self._analyze_parallel(resume_content, job_description, api_key, cache_key, deadline, models)
+
         try:
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt,
-                config={
-                    "response_mime_type": "application/json",
-                    "response_schema": RESUME_ANALYSIS_SCHEMA,
-                    "temperature": 0.7,
-                }
+            profile = self.jd_profile(job_description, api_key, deadline)
+            response = self._generate(
+                self.build_prompt(resume_content, job_description, jd_profile=profile), api_key=api_key, deadline=deadline,
+                models=models,
             )
-            return json.loads(response.text)
+            sections = list(RESUME_ANALYSIS_SCHEMA["properties"])
+            try:
+                result = self._parse(response.text, sections)
+            except MalformedResponseError as e:
+                result, _ = self._repair(
+                    response.text, e, sections, resume_content, job_description, api_key, profile, deadline, models
+                )
+            self._settle(result, cache_key, models)
+            self.metrics.inc("analyses_total", mode="single", outcome="ok")
+            return result
         except Exception as e:
-            error_str = str(e)
-            
-            # Diagnostic: List available models to help debugging
-            available_models = []
+            self.metrics.inc("analyses_total", mode="single", outcome="error")
+            return self._error_result(e, api_key)
+
+    async def analyze_resume_async(self, resume_content, job_description, api_key=None, previous=None):
+        """analyze_resume() for callers on an event loop; model calls go through client.aio.
+
+        The caller is expected to have extracted the resume off the loop. The
+        cache, near-duplicate index and revision diff read and write files
+        (the index under an exclusive flock), so they run in the default
+        thread pool rather than on the loop."""
+        cache_key = self._cache_key(resume_content, job_description)
+        cached = await asyncio.to_thread(self._cached, cache_key, self.execution_mode)
+        if cached is not None:
+            return cached
+        signature, cached, previous = await asyncio.to_thread(
+            self._near_duplicate, cache_key, self.execution_mode, resume_content, job_description, previous
+        )
+        if cached is not None:
+            return cached
+
+        result = await self._analyze_async(resume_content, job_description, api_key, previous, cache_key)
+        await asyncio.to_thread(self._remember, cache_key, signature, result, resume_content, job_description)
+        return result
+
+    async def _analyze_async(self, resume_content, job_description, api_key, previous, cache_key):
+        plan = await asyncio.to_thread(self._revision_plan, previous, resume_content, job_description)
+        resume_content, job_description = await asyncio.to_thread(self._compact_inputs, resume_content, job_description)
+        deadline = self.policy.deadline()
+        models = set()
+        if plan is not None:
+            return await self._reanalyze_async(
+                plan, previous["result"], resume_content, job_description, api_key, cache_key, deadline, models
+            )
+        if self.execution_mode == "parallel":
+            return await self._analyze_parallel_async(
+                resume_content, job_description, api_key, cache_key, deadline, models
+            )
+
+        try:
+            profile = await self.jd_profile_async(job_description, api_key, deadline)
+            response = await self._generate_async(
+                self.build_prompt(resume_content, job_description, jd_profile=profile), api_key=api_key, deadline=deadline,
+                models=models,
+            )
+            sections = list(RESUME_ANALYSIS_SCHEMA["properties"])
             try:
-                # List models
-                for m in client.models.list():
-                    if 'generateContent' in m.supported_generation_methods:
-                        available_models.append(m.name)
-                
-                # Print to console for immediate server-side visibility
-                print("\n[SYSTEM DIAGNOSTICS] AVAILABLE MODELS:", file=sys.stderr)
-                for m in available_models:
-                    print(f" - {m}", file=sys.stderr)
-                    
-            except Exception as list_err:
-                print(f"[SYSTEM DIAGNOSTICS] Failed to list models: {list_err}", file=sys.stderr)
-
-            if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str or "API key expired" in error_str or "API_KEY_INVALID" in error_str:
-                return {
-                    "error": "RESOURCE_EXHAUSTED",
-                    "message": "The system's API key is invalid, expired, or quota exhausted. Please provide your own Gemini API Key to continue.",
-                    "details": error_str
-                }
+                result = self._parse(response.text, sections)
+            except MalformedResponseError as e:
+                result, _ = await self._repair_async(
+                    response.text, e, sections, resume_content, job_description, api_key, profile, deadline, models
+                )
+            await asyncio.to_thread(self._settle, result, cache_key, models)
+            self.metrics.inc("analyses_total", mode="single", outcome="ok")
+            return result
+        except Exception as e:
+            self.metrics.inc("analyses_total", mode="single", outcome="error")
+            return self._error_result(e, api_key)
+
+    def _revision_plan(self, previous, resume_content, job_description):
+        if previous is None or self.revisions is None:
+            return None
+        with self.metrics.timer("revision_diff"):
+            return self.revisions.plan(previous, resume_content, job_description)
+
+    def _reanalyze(self, plan, previous_result, resume_content, job_description, api_key, cache_key, deadline, models):
+        """Regenerates the sections `plan` marks stale in one request and keeps the rest of `previous_result`."""
+        try:
+            regenerated = {}
+            if plan.regenerate:
+                profile = self.jd_profile(job_description, api_key, deadline)
+                regenerated = self._generate_sections(
+                    resume_content, job_description, plan.regenerate, api_key, jd_profile=profile, deadline=deadline,
+                    models=models,
+                )
+        except Exception as e:
+            self.metrics.inc("analyses_total", mode="incremental", outcome="error")
+            return self._error_result(e, api_key)
+        return self._merge_revision(plan, previous_result, regenerated, cache_key, models)
+
+    async def _reanalyze_async(self, plan, previous_result, resume_content, job_description, api_key, cache_key, deadline, models):
+        try:
+            regenerated = {}
+            if plan.regenerate:
+                profile = await self.jd_profile_async(job_description, api_key, deadline)
+                regenerated = await self._generate_sections_async(
+                    resume_content, job_description, plan.regenerate, api_key, jd_profile=profile, deadline=deadline,
+                    models=models,
+                )
+        except Exception as e:
+            self.metrics.inc("analyses_total", mode="incremental", outcome="error")
+            return self._error_result(e, api_key)
+        return await asyncio.to_thread(self._merge_revision, plan, previous_result, regenerated, cache_key, models)
+
+    def _merge_revision(self, plan, previous_result, regenerated, cache_key, models):
+        result = {
+            name: regenerated[name] if name in regenerated else previous_result[name]
+            for name in RESUME_ANALYSIS_SCHEMA["properties"]
+        }
+        result["meta"] = plan.meta()
+        self.metrics.inc("incremental_sections_total", len(plan.regenerate), outcome="regenerated")
+        self.metrics.inc("incremental_sections_total", len(plan.reuse), outcome="reused")
+        self.metrics.inc("analyses_total", mode="incremental", outcome="ok")
+        logger.info(
+            "[INCREMENTAL] Changed %s; regenerated %s, reused %d sections",
+            ", ".join(plan.changed) or "nothing", ", ".join(plan.regenerate) or "nothing", len(plan.reuse),
+        )
+        self._settle(result, cache_key, models)
+        return result
+
+    def _cached(self, cache_key, mode):
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            self.metrics.inc("analyses_total", mode=mode, outcome="cached")
+        return cached
+
+    def _near_duplicate(self, cache_key, mode, resume_content, job_description, previous):
+        """(signature, result to serve, previous analysis to start from) for a submission the exact cache missed.
+
+        A stored analysis at or above the index's threshold (when one is set)
+        is served as is; a weaker match becomes `previous` for an incremental
+        re-analysis, unless the caller already passed one. The index's own
+        entry for these exact inputs is served first, since the analysis cache
+        may have evicted it while the index still holds it."""
+        if self.similar is None or cache_key is None:
+            return None, None, previous
+        with self.metrics.timer("near_duplicate_lookup"):
+            exact = self.similar.entry(cache_key)
+            if exact is None:
+                signature = self.similar.signature(resume_content, job_description)
+                match = self.similar.find(signature)
+        if exact is not None:
+            self.metrics.inc("near_duplicates_total", outcome="exact")
+            self.metrics.inc("analyses_total", mode=mode, outcome="cached")
+            self.cache.set(cache_key, exact["result"])
+            return None, exact["result"], previous
+        # A match on our own key has just been found expired above.
+        if match is None or match.key == cache_key:
+            self.metrics.inc("near_duplicates_total", outcome="miss")
+            return signature, None, previous
+        serve = self.similar.threshold and match.similarity >= self.similar.threshold
+        if not serve and previous is not None:
+            self.metrics.inc("near_duplicates_total", outcome="miss")
+            return signature, None, previous
+        entry = self.similar.entry(match.key)
+        if entry is None:
+            # The analysis behind the match has expired from the index.
+            self.metrics.inc("near_duplicates_total", outcome="expired")
+            return signature, None, previous
+        if serve:
+            self.metrics.inc("near_duplicates_total", outcome="served")
+            self.metrics.inc("analyses_total", mode=mode, outcome="near_duplicate")
+            logger.info("[NEAR DUPLICATE] Serving analysis %s (similarity %.2f)", match.key[:12], match.similarity)
+            result = dict(entry["result"])
+            result["meta"] = dict(result.get("meta") or {}, near_duplicate={"similarity": round(match.similarity, 3)})
+            self.cache.set(cache_key, result)
+            return signature, result, previous
+        self.metrics.inc("near_duplicates_total", outcome="warm_start")
+        logger.info("[NEAR DUPLICATE] Starting from analysis %s (similarity %.2f)", match.key[:12], match.similarity)
+        return signature, None, entry
+
+    def _settle(self, result, cache_key, models):
+        """Caches a finished result, unless a call behind it was answered by a fallback model.
+
+        The cache key names the primary model, so a fallback's answer would
+        otherwise be replayed as the primary's; it is listed under
+        meta.fallback_models instead."""
+        fallback = sorted(models - {self.model})
+        if fallback:
+            result["meta"] = dict(result.get("meta") or {}, fallback_models=fallback)
+        elif cache_key is not None:
+            self.cache.set(cache_key, result)
+
+    def _remember(self, cache_key, signature, result, resume_content, job_description):
+        """Indexes a fresh analysis for near-duplicate lookups; partial, failed and failed-over ones are not indexed."""
+        meta = result.get("meta") or {}
+        if signature is None or result.get("error") or meta.get("section_errors") or meta.get("fallback_models"):
+            return
+        self.similar.add(cache_key, signature, resume_content, job_description, result)
+
+    def _generate_sections(self, resume_content, job_description, sections, api_key=None, jd_profile=None, repair=True,
+                           deadline=None, models=None):
+        response = self._generate(
+            self.build_prompt(resume_content, job_description, sections=sections, jd_profile=jd_profile),
+            schema=section_schema(sections),
+            api_key=api_key,
+            deadline=deadline,
+            models=models,
+        )
+        try:
+            data = self._parse(response.text, sections)
+        except MalformedResponseError as e:
+            if not repair:
+                raise
+            data, _ = self._repair(
+                response.text, e, sections, resume_content, job_description, api_key, jd_profile, deadline, models
+            )
+        return {name: data[name] for name in sections}
+
+    async def _generate_sections_async(self, resume_content, job_description, sections, api_key=None, jd_profile=None,
+                                       repair=True, deadline=None, models=None):
+        response = await self._generate_async(
+            self.build_prompt(resume_content, job_description, sections=sections, jd_profile=jd_profile),
+            schema=section_schema(sections),
+            api_key=api_key,
+            deadline=deadline,
+            models=models,
+        )
+        try:
+            data = self._parse(response.text, sections)
+        except MalformedResponseError as e:
+            if not repair:
+                raise
+            data, _ = await self._repair_async(
+                response.text, e, sections, resume_content, job_description, api_key, jd_profile, deadline, models
+            )
+        return {name: data[name] for name in sections}
+
+    def _analyze_parallel(self, resume_content, job_description, api_key, cache_key, deadline=None, models=None):
+        """Generates each SECTION_GROUPS entry as its own concurrent request and merges them.
+
+        A failed group is replaced with blank sections and reported under
+        meta.section_errors instead of discarding the groups that succeeded."""
+        # Profile the JD once up front so the groups don't race to build it.
+        profile = self.jd_profile(job_description, api_key, deadline)
+
+        def run(group, sections):
+            started = time.perf_counter()
+            try:
+                data = self._generate_sections(
+                    resume_content, job_description, sections, api_key, jd_profile=profile, deadline=deadline,
+                    models=models,
+                )
+                return group, data, None, time.perf_counter() - started
+            except Exception as e:
+                return group, None, e, time.perf_counter() - started
+
+        with ThreadPoolExecutor(max_workers=len(SECTION_GROUPS), thread_name_prefix="section") as pool:
+            outcomes = list(pool.map(lambda item: run(*item), SECTION_GROUPS.items()))
+        return self._merge_groups(outcomes, api_key, cache_key, models)
+
+    async def _analyze_parallel_async(self, resume_content, job_description, api_key, cache_key, deadline=None,
+                                      models=None):
+        profile = await self.jd_profile_async(job_description, api_key, deadline)
+
+        async def run(group, sections):
+            started = time.perf_counter()
+            try:
+                data = await self._generate_sections_async(
+                    resume_content, job_description, sections, api_key, jd_profile=profile, deadline=deadline,
+                    models=models,
+                )
+                return group, data, None, time.perf_counter() - started
+            except Exception as e:
+                return group, None, e, time.perf_counter() - started
+
+        outcomes = await asyncio.gather(*(run(group, sections) for group, sections in SECTION_GROUPS.items()))
+        return await asyncio.to_thread(self._merge_groups, outcomes, api_key, cache_key, models)
+
+    def _merge_groups(self, outcomes, api_key, cache_key, models=None):
+        """Merges (group, data, error, elapsed) outcomes into one report, blanking the groups that failed."""
+        result = {}
+        latency = {}
+        errors = {}
+        failures = []
+        for group, data, error, elapsed in outcomes:
+            latency[group] = round(elapsed * 1000)
+            if error is None:
+                result.update(data)
+                continue
+            failures.append(error)
+            self.metrics.inc("errors_total", kind=error_class(error))
+            logger.warning("[PARALLEL ANALYSIS] Section group '%s' failed: %s", group, error)
+            for name in SECTION_GROUPS[group]:
+                result[name] = empty_from_schema(RESUME_ANALYSIS_SCHEMA["properties"][name])
+                errors[name] = str(error)
+
+        if len(failures) == len(SECTION_GROUPS):
+            self.metrics.inc("analyses_total", mode="parallel", outcome="error")
+            return self._error_result(failures[0], api_key, counted=True)
+        self.metrics.inc("analyses_total", mode="parallel", outcome="partial" if errors else "ok")
 
+        # Order sections as the schema does so streamed and cached output stays stable.
+        result = {name: result[name] for name in RESUME_ANALYSIS_SCHEMA["properties"]}
+        result["meta"] = {"mode": "parallel", "section_latency_ms": latency, "section_errors": errors}
+        # A partially failed report must not be replayed from the cache.
+        if not errors:
+            self._settle(result, cache_key, models or set())
+        return result
+
+    def stream_analysis(self, resume_content, job_description, api_key=None, previous=None):
+        """Generates the analysis with the streaming API.
+
+        Yields ("section", name, value) as each top-level section of the JSON
+        document completes, then a single ("done", result) or ("error", result).
+        With a usable `previous` analysis the kept sections are yielded at once
+        and the regenerated ones when their request returns."""
+        cache_key = self._cache_key(resume_content, job_description)
+        cached = self._cached(cache_key, "stream")
+        signature = None
+        if cached is None:
+            signature, cached, previous = self._near_duplicate(cache_key, "stream", resume_content, job_description, previous)
+        if cached is not None:
+            # Only schema sections, as a fresh stream sends them; meta travels with "done".
+            for name in RESUME_ANALYSIS_SCHEMA["required"]:
+                if name in cached:
+                    yield ("section", name, cached[name])
+            yield ("done", cached)
+            return
+
+        inputs = (resume_content, job_description)
+        models = set()
+        plan = self._revision_plan(previous, resume_content, job_description)
+        if plan is not None:
+            for name in plan.reuse:
+                yield ("section", name, previous["result"][name])
+            resume_content, job_description = self._compact_inputs(resume_content, job_description)
+            result = self._reanalyze(
+                plan, previous["result"], resume_content, job_description, api_key, cache_key, self.policy.deadline(), models
+            )
+            if result.get("error"):
+                yield ("error", result)
+                return
+            for name in plan.regenerate:
+                yield ("section", name, result[name])
+            self._remember(cache_key, signature, result, *inputs)
+            yield ("done", result)
+            return
+
+        resume_content, job_description = self._compact_inputs(resume_content, job_description)
+        # Non-strict: a malformed section is skipped here and regenerated below instead of ending the stream.
+        parser = TopLevelObjectStream(strict=False)
+        deadline = self.policy.deadline()
+        try:
+            profile = self.jd_profile(job_description, api_key, deadline)
+            prompt = self.build_prompt(resume_content, job_description, jd_profile=profile)
+            stream = self._generate(prompt, api_key=api_key, stream=True, deadline=deadline, models=models)
+            for chunk in stream:
+                for name, value in parser.feed(chunk.text or ""):
+                    yield ("section", name, value)
+            # Re-parse the whole document; a truncated or malformed stream only regenerates what it lost.
+            sections = list(RESUME_ANALYSIS_SCHEMA["properties"])
+            try:
+                result = self._parse(parser.text, sections)
+            except MalformedResponseError as e:
+                result, repaired = self._repair(
+                    parser.text, e, sections, resume_content, job_description, api_key, profile, deadline, models
+                )
+                for name in repaired:
+                    yield ("section", name, result[name])
+        except Exception as e:
+            self.metrics.inc("analyses_total", mode="stream", outcome="error")
+            yield ("error", self._error_result(e, api_key))
+            return
+
+        self._settle(result, cache_key, models)
+        if cache_key is not None:
+            self._remember(cache_key, signature, result, *inputs)
+        self.metrics.inc("analyses_total", mode="stream", outcome="ok")
+        yield ("done", result)
+
+    def _error_result(self, e, api_key=None, counted=False):
+        error_str = str(e)
+        if not counted:
+            self.metrics.inc("errors_total", kind=error_class(e))
+        
+        # Diagnostic: List available models from the shared catalog to help debugging.
+        # The catalog refreshes in the background, so a failing request never waits on models.list().
+        available_models = self.catalog.get() if self.catalog is not None else []
+        logger.error("[SYSTEM DIAGNOSTICS] Analysis failed on %s: %s", self.model, error_str)
+
+        if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str or "API key expired" in error_str or "API_KEY_INVALID" in error_str:
             return {
-                "error": f"AI Analysis Failed: {error_str}",
-                "diagnostics": {
-                    "current_model": "gemini-2.5-flash", 
-                    "available_models": available_models
-                }
+                "error": "RESOURCE_EXHAUSTED",
+                "message": "The system's API key is invalid, expired, or quota exhausted. Please provide your own Gemini API Key to continue.",
+                "details": error_str
+            }
+
+        return {
+            "error": f"AI Analysis Failed: {error_str}",
+            "diagnostics": {
+                "current_model": self.model, 
+                "available_models": available_models
             }
+        }
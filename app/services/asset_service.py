@@ -0,0 +1,144 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+
+try:
+    import brotli
+except ImportError:  # the optional `brotli` extra; only gzip variants are built without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = {".js", ".css", ".svg", ".json", ".txt", ".html", ".map"}
+MIN_COMPRESS_BYTES = 1024
+HASH_LENGTH = 12
+
+
+def fingerprint(name, data):
+    """'js/main.js' -> 'js/main.<content hash>.js'."""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    base, ext = os.path.splitext(name)
+    return f"{base}.{digest}{ext}"
+
+
+class AssetManifest:
+    """Content-hashed copies of the static folder, with gzip/brotli variants built ahead of time.
+
+    build() writes every file under `source` to `directory` as
+    <name>.<hash><ext>, plus <file>.gz and <file>.br next to it when that is
+    smaller, and records the logical -> hashed mapping in manifest.json.
+    Hashed names never change content, so they can be cached forever; a
+    missing or stale manifest just means url() falls back to the plain
+    /static URL."""
+
+    def __init__(self, source, directory):
+        self.source = source
+        self.directory = directory
+        self._files = {}
+        self._paths = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, "manifest.json"), "r", encoding="utf-8") as f:
+                files = json.load(f).get("files", {})
+        except (OSError, ValueError):
+            files = {}
+        self._set(files)
+        return files
+
+    def url(self, name):
+        """Hashed path for a logical static name, or None when it has not been built."""
+        with self._lock:
+            entry = self._files.get(name)
+        return entry["path"] if entry else None
+
+    def encodings(self, hashed_path):
+        """Pre-built encodings of a hashed path, or None when the path is not a built asset."""
+        with self._lock:
+            entry = self._paths.get(hashed_path)
+        return entry["encodings"] if entry else None
+
+    def is_stale(self):
+        """True when a source file was added, removed or changed since the last build."""
+        sources = dict(self._walk())
+        with self._lock:
+            files = self._files
+        if set(sources) != set(files):
+            return True
+        for name, path in sources.items():
+            if os.path.getsize(path) != files[name]["size"] or os.path.getmtime(path) > files[name]["mtime"]:
+                return True
+        return False
+
+    def build(self):
+        """(Re)builds the hashed copies and compressed variants; unchanged files are skipped."""
+        files = {}
+        for name, path in self._walk():
+            with open(path, "rb") as f:
+                data = f.read()
+            hashed = fingerprint(name, data)
+            target = os.path.join(self.directory, hashed)
+            encodings = []
+            if not os.path.exists(target):
+                self._write(target, data)
+            if os.path.splitext(name)[1] in COMPRESSIBLE and len(data) >= MIN_COMPRESS_BYTES:
+                variants = [("gzip", ".gz", lambda d: gzip.compress(d, 9, mtime=0))]
+                if brotli is not None:
+                    variants.insert(0, ("br", ".br", lambda d: brotli.compress(d, quality=11)))
+                for encoding, suffix, compress in variants:
+                    if os.path.exists(target + suffix):
+                        encodings.append(encoding)
+                        continue
+                    packed = compress(data)
+                    if len(packed) < len(data):
+                        self._write(target + suffix, packed)
+                        encodings.append(encoding)
+            files[name] = {
+                "path": hashed,
+                "size": len(data),
+                "mtime": os.path.getmtime(path),
+                "encodings": encodings,
+            }
+        manifest = json.dumps({"files": files}, indent=2, sort_keys=True).encode("utf-8")
+        self._write(os.path.join(self.directory, "manifest.json"), manifest)
+        self._set(files)
+        logger.info("[ASSETS] Built %d assets into %s", len(files), self.directory)
+        return files
+
+    def ensure_built(self):
+        if self.is_stale():
+            try:
+                self.build()
+            except OSError as e:
+                logger.warning("[ASSETS] Build failed, serving unhashed static files: %s", e)
+        return self
+
+    def _set(self, files):
+        with self._lock:
+            self._files = files
+            self._paths = {entry["path"]: entry for entry in files.values()}
+
+    @staticmethod
+    def mimetype(hashed_path):
+        return mimetypes.guess_type(hashed_path)[0] or "application/octet-stream"
+
+    def _walk(self):
+        for root, _, names in os.walk(self.source):
+            for filename in sorted(names):
+                path = os.path.join(root, filename)
+                yield os.path.relpath(path, self.source).replace(os.sep, "/"), path
+
+    @staticmethod
+    def _write(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
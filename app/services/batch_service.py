@@ -0,0 +1,383 @@
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from .pdf_service import PDFService
+
+logger = logging.getLogger(__name__)
+
+RESULTS_FILE = "results.jsonl"
+MANIFEST_FILE = "manifest.json"
+RANKING_JSONL = "ranking.jsonl"
+RANKING_CSV = "ranking.csv"
+# A resume PDF larger than this (uncompressed) is recorded as failed instead of read into memory.
+MAX_PDF_BYTES = 20 * 1024 * 1024
+CSV_FIELDS = [
+    "rank", "file", "candidate", "title", "overall_score", "keyword_match",
+    "skill_match", "decision", "prescreen_score", "gated", "error",
+]
+
+
+def iter_pdf_sources(path, max_bytes=MAX_PDF_BYTES):
+    """Yields (name, pdf_bytes) for every PDF in a directory tree or a zip archive.
+
+    A PDF over `max_bytes` yields (name, None). Zip members are read in chunks
+    and dropped as soon as they pass the limit, whatever size the archive
+    declares for them, so a zip bomb cannot exhaust memory."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(".pdf"):
+                    full = os.path.join(root, name)
+                    if os.path.getsize(full) > max_bytes:
+                        yield os.path.relpath(full, path), None
+                        continue
+                    with open(full, "rb") as f:
+                        yield os.path.relpath(full, path), f.read()
+        return
+
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or not name.lower().endswith(".pdf") or "__MACOSX" in name:
+                continue
+            yield name, _read_member(archive, info, max_bytes)
+
+
+def _read_member(archive, info, max_bytes):
+    if info.file_size > max_bytes:
+        return None
+    chunks = []
+    size = 0
+    with archive.open(info) as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                return b"".join(chunks)
+            size += len(chunk)
+            if size > max_bytes:
+                return None
+            chunks.append(chunk)
+
+
+def _extract_document(data, layout=False):
+    # Runs in a worker process.
+    return PDFService.extract(data, layout=layout).compacted_text()
+
+
+def _rank_key(record):
+    # Fully analyzed candidates first by overall_score, then gated ones by their local pre-screen score.
+    score = record.get("overall_score")
+    analyzed = isinstance(score, (int, float))
+    prescreen = record.get("prescreen_score")
+    return (analyzed, score if analyzed else -1, prescreen if prescreen is not None else -1)
+
+
+class BatchScreener:
+    """Screens many resumes against one job description.
+
+    Text is extracted across a process pool and analyses run with bounded
+    concurrency through AIService. Each finished record is appended to
+    results.jsonl as soon as it completes, keyed by the SHA-256 of the PDF, so
+    re-running over the same output directory skips work that already
+    succeeded and picks up where an interrupted run stopped.
+
+    With a Prescreener and a threshold and/or top-K, every document is scored
+    locally once extraction finishes and only those passing the gate are sent
+    to the LLM; the rest are recorded as gated with their local scores.
+    Without a gate each document goes to analysis as soon as it is extracted."""
+
+    def __init__(self, ai_service, output_dir, concurrency=4, extract_workers=None,
+                 prescreener=None, threshold=None, top_k=None, layout=False):
+        self.ai_service = ai_service
+        self.output_dir = output_dir
+        self.concurrency = concurrency
+        self.extract_workers = extract_workers or os.cpu_count() or 1
+        self.layout = layout
+        self.prescreener = prescreener
+        self.threshold = threshold
+        self.top_k = top_k
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def status(self):
+        try:
+            with open(self._path(MANIFEST_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_manifest(self, manifest):
+        manifest["updated_at"] = time.time()
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self._path(MANIFEST_FILE))
+
+    def completed(self):
+        """Latest record per document; a later retry of a failed document wins."""
+        records = {}
+        try:
+            with open(self._path(RESULTS_FILE), "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn final line from an interrupted run.
+                    records[record["id"]] = record
+        except OSError:
+            pass
+        return records
+
+    def rankings(self):
+        return sorted(self.completed().values(), key=_rank_key, reverse=True)
+
+    def write_rankings(self):
+        ranked = self.rankings()
+        with open(self._path(RANKING_JSONL), "w", encoding="utf-8") as f:
+            for record in ranked:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        with open(self._path(RANKING_CSV), "w", encoding="utf-8", newline="") as f:
+            f.write(self.rankings_csv(ranked))
+        return ranked
+
+    @staticmethod
+    def rankings_csv(ranked):
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for rank, record in enumerate(ranked, 1):
+            writer.writerow(dict(record, rank=rank))
+        return out.getvalue()
+
+    def run(self, sources, job_description, progress=None):
+        """Screens every source not already completed and returns the final manifest."""
+        jd_hash = hashlib.sha256((job_description or "").encode("utf-8")).hexdigest()
+        manifest = self.status() or {"started_at": time.time()}
+        if manifest.get("job_description_sha256") not in (None, jd_hash):
+            raise ValueError("Output directory belongs to a batch for a different job description")
+        prior = self.completed()
+        # Gated documents are re-scored on every run so a changed threshold takes effect.
+        done = {rid for rid, r in prior.items() if not r.get("error") and not r.get("gated")}
+        analyzed = sum(1 for r in prior.values() if isinstance(r.get("overall_score"), (int, float)))
+        manifest.update({
+            "job_description_sha256": jd_hash,
+            "state": "running",
+            "total": 0,
+            "skipped": 0,
+            "completed": 0,
+            "failed": 0,
+            "gated": 0,
+        })
+        self._write_manifest(manifest)
+        # One profile of the JD, built before any analysis, stands in for the raw JD in every prompt of the batch.
+        self.ai_service.profile_job_description(job_description)
+
+        gated = self.prescreener is not None and (self.threshold is not None or self.top_k is not None)
+        window = self.concurrency * 4
+        stage = {}
+        extracted = []
+        results_file = open(self._path(RESULTS_FILE), "a", encoding="utf-8")
+        try:
+            with ProcessPoolExecutor(max_workers=self.extract_workers) as extract_pool, \
+                    ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as analyze_pool:
+
+                def analyze(doc_id, name, text, prescreen=None):
+                    future = analyze_pool.submit(self.ai_service.analyze_resume, text, job_description)
+                    stage[future] = ("analyze", doc_id, name, prescreen)
+
+                def drain():
+                    finished, _ = wait(list(stage), return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        kind, doc_id, name, prescreen = stage.pop(future)
+                        if kind == "extract":
+                            try:
+                                text = future.result()
+                            except Exception as e:
+                                self._record(results_file, manifest, {"id": doc_id, "file": name, "error": f"Extraction failed: {e}"}, progress)
+                                continue
+                            if gated:
+                                extracted.append((doc_id, name, text))
+                            else:
+                                analyze(doc_id, name, text)
+                        else:
+                            try:
+                                result = future.result()
+                            except Exception as e:
+                                result = {"error": f"Internal System Error: {e}"}
+                            self._record(results_file, manifest, self._summarize(doc_id, name, result, prescreen), progress)
+
+                for name, data in sources:
+                    manifest["total"] += 1
+                    if data is None:
+                        doc_id = hashlib.sha256(name.encode("utf-8")).hexdigest()
+                        self._record(results_file, manifest, {"id": doc_id, "file": name, "error": "File is too large to screen"}, progress)
+                        continue
+                    doc_id = hashlib.sha256(data).hexdigest()
+                    if doc_id in done:
+                        manifest["skipped"] += 1
+                        continue
+                    done.add(doc_id)  # Duplicate files in one batch are screened once.
+                    while len(stage) >= window:
+                        drain()
+                    stage[extract_pool.submit(_extract_document, data, self.layout)] = ("extract", doc_id, name, None)
+                while stage:
+                    drain()
+
+                if extracted:
+                    scores = self.prescreener.score_many([text for _, _, text in extracted], job_description)
+                    top_k = None if self.top_k is None else max(self.top_k - analyzed, 0)
+                    passed = self.prescreener.gate(scores, self.threshold, top_k)
+                    passed_set = set(passed)
+                    for i, (doc_id, name, _) in enumerate(extracted):
+                        if i not in passed_set:
+                            record = {"id": doc_id, "file": name, "gated": True, "prescreen": scores[i], "prescreen_score": scores[i]["score"]}
+                            self._record(results_file, manifest, record, progress)
+                    for i in passed:
+                        doc_id, name, text = extracted[i]
+                        while len(stage) >= window:
+                            drain()
+                        analyze(doc_id, name, text, scores[i])
+                    while stage:
+                        drain()
+        except BaseException:
+            manifest["state"] = "interrupted"
+            self._write_manifest(manifest)
+            raise
+        finally:
+            results_file.close()
+
+        self.write_rankings()
+        manifest["state"] = "done"
+        self._write_manifest(manifest)
+        return manifest
+
+    @staticmethod
+    def _summarize(doc_id, name, result, prescreen=None):
+        record = {"id": doc_id, "file": name}
+        if prescreen is not None:
+            record["prescreen"] = prescreen
+            record["prescreen_score"] = prescreen["score"]
+        if result.get("error"):
+            record["error"] = result.get("message") or result["error"]
+            return record
+        ats = result.get("ats_analysis") or {}
+        breakdown = ats.get("breakdown") or {}
+        candidate = result.get("candidate_info") or {}
+        record.update({
+            "candidate": candidate.get("name"),
+            "title": candidate.get("title"),
+            "overall_score": ats.get("overall_score"),
+            "keyword_match": breakdown.get("keyword_match"),
+            "skill_match": breakdown.get("skill_match"),
+            "decision": (result.get("recruiter_review") or {}).get("decision"),
+            "result": result,
+        })
+        return record
+
+    def _record(self, results_file, manifest, record, progress):
+        with self._lock:
+            results_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            results_file.flush()
+            if record.get("gated"):
+                manifest["gated"] += 1
+            else:
+                manifest["failed" if record.get("error") else "completed"] += 1
+            self._write_manifest(manifest)
+        if record.get("error"):
+            logger.warning("[BATCH] %s: %s", record["file"], record["error"])
+        if progress is not None:
+            progress(record, manifest)
+
+
+class BatchRunner:
+    """Runs uploaded batches in the background, at most `max_running` at a time per process.
+
+    Each batch lives in its own directory holding the source archive or
+    directory reference, the job description and the BatchScreener output."""
+
+    SOURCE_FILE = "source.json"
+    JD_FILE = "job_description.txt"
+
+    def __init__(self, root, ai_service, concurrency=4, extract_workers=None, max_running=1,
+                 prescreener=None, threshold=None, top_k=None, layout=False, max_pdf_bytes=MAX_PDF_BYTES):
+        self.root = root
+        self.ai_service = ai_service
+        self.concurrency = concurrency
+        self.extract_workers = extract_workers
+        self.layout = layout
+        self.max_pdf_bytes = max_pdf_bytes
+        self.prescreener = prescreener
+        self.threshold = threshold
+        self.top_k = top_k
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="batch-runner")
+        self._running = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def batch_dir(self, batch_id):
+        return os.path.join(self.root, batch_id)
+
+    def screener(self, batch_id):
+        return BatchScreener(
+            self.ai_service,
+            self.batch_dir(batch_id),
+            self.concurrency,
+            self.extract_workers,
+            prescreener=self.prescreener,
+            threshold=self.threshold,
+            top_k=self.top_k,
+            layout=self.layout,
+        )
+
+    def exists(self, batch_id):
+        return os.path.exists(os.path.join(self.batch_dir(batch_id), self.SOURCE_FILE))
+
+    def create(self, batch_id, source_path, job_description):
+        batch_dir = self.batch_dir(batch_id)
+        os.makedirs(batch_dir, exist_ok=True)
+        with open(os.path.join(batch_dir, self.JD_FILE), "w", encoding="utf-8") as f:
+            f.write(job_description)
+        with open(os.path.join(batch_dir, self.SOURCE_FILE), "w", encoding="utf-8") as f:
+            json.dump({"path": source_path, "created_at": time.time()}, f)
+
+    def is_running(self, batch_id):
+        with self._lock:
+            future = self._running.get(batch_id)
+            return future is not None and not future.done()
+
+    def start(self, batch_id):
+        """Queues the batch; safe to call again to resume an interrupted one."""
+        with self._lock:
+            future = self._running.get(batch_id)
+            if future is not None and not future.done():
+                return False
+            self._running[batch_id] = self._executor.submit(self._run, batch_id)
+            return True
+
+    def _run(self, batch_id):
+        batch_dir = self.batch_dir(batch_id)
+        with open(os.path.join(batch_dir, self.SOURCE_FILE), "r", encoding="utf-8") as f:
+            source = json.load(f)["path"]
+        with open(os.path.join(batch_dir, self.JD_FILE), "r", encoding="utf-8") as f:
+            job_description = f.read()
+        try:
+            return self.screener(batch_id).run(iter_pdf_sources(source, self.max_pdf_bytes), job_description)
+        except Exception as e:
+            logger.exception("SYSTEM BREACH: Batch %s failed: %s", batch_id, e)
+            raise
@@ -0,0 +1,164 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Collapses whitespace so cosmetic differences don't change the cache key."""
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+class AnalysisCache:
+    """Two-tier cache for analysis results: an in-process LRU and an optional
+    on-disk tier that every gunicorn worker on the host can share."""
+
+    def __init__(self, max_entries=256, ttl=86400, directory=None, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(resume_text, job_description, model, schema_version):
+        payload = json.dumps(
+            [schema_version, model, normalize_text(resume_text), normalize_text(job_description)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._memory[key]
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._memory_put(key, value, now)
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        # Errors are transient (quota, bad keys, malformed output) and must never be replayed.
+        if not isinstance(value, dict) or "error" in value:
+            return
+        value = copy.deepcopy(value)
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, value, now)
+        self._disk_set(key, value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk": bool(self.directory),
+            }
+
+    def _memory_put(self, key, value, now):
+        self._memory[key] = (now + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _disk_get(self, key, now):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_set(self, key, value):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so other workers never read a partial entry.
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("[ANALYSIS CACHE] Disk write failed: %s", e)
+            return
+
+        with self._lock:
+            self._writes_since_sweep += 1
+            sweep = self._writes_since_sweep >= 32
+            if sweep:
+                self._writes_since_sweep = 0
+        if sweep:
+            self.sweep()
+
+    def sweep(self):
+        """Drops expired disk entries, then the oldest ones until under max_bytes."""
+        if not self.directory:
+            return
+        now = time.time()
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_mtime + self.ttl <= now:
+                    self._remove(path)
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+import httpx
+from google.genai import errors as genai_errors
+
+from .metrics import Metrics
+from .scheduler_service import is_key_error, is_quota_error
+
+logger = logging.getLogger(__name__)
+
+class DeadlineExceededError(TimeoutError):
+    """The request's time budget ran out before the model answered."""
+
+
+def is_transient(error):
+    """Errors worth retrying: timeouts, dropped connections and 5xx (or 408) API responses.
+
+    API errors are classified by the SDK's HTTP status code. Quota and key
+    errors are not transient; the scheduler fails those over to another key
+    or model, and a user's own key will not recover within one request."""
+    if isinstance(error, DeadlineExceededError) or is_quota_error(error) or is_key_error(error):
+        return False
+    if isinstance(error, genai_errors.APIError):
+        return isinstance(error.code, int) and (500 <= error.code < 600 or error.code == 408)
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError, httpx.TransportError))
+
+
+class Deadline:
+    """Absolute time budget for one request, shared by every call made on its behalf."""
+
+    def __init__(self, seconds=None):
+        self.expires = time.monotonic() + seconds if seconds else None
+
+    def remaining(self):
+        """Seconds left, or None when the request has no deadline."""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+
+class LatencyTracker:
+    """Recent successful call latencies per call kind, for the hedging percentile."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind, seconds):
+        with self._lock:
+            samples = self._samples.get(kind)
+            if samples is None:
+                samples = self._samples[kind] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, kind, percentile, min_samples=1):
+        with self._lock:
+            samples = sorted(self._samples.get(kind, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+class CallPolicy:
+    """Deadline, per-attempt timeout, retry and hedging rules for model calls.
+
+    run() gives each attempt min(attempt_timeout, time left on the deadline)
+    and retries transient errors with full-jitter exponential backoff while
+    the deadline allows. When hedging is on and a call of the same kind has
+    been slower than the hedge_percentile of recent calls, a duplicate goes
+    out through `hedge` and whichever answers first wins; the loser finishes
+    in the background and is bounded by its own timeout.
+
+    A hedged call's primary attempt gets a thread of its own, so it starts at
+    once however busy the process is. Backups run on a pool of `hedge_workers`
+    threads and are only sent while one of them is idle: a backup that would
+    queue behind others cannot answer sooner than the primary."""
+
+    def __init__(self, deadline=120.0, attempt_timeout=90.0, max_attempts=3, backoff_base=0.5, backoff_max=8.0,
+                 hedge_percentile=0, hedge_min_samples=20, hedge_min_delay=1.0, hedge_workers=16,
+                 metrics=None, rng=None):
+        self.deadline_seconds = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_workers = hedge_workers
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.latency = LatencyTracker()
+        self._rng = rng or random.Random()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._backup_slots = threading.BoundedSemaphore(max(1, hedge_workers))
+
+    def deadline(self):
+        return Deadline(self.deadline_seconds)
+
+    def hedge_delay(self, kind):
+        """Seconds to wait before hedging a call of this kind, or None when it should not be hedged."""
+        if not self.hedge_percentile:
+            return None
+        observed = self.latency.percentile(kind, self.hedge_percentile, self.hedge_min_samples)
+        if observed is None:
+            return None
+        return max(self.hedge_min_delay, observed)
+
+    def backoff(self, attempt):
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def run(self, attempt, deadline=None, hedge=None, kind="default"):
+        """Returns attempt(timeout), retried and hedged according to the policy.
+
+        `hedge`, when given, is called with the same signature to send the
+        duplicate request (typically to another key or model)."""
+        deadline = deadline or self.deadline()
+        for number in range(self.max_attempts):
+            timeout = self._timeout(deadline)
+            try:
+                return self._once(attempt, hedge, timeout, kind)
+            except Exception as e:
+                delay = self._retry_delay(e, number, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+
+    async def run_async(self, attempt, deadline=None, hedge=None, kind="default"):
+        """run() for coroutines: `attempt` and `hedge` are async callables."""
+        deadline = deadline or self.deadline()
+        for number in range(self.max_attempts):
+            timeout = self._timeout(deadline)
+            try:
+                return await self._once_async(attempt, hedge, timeout, kind)
+            except Exception as e:
+                delay = self._retry_delay(e, number, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+
+    def _retry_delay(self, error, number, deadline):
+        """Backoff before the next attempt, or None when `error` should be raised instead."""
+        if not is_transient(error) or number + 1 >= self.max_attempts:
+            return None
+        delay = self.backoff(number)
+        remaining = deadline.remaining()
+        if remaining is not None and delay >= remaining:
+            return None
+        self.metrics.inc("call_retries_total", kind=type(error).__name__)
+        logger.warning("[CALL POLICY] Transient error on attempt %d, retrying in %.2fs: %s", number + 1, delay, error)
+        return delay
+
+    def _timeout(self, deadline):
+        remaining = deadline.remaining()
+        if remaining is None:
+            return self.attempt_timeout or None
+        if remaining <= 0:
+            raise DeadlineExceededError("Request deadline exceeded before the model answered")
+        return min(self.attempt_timeout, remaining) if self.attempt_timeout else remaining
+
+    def _once(self, attempt, hedge, timeout, kind):
+        started = time.monotonic()
+        delay = self.hedge_delay(kind) if hedge is not None else None
+        if delay is None or (timeout is not None and delay >= timeout):
+            result = attempt(timeout)
+            self.latency.record(kind, time.monotonic() - started)
+            return result
+
+        primary = Future()
+        threading.Thread(target=_run_into, args=(primary, attempt, timeout), name="hedged-call", daemon=True).start()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            result = primary.result()
+            self.latency.record(kind, time.monotonic() - started)
+            return result
+
+        pending = {primary}
+        backup = None
+        if self._backup_slots.acquire(blocking=False):
+            self.metrics.inc("hedged_calls_total", outcome="sent")
+            backup = self._executor().submit(hedge, timeout - delay if timeout is not None else None)
+            backup.add_done_callback(lambda _: self._backup_slots.release())
+            pending.add(backup)
+        else:
+            self.metrics.inc("hedged_calls_total", outcome="skipped")
+        error = None
+        while pending:
+            left = None if timeout is None else started + timeout - time.monotonic()
+            if left is not None and left <= 0:
+                break
+            done, pending = wait(pending, timeout=left, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    self.metrics.inc("hedged_calls_total", outcome="hedge_won" if future is backup else "primary_won")
+                    self.latency.record(kind, time.monotonic() - started)
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        # An attempt timeout is retried like any other timeout while the deadline allows.
+        raise TimeoutError(f"Model call timed out after {timeout:.1f}s")
+
+    async def _once_async(self, attempt, hedge, timeout, kind):
+        started = time.monotonic()
+        delay = self.hedge_delay(kind) if hedge is not None else None
+        if delay is None or (timeout is not None and delay >= timeout):
+            result = await asyncio.wait_for(attempt(timeout), timeout)
+            self.latency.record(kind, time.monotonic() - started)
+            return result
+
+        primary = asyncio.ensure_future(attempt(timeout))
+        pending = {primary}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                result = primary.result()
+                self.latency.record(kind, time.monotonic() - started)
+                return result
+
+            self.metrics.inc("hedged_calls_total", outcome="sent")
+            backup = asyncio.ensure_future(hedge(timeout - delay if timeout is not None else None))
+            pending = {primary, backup}
+            while pending:
+                left = None if timeout is None else started + timeout - time.monotonic()
+                if left is not None and left <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        self.metrics.inc("hedged_calls_total", outcome="hedge_won" if future is backup else "primary_won")
+                        self.latency.record(kind, time.monotonic() - started)
+                        return future.result()
+                    error = future.exception()
+        finally:
+            # Unlike a thread, the losing (or abandoned) call can simply be cancelled.
+            for future in pending:
+                future.cancel()
+        if error is not None and not pending:
+            raise error
+        raise TimeoutError(f"Model call timed out after {timeout:.1f}s")
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.hedge_workers, thread_name_prefix="hedged-backup")
+            return self._pool
+
+
+def _run_into(future, fn, *args):
+    """Runs fn(*args) on the current thread and settles `future` with its outcome."""
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(fn(*args))
+    except BaseException as e:
+        future.set_exception(e)
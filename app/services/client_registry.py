@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from google import genai
+
+from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ClientRegistry:
+    """Process-wide pool of Gemini clients, one per API key.
+
+    Reusing a client keeps its HTTP connection pool and TLS sessions warm across
+    requests. Clients are keyed by a hash of the key so raw keys are never held
+    as dictionary keys, dropped least-recently-used beyond max_clients, and
+    closed after idle_ttl seconds without use."""
+
+    def __init__(self, max_clients=32, idle_ttl=900, factory=None, metrics=None):
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self._factory = factory
+        self.metrics = metrics if metrics is not None else Metrics()
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    @staticmethod
+    def _fingerprint(api_key):
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+
+    def _create(self, api_key):
+        if self._factory is not None:
+            return self._factory(api_key)
+        return genai.Client(api_key=api_key)
+
+    def get(self, api_key):
+        fingerprint = self._fingerprint(api_key)
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            expired.extend(self._expire(now))
+            entry = self._clients.get(fingerprint)
+            if entry is not None:
+                self._clients[fingerprint] = (entry[0], now)
+                self._clients.move_to_end(fingerprint)
+                self.reused += 1
+                client = entry[0]
+            else:
+                client = None
+        self._close_all(expired)
+        if client is not None:
+            return client
+
+        # Build outside the lock; client construction can be slow and may raise on a bad key.
+        with self.metrics.timer("client_create"):
+            client = self._create(api_key)
+        with self._lock:
+            entry = self._clients.get(fingerprint)
+            if entry is not None:
+                # Another thread won the race; keep its client and discard ours.
+                expired.append(client)
+                client = entry[0]
+                self.reused += 1
+            else:
+                self.created += 1
+            self._clients[fingerprint] = (client, now)
+            self._clients.move_to_end(fingerprint)
+            while len(self._clients) > self.max_clients:
+                # Not closed: a request may still be using it; it is released once unreferenced.
+                self._clients.popitem(last=False)
+                self.evicted += 1
+        self._close_all(expired)
+        return client
+
+    def _expire(self, now):
+        stale = [fp for fp, (_, last_used) in self._clients.items() if now - last_used > self.idle_ttl]
+        expired = []
+        for fp in stale:
+            expired.append(self._clients.pop(fp)[0])
+            self.evicted += 1
+        return expired
+
+    @staticmethod
+    def _close_all(clients):
+        for client in clients:
+            close = getattr(client, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception as e:
+                logger.warning("[CLIENT REGISTRY] Failed to close client: %s", e)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.created + self.reused
+            return {
+                "clients": len(self._clients),
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+                "reuse_ratio": round(self.reused / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from .cache_service import normalize_text
+
+logger = logging.getLogger(__name__)
+
+JD_PROFILE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "role_title": {"type": "string"},
+        "seniority": {"type": "string", "enum": ["Intern", "Junior", "Mid", "Senior", "Staff", "Principal", "Manager", "Director"]},
+        "experience_band": {
+            "type": "object",
+            "properties": {
+                "min_years": {"type": "integer"},
+                "max_years": {"type": "integer"}
+            },
+            "required": ["min_years", "max_years"]
+        },
+        "domain": {"type": "string"},
+        "required_skills": {"type": "array", "items": {"type": "string"}},
+        "preferred_skills": {"type": "array", "items": {"type": "string"}},
+        "keywords": {"type": "array", "items": {"type": "string"}},
+        "responsibilities": {"type": "array", "items": {"type": "string"}},
+        "education": {"type": "string"}
+    },
+    "required": [
+        "role_title", "seniority", "experience_band", "domain", "required_skills",
+        "preferred_skills", "keywords", "responsibilities", "education"
+    ]
+}
+
+JD_PROFILE_SCHEMA_VERSION = hashlib.sha256(
+    json.dumps(JD_PROFILE_SCHEMA, sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+def build_profile_prompt(job_description):
+    return f"""
+        You are a technical recruiter distilling a job description into a compact screening profile.
+
+        JOB DESCRIPTION:
+        {job_description}
+
+        RULES:
+        1. Copy skills, tools and keywords verbatim as the JD spells them; do not invent requirements.
+        2. 'required_skills' are explicit must-haves; everything merely desirable goes to 'preferred_skills'.
+        3. 'keywords' are the terms an ATS would match on (technologies, methodologies, domain terms, certifications), most important first, at most 30.
+        4. 'responsibilities' are at most 8 short phrases.
+        5. 'experience_band' is in years; use 0 for an unstated minimum and 0 for an unstated maximum.
+
+        Generate the response filling the provided JSON schema.
+        """
+
+
+def render_profile(profile):
+    """Compact, prompt-ready text form of a profile."""
+    band = profile.get("experience_band") or {}
+    low, high = band.get("min_years") or 0, band.get("max_years") or 0
+    years = f"{low}-{high} years" if high else f"{low}+ years"
+    lines = [
+        f"Role: {profile.get('role_title', '')} ({profile.get('seniority', '')}, {years})",
+        f"Domain: {profile.get('domain', '')}",
+        f"Required skills: {', '.join(profile.get('required_skills') or [])}",
+        f"Preferred skills: {', '.join(profile.get('preferred_skills') or [])}",
+        f"ATS keywords: {', '.join(profile.get('keywords') or [])}",
+        f"Responsibilities: {'; '.join(profile.get('responsibilities') or [])}",
+    ]
+    if profile.get("education"):
+        lines.append(f"Education: {profile['education']}")
+    return "\n".join(lines)
+
+
+class JDProfileIndex:
+    """Index of structured JD profiles keyed by a hash of the normalized JD.
+
+    Profiles are kept in an in-process LRU and, when a directory is set, as
+    one JSON file per hash shared by every worker. Concurrent requests for the
+    same unseen JD wait on a single build instead of each paying for one, and
+    a failed build is not retried for `retry_after` seconds."""
+
+    def __init__(self, directory=None, max_entries=512, retry_after=60):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.retry_after = retry_after
+        self._memory = OrderedDict()
+        self._inflight = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.built = 0
+        self.failures = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(job_description, model):
+        payload = json.dumps([JD_PROFILE_SCHEMA_VERSION, model, normalize_text(job_description)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            profile = self._memory.get(key)
+            if profile is not None:
+                self._memory.move_to_end(key)
+                return profile
+        profile = self._disk_get(key)
+        if profile is not None:
+            with self._lock:
+                self._memory_put(key, profile)
+        return profile
+
+    def lookup(self, key):
+        """get() for a caller that will not build a missing profile; a found one counts as a hit."""
+        profile = self.get(key)
+        if profile is not None:
+            with self._lock:
+                self.hits += 1
+        return profile
+
+    def get_or_build(self, key, build, timeout=120):
+        """Returns the profile for `key`, calling build() at most once across concurrent callers.
+
+        Returns None when the build failed (now or recently) or timed out; the
+        caller is expected to fall back to the raw JD."""
+        profile, event, owner = self._claim(key)
+        if event is None:
+            return profile
+        if not owner:
+            event.wait(timeout)
+            return self.get(key)
+        try:
+            # Stored before waiters are woken, so they find it.
+            return self._built(key, build())
+        except Exception as e:
+            return self._build_failed(key, e)
+        finally:
+            self._unclaim(key, event)
+
+    async def get_or_build_async(self, key, build, timeout=120):
+        """get_or_build() for a coroutine function build(); waiting callers poll instead of blocking the loop.
+
+        The profile store is read and written in the default thread pool."""
+        profile, event, owner = await asyncio.to_thread(self._claim, key)
+        if event is None:
+            return profile
+        if not owner:
+            waited = 0.0
+            while not event.is_set() and waited < timeout:
+                await asyncio.sleep(0.05)
+                waited += 0.05
+            return await asyncio.to_thread(self.get, key)
+        try:
+            return await asyncio.to_thread(self._built, key, await build())
+        except Exception as e:
+            return self._build_failed(key, e)
+        finally:
+            self._unclaim(key, event)
+
+    def _claim(self, key):
+        """(profile, None, False) when there is nothing to build, else (None, event, whether we own the build)."""
+        profile = self.get(key)
+        if profile is not None:
+            with self._lock:
+                self.hits += 1
+            return profile, None, False
+
+        with self._lock:
+            if self._failed.get(key, 0) > time.time():
+                return None, None, False
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+        return None, event, owner
+
+    def _unclaim(self, key, event):
+        with self._lock:
+            self._inflight.pop(key, None)
+        event.set()
+
+    def _build_failed(self, key, error):
+        logger.warning("[JD PROFILE] Profile build failed, falling back to the raw JD: %s", error)
+        with self._lock:
+            self.failures += 1
+            self._failed[key] = time.time() + self.retry_after
+        return None
+
+    def _built(self, key, profile):
+        with self._lock:
+            self.built += 1
+            self._failed.pop(key, None)
+            self._memory_put(key, profile)
+        self._disk_set(key, profile)
+        return profile
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "built": self.built,
+                "failures": self.failures,
+                "disk": bool(self.directory),
+            }
+
+    def _memory_put(self, key, profile):
+        self._memory[key] = profile
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _disk_get(self, key):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_set(self, key, profile):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(profile, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("[JD PROFILE] Disk write failed: %s", e)
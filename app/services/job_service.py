@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when the worker pool already has its maximum number of jobs queued."""
+
+
+class JobStore:
+    """SQLite-backed job table. Every gunicorn worker opens the same file, so any
+    worker can answer status and result queries for any job.
+
+    Jobs not updated for `retention` seconds are deleted, resume text and
+    report included, by a purge every few dozen new jobs (0 keeps them)."""
+
+    def __init__(self, path, stale_after=600, retention=7 * 24 * 60 * 60):
+        self.path = path
+        self.stale_after = stale_after
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._creates_since_purge = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    filename TEXT,
+                    resume_text TEXT,
+                    job_description TEXT,
+                    result TEXT,
+                    error TEXT
+                )"""
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "upload_key" not in columns:
+                # Added with the content-addressed upload store; older databases gain it in place.
+                conn.execute("ALTER TABLE jobs ADD COLUMN upload_key TEXT")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, resume_text, job_description, filename=None, status=PENDING, upload_key=None):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, created_at, updated_at, filename, resume_text, job_description, upload_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, status, now, now, filename, resume_text, job_description, upload_key),
+            )
+        if self.retention:
+            with self._lock:
+                self._creates_since_purge += 1
+                purge = self._creates_since_purge >= 32
+                if purge:
+                    self._creates_since_purge = 0
+            if purge:
+                self.purge(self.retention)
+        return job_id
+
+    def get(self, job_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        # A job whose worker process died never finishes; report it instead of polling forever.
+        if job["status"] in (PENDING, RUNNING) and time.time() - job["updated_at"] > self.stale_after:
+            job["status"] = FAILED
+            job["error"] = "Analysis timed out. Please try again."
+        return job
+
+    def mark_running(self, job_id):
+        self._update(job_id, status=RUNNING)
+
+    def complete(self, job_id, result):
+        status = FAILED if result.get("error") else DONE
+        self._update(job_id, status=status, result=json.dumps(result), error=result.get("error"))
+
+    def fail(self, job_id, message):
+        self._update(job_id, status=FAILED, error=message)
+
+    def purge(self, older_than):
+        """Deletes jobs not updated for `older_than` seconds and returns how many there were."""
+        cutoff = time.time() - older_than
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,)).rowcount
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+
+class JobQueue:
+    """Bounded background pool that runs analyses outside the request cycle.
+
+    API keys supplied by users are handed to the worker in memory only and are
+    never written to the job store."""
+
+    def __init__(self, store, max_workers=4, max_pending=32):
+        self.store = store
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, resume_text, job_description, analyze, api_key=None, filename=None, upload_key=None):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError("Analysis queue is full")
+            self._pending += 1
+        try:
+            job_id = self.store.create(resume_text, job_description, filename=filename, upload_key=upload_key)
+            self._executor.submit(self._run, job_id, resume_text, job_description, analyze, api_key)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        return job_id
+
+    def _run(self, job_id, resume_text, job_description, analyze, api_key):
+        try:
+            self.store.mark_running(job_id)
+            result = analyze(resume_text, job_description, api_key=api_key)
+            self.store.complete(job_id, result)
+        except Exception as e:
+            logger.exception("SYSTEM BREACH: Job %s failed: %s", job_id, e)
+            self.store.fail(job_id, f"Internal System Error: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending -= 1
@@ -0,0 +1,100 @@
+import json
+
+
+class TopLevelObjectStream:
+    """Incremental parser for a streamed JSON object.
+
+    Chunks are fed as they arrive from the model; each top-level member is
+    returned as a (key, value) pair as soon as its value is complete, so callers
+    can act on early sections while later ones are still being generated.
+    Scanning resumes where the previous chunk stopped, so every character is
+    inspected once. With strict=False a member whose value does not decode is
+    recorded in `invalid` and skipped instead of raising."""
+
+    def __init__(self, strict=True):
+        self.strict = strict
+        self.buffer = ""
+        self.completed = {}
+        self.invalid = set()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+    @property
+    def text(self):
+        return self.buffer
+
+    def feed(self, chunk):
+        """Consumes a chunk and returns the list of members it completed."""
+        self.buffer += chunk
+        emitted = []
+        buf = self.buffer
+        i = self._pos
+        end = len(buf)
+        while i < end:
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None and self._key_start is not None:
+                        self._key = json.loads(buf[self._key_start:i + 1])
+                        self._key_start = None
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None and self._value_start is None:
+                    self._key_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    self._emit(buf, i, emitted)
+                self._depth -= 1
+            elif ch == ":" and self._depth == 1 and self._key is not None and self._value_start is None:
+                self._value_start = i + 1
+            elif ch == "," and self._depth == 1:
+                self._emit(buf, i, emitted)
+            i += 1
+        self._pos = i
+        return emitted
+
+    def _emit(self, buf, i, emitted):
+        if self._key is None or self._value_start is None:
+            return
+        raw = buf[self._value_start:i].strip()
+        if raw:
+            try:
+                value = json.loads(raw)
+            except ValueError:
+                if self.strict:
+                    raise
+                self.invalid.add(self._key)
+            else:
+                self.completed[self._key] = value
+                emitted.append((self._key, value))
+        self._key = None
+        self._value_start = None
+
+
+def salvage_members(text):
+    """Top-level members of a possibly truncated or partly malformed JSON object.
+
+    Returns (members, invalid): every member whose value decoded on its own,
+    and the names of those that did not. A member cut off by truncation
+    appears in neither."""
+    start = text.find("{")
+    if start < 0:
+        return {}, set()
+    parser = TopLevelObjectStream(strict=False)
+    parser.feed(text[start:])
+    return parser.completed, parser.invalid
@@ -0,0 +1,302 @@
+import re
+
+from .text_compaction import compact_text, estimate_tokens
+
+# Section kinds in the order a resume usually presents them; 'header' is everything above the first heading
+# and 'other' a heading the vocabulary below does not know (Awards, Languages, Volunteering, ...).
+SECTION_KINDS = ("header", "summary", "experience", "skills", "projects", "education", "other")
+
+_HEADINGS = [
+    ("summary", re.compile(r"\b(summary|profile|objective|about me)\b")),
+    ("experience", re.compile(r"\b(experience|employment|work history|career history)\b")),
+    ("skills", re.compile(r"\b(skills|technologies|tech stack|tools|competencies)\b")),
+    ("projects", re.compile(r"\b(projects|portfolio)\b")),
+    ("education", re.compile(r"\b(education|certifications?|courses|training|qualifications)\b")),
+]
+_DIGITS = re.compile(r"\d+")
+
+# PyMuPDF span flag for bold text.
+_BOLD = 16
+# A gutter must be at least this many points wide, and each column must hold this share of the page's text.
+_MIN_GUTTER = 12
+_MIN_COLUMN_SHARE = 0.15
+# Lines this close to the top or bottom edge (as a share of page height) may be running headers or footers.
+_EDGE = 0.08
+
+
+def heading_kind(line):
+    """The section kind a heading line opens, or None for an ordinary line.
+
+    An inline label with its content ("Tools: Docker, Git") is not a heading."""
+    text = line.strip().rstrip(":").lower()
+    if not text or len(text) > 40 or len(text.split()) > 4 or ":" in text or "," in text:
+        return None
+    for kind, pattern in _HEADINGS:
+        if pattern.search(text):
+            return kind
+    return None
+
+
+def _spans_line(line):
+    """(text, size, bold) of a PyMuPDF line dict; size and boldness are those of most of its characters."""
+    text = "".join(span["text"] for span in line["spans"]).strip()
+    weights = {}
+    for span in line["spans"]:
+        key = (round(span["size"], 1), bool(span["flags"] & _BOLD) or "Bold" in span.get("font", ""))
+        weights[key] = weights.get(key, 0) + len(span["text"].strip())
+    size, bold = max(weights, key=weights.get) if weights else (0.0, False)
+    return text, size, bold
+
+
+def _gutters(lines, width, height):
+    """x positions that split the page into columns: gaps no narrow line crosses, with enough text either side.
+
+    Lines in the top and bottom edge bands are left out, so a centred page
+    number does not bridge the gutter."""
+    narrow = [
+        line for line in lines
+        if line["x1"] - line["x0"] < 0.55 * width and line["y1"] > _EDGE * height and line["y0"] < (1 - _EDGE) * height
+    ]
+    if len(narrow) < 2:
+        return []
+    spans = sorted((line["x0"], line["x1"]) for line in narrow)
+    gaps = []
+    reach = spans[0][1]
+    for x0, x1 in spans[1:]:
+        if x0 - reach >= _MIN_GUTTER and 0.15 * width < (x0 + reach) / 2 < 0.85 * width:
+            gaps.append((reach + x0) / 2)
+        reach = max(reach, x1)
+
+    total = sum(len(line["text"]) for line in lines) or 1
+    splits = []
+    for gap in gaps:
+        left = sum(len(l["text"]) for l in narrow if l["x1"] <= gap and (not splits or l["x0"] >= splits[-1]))
+        right = sum(len(l["text"]) for l in narrow if l["x0"] >= gap)
+        # Right-aligned dates or a narrow margin note are not a column of their own.
+        if left >= _MIN_COLUMN_SHARE * total and right >= _MIN_COLUMN_SHARE * total:
+            splits.append(gap)
+    return splits
+
+
+def _reading_order(lines, splits):
+    """Lines top to bottom, each column read in full before the next.
+
+    A line wider than its column (a name banner, a full-width summary) ends
+    the columns above it, so the columns below it start a new band."""
+    def column(line):
+        for number, split in enumerate(splits):
+            if line["x1"] <= split:
+                return number if number == 0 or line["x0"] >= splits[number - 1] else None
+        return len(splits) if line["x0"] >= splits[-1] else None
+
+    ordered = []
+    band = []
+    for line in sorted(lines, key=lambda l: (l["y0"], l["x0"])):
+        number = column(line) if splits else 0
+        if number is None:
+            ordered.extend(l for _, l in sorted(band, key=lambda item: (item[0], item[1]["y0"], item[1]["x0"])))
+            band = []
+            ordered.append(line)
+        else:
+            band.append((number, line))
+    ordered.extend(l for _, l in sorted(band, key=lambda item: (item[0], item[1]["y0"], item[1]["x0"])))
+    return ordered
+
+
+def page_layout(page):
+    """Reading-ordered text lines of one PyMuPDF page, as plain tuples so they can cross process boundaries.
+
+    MuPDF often puts both halves of a two-column row in one block, so
+    columns are found from line positions. Returns {"height", "columns",
+    "lines"}, each line a (text, size, bold, y0, y1) tuple."""
+    width, height = page.rect.width, page.rect.height
+    lines = []
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        for line in block["lines"]:
+            text, size, bold = _spans_line(line)
+            if text:
+                x0, y0, x1, y1 = line["bbox"]
+                lines.append({"text": text, "size": size, "bold": bold, "x0": x0, "y0": y0, "x1": x1, "y1": y1})
+    splits = _gutters(lines, width, height)
+    return {
+        "height": height,
+        "columns": len(splits) + 1,
+        "lines": [
+            (line["text"], line["size"], line["bold"], round(line["y0"], 1), round(line["y1"], 1))
+            for line in _reading_order(lines, splits)
+        ],
+    }
+
+
+def layout_text(layout):
+    """Plain text of a page_layout(), one line per line and columns in reading order."""
+    return "".join(line[0] + "\n" for line in layout["lines"])
+
+
+class Section:
+    """One typed section of a resume: its kind, the heading as written, and its compacted text."""
+
+    def __init__(self, kind, title, text, page):
+        self.kind = kind
+        self.title = title
+        self.text = text
+        self.page = page
+
+    @property
+    def tokens(self):
+        return estimate_tokens(self.text)
+
+    def render(self):
+        return f"{self.title}\n{self.text}" if self.title else self.text
+
+    def to_dict(self):
+        return {"kind": self.kind, "title": self.title, "page": self.page, "text": self.text, "tokens": self.tokens}
+
+
+class StructuredResume:
+    """A resume split into typed sections, indexable by position or by kind.
+
+    resume[0] is the first section in reading order; resume["experience"] is
+    every Experience section merged into one (a resume may repeat a heading
+    across pages); `"skills" in resume` tells whether there is one. `text`
+    renders the whole resume with its headings, and select() only the given
+    kinds, so a prompt can carry just the sections it reads."""
+
+    def __init__(self, sections, columns=None):
+        self.sections = sections
+        self.columns = columns or []
+
+    @classmethod
+    def from_pages(cls, layouts):
+        """Builds the section model from the page_layout() of every page."""
+        lines = _body_lines(layouts)
+        heading_styles = _heading_styles(lines)
+        sections = []
+        kind, title, page, body = "header", None, 1, []
+
+        def close():
+            text = compact_text("\n".join(body)).text
+            if text or title:
+                sections.append(Section(kind, title, text, page))
+
+        for text, size, bold, number in lines:
+            styled = (size, bold, text.isupper()) in heading_styles
+            found = heading_kind(text) if styled or not heading_styles else None
+            if found is None and styled and len(text.split()) <= 4:
+                found = "other"
+            if found is None:
+                body.append(text)
+                continue
+            close()
+            kind, title, page, body = found, text.strip().rstrip(":"), number, []
+        close()
+        return cls(sections, [layout["columns"] for layout in layouts])
+
+    def __len__(self):
+        return len(self.sections)
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __contains__(self, kind):
+        return any(section.kind == kind for section in self.sections)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self.sections[key]
+        matches = [section for section in self.sections if section.kind == key]
+        if not matches:
+            raise KeyError(key)
+        if len(matches) == 1:
+            return matches[0]
+        return Section(key, matches[0].title, "\n".join(section.text for section in matches), matches[0].page)
+
+    def get(self, kind, default=None):
+        try:
+            return self[kind]
+        except KeyError:
+            return default
+
+    @property
+    def kinds(self):
+        return [kind for kind in SECTION_KINDS if kind in self]
+
+    @property
+    def text(self):
+        return "\n\n".join(section.render() for section in self.sections)
+
+    @property
+    def tokens(self):
+        return estimate_tokens(self.text)
+
+    def select(self, kinds):
+        """Text of the sections of the given kinds only, in reading order."""
+        wanted = set(kinds)
+        return "\n\n".join(section.render() for section in self.sections if section.kind in wanted)
+
+    def to_dict(self):
+        return {
+            "sections": [section.to_dict() for section in self.sections],
+            "columns": self.columns,
+            "tokens": self.tokens,
+        }
+
+
+def _repeated_edges(layouts):
+    """Signatures of short lines near the top or bottom edge that recur on at least half the pages (and two)."""
+    if len(layouts) < 2:
+        return set()
+    counts = {}
+    for layout in layouts:
+        seen = set()
+        for text, _, _, y0, y1 in layout["lines"]:
+            if len(text) <= 100 and (y1 <= _EDGE * layout["height"] or y0 >= (1 - _EDGE) * layout["height"]):
+                seen.add(_DIGITS.sub("#", text.lower()))
+        for signature in seen:
+            counts[signature] = counts.get(signature, 0) + 1
+    needed = max(2, -(-len(layouts) // 2))
+    return {signature for signature, count in counts.items() if count >= needed}
+
+
+def _body_lines(layouts):
+    """(text, size, bold, page_number) for every line, minus running headers and footers."""
+    repeated = _repeated_edges(layouts)
+    lines = []
+    for number, layout in enumerate(layouts, start=1):
+        for text, size, bold, y0, y1 in layout["lines"]:
+            edge = y1 <= _EDGE * layout["height"] or y0 >= (1 - _EDGE) * layout["height"]
+            if edge and _DIGITS.sub("#", text.lower()) in repeated:
+                continue
+            lines.append((text, size, bold, number))
+    return lines
+
+
+def _body_style(lines):
+    """(size, bold) of most of the document's text, by character count."""
+    chars = {}
+    bold_chars = 0
+    for text, size, bold, _ in lines:
+        chars[size] = chars.get(size, 0) + len(text)
+        bold_chars += len(text) if bold else 0
+    total = sum(chars.values())
+    seen = 0
+    for size in sorted(chars):
+        seen += chars[size]
+        if seen * 2 >= total:
+            return size, bold_chars * 2 > total
+    return 0.0, False
+
+
+def _heading_styles(lines):
+    """The (size, bold, caps) styles of the headings the vocabulary recognises, where they stand out from the body.
+
+    When a document sets its headings apart like this, a vocabulary word in
+    body style ("Tools: Docker, Git") is not a heading, and an unfamiliar
+    heading set the same way ("AWARDS" beside "EXPERIENCE") is."""
+    body_size, body_bold = _body_style(lines)
+    return {
+        (size, bold, text.isupper()) for text, size, bold, _ in lines
+        if heading_kind(text) and (size > body_size * 1.05 or bold and not body_bold)
+    }
@@ -0,0 +1,220 @@
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "resume_analyzer_"
+
+# Seconds; spans fast local stages (cache lookups, JSON parsing) through full multi-section generations.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+METRICS = {
+    "http_requests_total": ("counter", "HTTP requests by endpoint, method and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by endpoint and method."),
+    "stage_duration_seconds": ("histogram", "Latency of each stage of an analysis request."),
+    "analyses_total": ("counter", "Analyses by execution mode and outcome."),
+    "errors_total": ("counter", "Analysis errors by class: quota (429), invalid_key, malformed_json, timeout, other."),
+    "call_retries_total": ("counter", "Model calls retried after a transient error, by error type."),
+    "hedged_calls_total": ("counter", "Hedged model calls: sent, skipped (no idle backup worker), and which request answered first."),
+    "tokens_total": ("counter", "Gemini tokens reported by usage_metadata, by model and kind."),
+    "section_repairs_total": ("counter", "Report sections regenerated after a malformed or truncated response, by outcome."),
+    "admissions_total": ("counter", "Interactive analyses admitted, or shed by reason (queue_full, queue_timeout, client_limit, global_limit)."),
+    "near_duplicates_total": ("counter", "Near-duplicate lookups after an exact cache miss: exact, served, warm_start, expired or miss."),
+    "incremental_sections_total": ("counter", "Report sections regenerated or reused by incremental re-analysis."),
+    "cache_lookups_total": ("counter", "Cache lookups by cache and result."),
+    "genai_clients_total": ("counter", "Gemini client lookups by result (created or reused)."),
+    "scheduler_events_total": ("counter", "Scheduler failovers and rejected calls."),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in items)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metrics:
+    """Process-local counters and histograms, rendered in Prometheus text format.
+
+    Updates only touch in-memory dictionaries. When a directory is set, each
+    process writes its snapshot to <directory>/<pid>.json at most every
+    `flush_interval` seconds, and render() sums the snapshots of every
+    process, so whichever gunicorn worker answers /metrics reports the whole
+    server. Collectors add counters that services already keep in their own
+    stats() (cache hits, client reuse) at snapshot time."""
+
+    def __init__(self, directory=None, flush_interval=5.0, buckets=DEFAULT_BUCKETS):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._next_flush = 0.0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._prune()
+            atexit.register(self.flush)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+        self._maybe_flush()
+
+    @contextmanager
+    def timer(self, stage):
+        """Records how long the block took under stage_duration_seconds{stage=...}, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - started, stage=stage)
+
+    def add_collector(self, collect):
+        """collect() returns (name, labels, value) counter samples read from a service's own stats."""
+        self._collectors.append(collect)
+
+    def snapshot(self):
+        with self._lock:
+            counters = [[name, dict(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, dict(labels), list(h[0]), h[1], h[2]] for (name, labels), h in self._histograms.items()
+            ]
+        for collect in self._collectors:
+            try:
+                counters.extend([name, labels, value] for name, labels, value in collect())
+            except Exception as e:
+                logger.warning("[METRICS] Collector failed: %s", e)
+        return {"buckets": list(self.buckets), "counters": counters, "histograms": histograms}
+
+    def _maybe_flush(self):
+        if not self.directory:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_flush:
+                return
+            self._next_flush = now + self.flush_interval
+        self.flush()
+
+    def flush(self):
+        if not self.directory:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, os.path.join(self.directory, f"{os.getpid()}.json"))
+        except OSError as e:
+            logger.warning("[METRICS] Snapshot write failed: %s", e)
+
+    def _prune(self):
+        # Snapshots of processes that no longer exist are from a previous deployment or a recycled worker.
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext != ".json" or not stem.isdigit():
+                continue
+            try:
+                os.kill(int(stem), 0)
+            except ProcessLookupError:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+            except OSError:
+                pass
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def collect(self):
+        """Sums counters and histograms across every process snapshot."""
+        counters = {}
+        histograms = {}
+        for snap in self._snapshots():
+            if tuple(snap.get("buckets", ())) != self.buckets:
+                continue
+            for name, labels, value in snap["counters"]:
+                key = (name, _label_key(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, buckets, total, count in snap["histograms"]:
+                key = (name, _label_key(labels))
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = [list(buckets), total, count]
+                else:
+                    merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                    merged[1] += total
+                    merged[2] += count
+        return counters, histograms
+
+    def render(self):
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            full = PREFIX + name
+            if kind == "counter":
+                samples = sorted((labels, value) for (n, labels), value in counters.items() if n == name)
+                if not samples:
+                    continue
+                lines += [f"# HELP {full} {help_text}", f"# TYPE {full} counter"]
+                lines += [f"{full}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+            else:
+                samples = sorted((labels, h) for (n, labels), h in histograms.items() if n == name)
+                if not samples:
+                    continue
+                lines += [f"# HELP {full} {help_text}", f"# TYPE {full} histogram"]
+                for labels, (buckets, total, count) in samples:
+                    cumulative = 0
+                    for bound, bucket in zip(self.buckets + (float("inf"),), buckets):
+                        cumulative += bucket
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{full}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {_format_value(round(total, 6))}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
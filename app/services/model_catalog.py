@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ModelCatalog:
+    """Shared, cached list of models that support generateContent.
+
+    The list is fetched off the request path: reads return the last known
+    snapshot immediately and, once it is older than `ttl`, kick off a single
+    background refresh. Error handling and health checks therefore never add
+    a models.list() round trip while the API is struggling."""
+
+    def __init__(self, clients, api_key, ttl=3600, retry_after=60):
+        self.clients = clients
+        self.api_key = api_key
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._models = []
+        self._fetched_at = None
+        self._error = None
+        self._next_refresh = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        self._maybe_refresh()
+        with self._lock:
+            return list(self._models)
+
+    def snapshot(self):
+        self._maybe_refresh()
+        with self._lock:
+            return {
+                "models": list(self._models),
+                "fetched_at": self._fetched_at,
+                "error": self._error,
+                "refreshing": self._refreshing,
+            }
+
+    def _maybe_refresh(self):
+        if not self.api_key:
+            return
+        with self._lock:
+            if self._refreshing or time.time() < self._next_refresh:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name="model-catalog", daemon=True).start()
+
+    def refresh(self):
+        """Fetches the catalog synchronously; normally called from the background thread."""
+        try:
+            models = []
+            for m in self.clients.get(self.api_key).models.list():
+                actions = getattr(m, "supported_actions", None) or []
+                if not actions or "generateContent" in actions:
+                    models.append(m.name)
+        except Exception as e:
+            logger.warning("[SYSTEM DIAGNOSTICS] Failed to list models: %s", e)
+            with self._lock:
+                self._error = str(e)
+                self._next_refresh = time.time() + self.retry_after
+                self._refreshing = False
+            return
+
+        with self._lock:
+            self._models = models
+            self._fetched_at = time.time()
+            self._error = None
+            self._next_refresh = self._fetched_at + self.ttl
+            self._refreshing = False
@@ -1,12 +1,142 @@
 import fitz  # PyMuPDF
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .layout_service import StructuredResume, layout_text, page_layout
+from .text_compaction import compact_pages
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _open(source):
+    """Opens a PDF from a path, raw bytes, or a binary file-like object without touching disk."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=bytes(source), filetype="pdf")
+    if hasattr(source, "read"):
+        return fitz.open(stream=source.read(), filetype="pdf")
+    return fitz.open(source)
+
+
+def _extract_pages(doc, start, stop, layout=False):
+    """(text, seconds, page_layout or None) for each page in [start, stop)."""
+    pages = []
+    for number in range(start, stop):
+        started = time.perf_counter()
+        if layout:
+            page = page_layout(doc[number])
+            text = layout_text(page)
+        else:
+            page = None
+            text = doc[number].get_text()
+        pages.append((text, time.perf_counter() - started, page))
+    return pages
+
+
+def _extract_range(data, start, stop, layout=False):
+    # Runs in a worker process; each worker opens its own copy of the document.
+    doc = fitz.open(stream=data, filetype="pdf")
+    try:
+        return _extract_pages(doc, start, stop, layout)
+    finally:
+        doc.close()
+
+
+def _get_pool(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+class ExtractionResult:
+    """Extracted text plus the per-page breakdown and timings.
+
+    A layout extraction also keeps each page's positioned lines, from which
+    `structured` builds the typed section model."""
+
+    def __init__(self, pages, page_timings, elapsed, parallel=False, layouts=None):
+        self.pages = pages
+        self.page_timings = page_timings
+        self.elapsed = elapsed
+        self.parallel = parallel
+        self.layouts = layouts
+        self.text = "".join(pages)
+        self._structured = None
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    @property
+    def structured(self):
+        """The StructuredResume of a layout extraction, or None for a plain one."""
+        if self._structured is None and self.layouts is not None:
+            self._structured = StructuredResume.from_pages(self.layouts)
+        return self._structured
+
+    def compacted_text(self):
+        """Text ready for a prompt: the sections of a layout extraction with their headings, otherwise the
+        pages with running headers and footers dropped (see compact_pages())."""
+        if self.structured is not None and len(self.structured):
+            return self.structured.text
+        return compact_pages(self.pages).text
+
 
 class PDFService:
     @staticmethod
-    def extract_text(pdf_path):
-        """Extracts plain text from a PDF file."""
-        doc = fitz.open(pdf_path)
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
-        return text
+    def extract_text(pdf_source):
+        """Extracts plain text from a PDF given as a path, bytes or a binary stream."""
+        return PDFService.extract(pdf_source).text
+
+    @staticmethod
+    def extract_structured(pdf_source):
+        """Extracts a PDF into a StructuredResume: columns in reading order, split into typed sections."""
+        return PDFService.extract(pdf_source, layout=True).structured
+
+    @staticmethod
+    def extract(pdf_source, parallel_min_pages=None, workers=None, layout=False):
+        """Extracts text page by page and reports how long each page took.
+
+        Documents with at least `parallel_min_pages` pages are split into page
+        ranges and extracted across a shared process pool. With `layout`, each
+        page is read from its positioned lines instead (see page_layout()), so
+        multi-column pages come out one column at a time."""
+        started = time.perf_counter()
+        if hasattr(pdf_source, "read"):
+            pdf_source = pdf_source.read()
+        doc = _open(pdf_source)
+        try:
+            page_count = doc.page_count
+            workers = workers or os.cpu_count() or 1
+            parallel = bool(parallel_min_pages) and workers > 1 and page_count >= parallel_min_pages
+            if not parallel:
+                pages = _extract_pages(doc, 0, page_count, layout)
+        finally:
+            doc.close()
+
+        if parallel:
+            data = pdf_source if isinstance(pdf_source, bytes) else PDFService._read_bytes(pdf_source)
+            step = -(-page_count // workers)
+            ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+            pool = _get_pool(workers)
+            futures = [pool.submit(_extract_range, data, start, stop, layout) for start, stop in ranges]
+            pages = [page for future in futures for page in future.result()]
+
+        return ExtractionResult(
+            [text for text, _, _ in pages],
+            [round(seconds, 6) for _, seconds, _ in pages],
+            time.perf_counter() - started,
+            parallel=parallel,
+            layouts=[page for _, _, page in pages] if layout else None,
+        )
+
+    @staticmethod
+    def _read_bytes(pdf_source):
+        if isinstance(pdf_source, (bytearray, memoryview)):
+            return bytes(pdf_source)
+        with open(pdf_source, "rb") as f:
+            return f.read()
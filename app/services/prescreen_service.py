@@ -0,0 +1,158 @@
+import re
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+_QUANTIFIED = re.compile(r"\d+(?:[.,]\d+)?\s*(?:%|x\b|k\b|m\b|\+)|[$€£₹]\s*\d|\b\d{2,}\b")
+
+STOPWORDS = frozenset("""
+a about above after again all also an and any are as at be been being both but by can could did do does
+doing during each etc few for from further had has have having he her here how i if in into is it its
+itself just me more most must my no nor not now of off on once only or other our out over own per plus
+same she should so some such than that the their them then there these they this those through to too
+under until up very via was we well were what when where which while who whom why will with within
+without would you your able across ensure etc. experience including strong work working years year team
+teams role responsibilities requirements preferred required skills ability knowledge using use new
+""".split())
+
+# Common tools, languages and practices recognised as "skills" when they appear in a JD.
+SKILL_TERMS = frozenset("""
+python java javascript typescript go golang rust c c++ c# ruby php kotlin swift scala r matlab sql nosql
+html css react angular vue node.js nodejs next.js django flask fastapi spring rails express
+aws azure gcp docker kubernetes terraform ansible jenkins git github gitlab ci cd linux bash
+postgresql postgres mysql mongodb redis elasticsearch kafka spark hadoop airflow snowflake bigquery
+dbt tableau powerbi excel pandas numpy scikit-learn tensorflow pytorch keras nlp llm ml ai
+microservices graphql rest grpc api apis agile scrum jira figma selenium cypress pytest junit
+devops sre observability prometheus grafana datadog security oauth networking distributed
+leadership communication mentoring stakeholder analytics statistics etl testing debugging
+""".split())
+
+
+def tokenize(text):
+    tokens = []
+    for token in _TOKEN.findall((text or "").lower()):
+        token = token.rstrip(".")
+        if len(token) > 1 or token in ("c", "r"):
+            tokens.append(token)
+    return tokens
+
+
+def _terms(tokens):
+    """Unigrams without stopwords plus adjacent bigrams ("machine learning", "data pipelines")."""
+    words = [t for t in tokens if t not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def quantification_density(text):
+    """Share of substantive lines (4+ words) that carry a metric, scaled to 0-100."""
+    lines = [line for line in (text or "").splitlines() if len(line.split()) >= 4]
+    if not lines:
+        return 0
+    quantified = sum(1 for line in lines if _QUANTIFIED.search(line))
+    # A resume with metrics on roughly half its lines is already strongly quantified.
+    return int(round(min(1.0, quantified / len(lines) / 0.5) * 100))
+
+
+class JDVector:
+    """Weighted vocabulary of a job description: BM25-style query terms and the skills it names."""
+
+    def __init__(self, job_description, max_terms=200):
+        tokens = tokenize(job_description)
+        terms = _terms(tokens)
+        counts = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        # Keep unigrams and repeated bigrams; one-off bigrams are mostly noise.
+        ranked = sorted(
+            (t for t, c in counts.items() if " " not in t or c > 1),
+            key=lambda t: (-counts[t], t),
+        )[:max_terms]
+        self.terms = ranked
+        self.index = {term: i for i, term in enumerate(ranked)}
+        self.query_tf = np.array([counts[t] for t in ranked], dtype=np.float64)
+        self.skills = sorted({t for t in tokens if t in SKILL_TERMS} | {t for t in ranked if t in SKILL_TERMS})
+        self.skill_mask = np.array([t in SKILL_TERMS for t in ranked], dtype=bool)
+
+
+class Prescreener:
+    """Deterministic local scorer that estimates how well resumes match a JD in milliseconds.
+
+    Resumes are projected onto the JD's vocabulary as a term-count matrix, so a
+    whole batch is scored with a handful of NumPy operations. The
+    keyword_match and skill_match values use the same 0-100 scale as
+    ats_analysis.breakdown, which lets a threshold/top-K gate decide which
+    candidates deserve a full analyze_resume call."""
+
+    def __init__(self, k1=1.5, b=0.75, weights=(0.45, 0.35, 0.20)):
+        self.k1 = k1
+        self.b = b
+        self.weights = weights
+
+    def _matrix(self, jd, resume_texts):
+        counts = np.zeros((len(resume_texts), len(jd.terms)), dtype=np.float64)
+        lengths = np.zeros(len(resume_texts), dtype=np.float64)
+        for row, text in enumerate(resume_texts):
+            terms = _terms(tokenize(text))
+            lengths[row] = max(len(terms), 1)
+            for term in terms:
+                col = jd.index.get(term)
+                if col is not None:
+                    counts[row, col] += 1
+        return counts, lengths
+
+    def score_many(self, resume_texts, job_description):
+        """Returns one dict per resume with keyword_match, skill_match, quantification, bm25 and score."""
+        if not resume_texts:
+            return []
+        jd = job_description if isinstance(job_description, JDVector) else JDVector(job_description)
+        counts, lengths = self._matrix(jd, resume_texts)
+        present = counts > 0
+
+        # Keyword match: share of the JD's term weight (query tf) that the resume covers.
+        total_weight = jd.query_tf.sum()
+        keyword = (present @ jd.query_tf) / total_weight if total_weight else np.zeros(len(resume_texts))
+
+        # Skill match: share of the skills named in the JD that appear in the resume.
+        if jd.skill_mask.any():
+            skill = present[:, jd.skill_mask].sum(axis=1) / jd.skill_mask.sum()
+        else:
+            skill = keyword
+
+        # BM25 against the batch itself (idf over the resumes being screened) for ranking ties.
+        n = len(resume_texts)
+        df = present.sum(axis=0)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * lengths / lengths.mean())
+        tf = counts * (self.k1 + 1) / (counts + norm[:, None])
+        bm25 = (tf * idf * jd.query_tf).sum(axis=1)
+
+        quant = np.array([quantification_density(text) for text in resume_texts], dtype=np.float64)
+        w_kw, w_skill, w_quant = self.weights
+        combined = w_kw * keyword * 100 + w_skill * skill * 100 + w_quant * quant
+
+        return [
+            {
+                "keyword_match": int(round(keyword[i] * 100)),
+                "skill_match": int(round(skill[i] * 100)),
+                "quantification": int(quant[i]),
+                "bm25": round(float(bm25[i]), 4),
+                "score": int(round(combined[i])),
+            }
+            for i in range(n)
+        ]
+
+    def score(self, resume_text, job_description):
+        return self.score_many([resume_text], job_description)[0]
+
+    @staticmethod
+    def gate(scores, threshold=None, top_k=None):
+        """Indices of candidates that should get a full analysis, best first.
+
+        A candidate passes when its score reaches `threshold` (if set) and it is
+        among the best `top_k` (if set); BM25 breaks ties."""
+        order = sorted(range(len(scores)), key=lambda i: (scores[i]["score"], scores[i]["bm25"]), reverse=True)
+        if threshold is not None:
+            order = [i for i in order if scores[i]["score"] >= threshold]
+        if top_k is not None:
+            order = order[:max(top_k, 0)]
+        return order
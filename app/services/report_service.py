@@ -0,0 +1,246 @@
+import html
+import io
+import os
+import re
+import tempfile
+import threading
+
+import fitz  # PyMuPDF
+
+# Bump when the layout changes so cached reports are re-rendered.
+REPORT_VERSION = "1"
+
+_CSS = """
+* { font-family: sans-serif; }
+body { font-size: 10pt; color: #1e293b; }
+h1 { font-size: 20pt; margin: 0 0 2pt 0; }
+h2 { font-size: 13pt; color: #4338ca; margin: 14pt 0 4pt 0; border-bottom: 1px solid #c7d2fe; }
+h3 { font-size: 11pt; margin: 8pt 0 2pt 0; }
+p { margin: 0 0 4pt 0; }
+ul { margin: 0 0 4pt 0; }
+li { margin: 0 0 2pt 0; }
+.muted { color: #64748b; }
+.score { font-size: 28pt; font-weight: bold; color: #4338ca; }
+td, th { padding: 2pt 8pt 2pt 0; text-align: left; }
+"""
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+
+
+def _text(value):
+    """Escapes a model-written string, keeping its **bold** markdown and line breaks."""
+    escaped = html.escape(str(value or ""))
+    return _BOLD.sub(r"<b>\1</b>", escaped).replace("\n", "<br/>")
+
+
+def _items(values):
+    values = [v for v in values or [] if v]
+    if not values:
+        return ""
+    return "<ul>" + "".join(f"<li>{_text(v)}</li>" for v in values) + "</ul>"
+
+
+def _rows(pairs):
+    return "<table>" + "".join(f"<tr><th>{_text(k)}</th><td>{_text(v)}</td></tr>" for k, v in pairs) + "</table>"
+
+
+def _label(key):
+    return key.replace("_", " ").capitalize()
+
+
+def build_report_html(result):
+    """The report body as the HTML subset fitz.Story lays out."""
+    info = result.get("candidate_info") or {}
+    ats = result.get("ats_analysis") or {}
+    explanation = ats.get("explanation") or {}
+    market = result.get("market_intel") or {}
+    insights = result.get("advanced_insights") or {}
+    review = result.get("recruiter_review") or {}
+    tailoring = result.get("resume_tailoring") or {}
+    gaps = result.get("skill_gap_analysis") or {}
+    prep = result.get("interview_prep") or {}
+    roadmap = result.get("career_roadmap") or {}
+
+    parts = [
+        f"<h1>{_text(info.get('name') or 'Candidate')}</h1>",
+        f"<p class='muted'>{_text(info.get('title'))} &#183; {_text(info.get('career_persona'))}</p>",
+        f"<p class='score'>{_text(ats.get('overall_score', 0))}/100</p>",
+        f"<p>Decision: <b>{_text(review.get('decision') or 'N/A')}</b> &#183; Readiness {_text(info.get('readiness_score', 0))}/100</p>",
+        "<h2>ATS analysis</h2>",
+        _rows([(_label(k), v) for k, v in (ats.get("breakdown") or {}).items()]),
+        _rows([(_label(k), v) for k, v in (ats.get("section_scores") or {}).items()]),
+    ]
+    for key in ("executive_summary", "keyword_parity", "quantification_review", "structural_feedback"):
+        if explanation.get(key):
+            parts.append(f"<h3>{_label(key)}</h3><p>{_text(explanation[key])}</p>")
+
+    parts.append("<h2>Recruiter review</h2>")
+    parts.append(f"<p>{_text(review.get('honest_feedback'))}</p>")
+    if review.get("key_strengths"):
+        parts.append("<h3>Key strengths</h3>" + _items(review["key_strengths"]))
+    if review.get("critical_fail_points"):
+        parts.append("<h3>Critical fail points</h3>" + _items(review["critical_fail_points"]))
+
+    parts.append("<h2>Market intelligence</h2>")
+    parts.append(_rows([
+        ("Salary (USD)", market.get("salary_range_usd")),
+        ("Salary (INR)", market.get("salary_range_inr")),
+        ("Market demand", market.get("market_demand")),
+    ]))
+    parts.append(_items(market.get("top_competencies")))
+
+    parts.append("<h2>Advanced insights</h2>")
+    for key in ("technical_depth_scouter", "culture_fit_predictor", "faang_matchmaker"):
+        if insights.get(key):
+            parts.append(f"<h3>{_label(key)}</h3><p>{_text(insights[key])}</p>")
+    if insights.get("skill_radar"):
+        parts.append(_rows(insights["skill_radar"].items()))
+    if insights.get("skills_gap_chart"):
+        parts.append(_rows(
+            (g.get("skill"), f"{g.get('possessed', 0)} / {g.get('required', 0)}") for g in insights["skills_gap_chart"]
+        ))
+
+    parts.append("<h2>Resume tailoring</h2>")
+    if tailoring.get("new_summary"):
+        parts.append(f"<h3>Suggested summary</h3><p>{_text(tailoring['new_summary'])}</p>")
+    if tailoring.get("optimized_skills"):
+        parts.append(f"<h3>Optimized skills</h3><p>{_text(', '.join(tailoring['optimized_skills']))}</p>")
+    for bullet in tailoring.get("enhanced_bullets") or []:
+        parts.append(
+            f"<p class='muted'>{_text(bullet.get('original'))}</p>"
+            f"<p><b>{_text(bullet.get('improved'))}</b></p>"
+            f"<p class='muted'>{_text(bullet.get('impact'))}</p>"
+        )
+    if tailoring.get("linkedin_tips"):
+        parts.append("<h3>LinkedIn tips</h3>" + _items(tailoring["linkedin_tips"]))
+
+    parts.append("<h2>Skill gaps</h2>")
+    if gaps.get("missing_technical_skills"):
+        parts.append("<h3>Technical</h3>" + _items(gaps["missing_technical_skills"]))
+    if gaps.get("missing_soft_skills"):
+        parts.append("<h3>Soft skills</h3>" + _items(gaps["missing_soft_skills"]))
+    for project in gaps.get("recommended_projects") or []:
+        stack = ", ".join(project.get("tech_stack") or [])
+        parts.append(f"<h3>{_text(project.get('title'))}</h3><p>{_text(project.get('description'))}</p><p class='muted'>{_text(stack)}</p>")
+    if gaps.get("certifications"):
+        parts.append("<h3>Certifications</h3>" + _items(gaps["certifications"]))
+
+    parts.append("<h2>Interview preparation</h2>")
+    if prep.get("technical_questions"):
+        parts.append("<h3>Technical</h3>" + _items(prep["technical_questions"]))
+    if prep.get("behavioral_questions"):
+        parts.append("<h3>Behavioral</h3>" + _items(prep["behavioral_questions"]))
+
+    parts.append("<h2>Career roadmap</h2>")
+    parts.append(_rows((f"Month {step.get('month')}", step.get("focus")) for step in roadmap.get("learning_plan_6_months") or []))
+    if roadmap.get("final_advice"):
+        parts.append(f"<p>{_text(roadmap['final_advice'])}</p>")
+
+    if tailoring.get("cover_letter"):
+        parts.append("<h2>Cover letter</h2>")
+        parts.append(f"<p>{_text(tailoring['cover_letter'])}</p>")
+    return "".join(parts)
+
+
+def render_report(result, paper="a4", margin=42):
+    """Renders an analysis result dict into a text-based (searchable) PDF and returns its bytes."""
+    mediabox = fitz.paper_rect(paper)
+    where = mediabox + (margin, margin, -margin, -margin)
+    story = fitz.Story(html=build_report_html(result), user_css=_CSS)
+    buffer = io.BytesIO()
+    writer = fitz.DocumentWriter(buffer)
+    more = True
+    while more:
+        device = writer.begin_page(mediabox)
+        more, _ = story.place(where)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+
+    doc = fitz.open(stream=buffer.getvalue(), filetype="pdf")
+    try:
+        name = ((result.get("candidate_info") or {}).get("name") or "Candidate").replace("**", "")
+        doc.set_metadata({"title": f"{name} - Resume Analysis", "creator": "AI Resume Analyzer"})
+        for page in doc:
+            page.insert_text(
+                (margin, mediabox.height - margin / 2),
+                f"{name} - Resume Analysis - page {page.number + 1} of {doc.page_count}",
+                fontsize=7,
+                color=(0.4, 0.45, 0.55),
+            )
+        return doc.tobytes(garbage=3, deflate=True)
+    finally:
+        doc.close()
+
+
+class ReportCache:
+    """Rendered PDF reports on disk, one file per result and version.
+
+    `version` identifies the stored result (it changes when a retry replaces
+    it), so a stale file is simply never looked up again; sweeps drop the
+    oldest files once the directory grows past max_bytes."""
+
+    def __init__(self, directory, max_bytes=128 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self.hits = 0
+        self.rendered = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, result_id, version):
+        return os.path.join(self.directory, result_id[:2], f"{result_id}.{version}.pdf")
+
+    def get_or_render(self, result_id, version, result, render=render_report):
+        """Path of the cached PDF for this result version, rendering it first on a miss."""
+        path = self._path(result_id, version)
+        if os.path.exists(path):
+            with self._lock:
+                self.hits += 1
+            return path
+
+        data = render(result)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self.rendered += 1
+            self._writes_since_sweep += 1
+            sweep = self._writes_since_sweep >= 32
+            if sweep:
+                self._writes_since_sweep = 0
+        if sweep:
+            self.sweep()
+        return path
+
+    def sweep(self):
+        """Drops the oldest reports until the directory is under max_bytes."""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "rendered": self.rendered}
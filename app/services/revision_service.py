@@ -0,0 +1,107 @@
+import difflib
+
+from .cache_service import normalize_text
+from .layout_service import heading_kind
+
+# Report sections that read each part of the resume. career_roadmap is built from the skill gaps, so it
+# follows every segment that feeds them.
+SEGMENT_SECTIONS = {
+    "header": ["candidate_info", "resume_tailoring"],
+    "summary": ["candidate_info", "ats_analysis", "recruiter_review", "resume_tailoring"],
+    "experience": [
+        "ats_analysis", "advanced_insights", "recruiter_review", "resume_tailoring", "interview_prep", "career_roadmap",
+    ],
+    "skills": [
+        "ats_analysis", "advanced_insights", "resume_tailoring", "skill_gap_analysis", "interview_prep", "career_roadmap",
+    ],
+    "projects": ["advanced_insights", "recruiter_review", "skill_gap_analysis", "interview_prep", "career_roadmap"],
+    "education": ["candidate_info", "recruiter_review", "skill_gap_analysis"],
+}
+
+# Sections that are measured against the JD's requirements, including the skills_gap_chart levels
+# (advanced_insights) and the roadmap built on those gaps. Only market_intel follows the role itself,
+# which a small JD edit does not change.
+JD_SECTIONS = [
+    "ats_analysis", "advanced_insights", "recruiter_review", "resume_tailoring", "skill_gap_analysis", "interview_prep",
+    "career_roadmap",
+]
+
+
+def segment_resume(text):
+    """Splits resume text into {segment: text} by its section headings; lines before the first heading are 'header'.
+
+    Text under an unrecognised heading stays with the segment before it."""
+    segments = {}
+    current = "header"
+    for line in (text or "").splitlines():
+        segment = heading_kind(line)
+        if segment is not None:
+            current = segment
+            continue
+        segments.setdefault(current, []).append(line)
+    return {name: normalize_text("\n".join(lines)) for name, lines in segments.items()}
+
+
+def change_ratio(old, new):
+    """Share of words that differ between two texts (0.0 identical, 1.0 nothing in common)."""
+    old_words = normalize_text(old).split()
+    new_words = normalize_text(new).split()
+    if not old_words and not new_words:
+        return 0.0
+    return 1.0 - difflib.SequenceMatcher(None, old_words, new_words, autojunk=False).ratio()
+
+
+class RevisionPlan:
+    """Which sections of a previous report a revised submission must regenerate, and which it can keep."""
+
+    def __init__(self, regenerate, reuse, changed):
+        self.regenerate = regenerate
+        self.reuse = reuse
+        self.changed = changed
+
+    def meta(self):
+        return {"mode": "incremental", "regenerated": self.regenerate, "reused": self.reuse, "changed": self.changed}
+
+
+class RevisionPlanner:
+    """Diffs a resubmission against the inputs of an earlier analysis and plans an incremental re-run.
+
+    The resume is compared segment by segment (summary, experience, skills,
+    ...) and each changed segment marks the sections in SEGMENT_SECTIONS; a
+    changed JD marks JD_SECTIONS. Sections the earlier report failed to
+    produce are always regenerated. plan() returns None, meaning "analyze from
+    scratch", when either input changed by more than `max_change` (that is a
+    new submission, not a revision) or every section would be regenerated."""
+
+    def __init__(self, sections, max_change=0.35):
+        self.sections = list(sections)
+        self.max_change = max_change
+
+    def plan(self, previous, resume_text, job_description):
+        """`previous` is {"resume_text", "job_description", "result"} of the earlier analysis."""
+        result = previous.get("result") or {}
+        if not self.max_change or result.get("error"):
+            return None
+        if change_ratio(previous.get("resume_text"), resume_text) > self.max_change:
+            return None
+        if change_ratio(previous.get("job_description"), job_description) > self.max_change:
+            return None
+
+        changed = []
+        stale = set()
+        old_segments = segment_resume(previous.get("resume_text"))
+        new_segments = segment_resume(resume_text)
+        for segment in sorted(set(old_segments) | set(new_segments)):
+            if old_segments.get(segment) != new_segments.get(segment):
+                changed.append(segment)
+                stale.update(SEGMENT_SECTIONS[segment])
+        if normalize_text(previous.get("job_description")) != normalize_text(job_description):
+            changed.append("job_description")
+            stale.update(JD_SECTIONS)
+        failed = (result.get("meta") or {}).get("section_errors") or {}
+        stale.update(name for name in self.sections if name not in result or name in failed)
+
+        regenerate = [name for name in self.sections if name in stale]
+        if len(regenerate) == len(self.sections):
+            return None
+        return RevisionPlan(regenerate, [name for name in self.sections if name not in stale], changed)
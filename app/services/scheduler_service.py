@@ -0,0 +1,301 @@
+import asyncio
+import hashlib
+import re
+import threading
+import time
+
+_RETRY_DELAY = re.compile(r"retry[_ ]?delay\W+(\d+(?:\.\d+)?)s?", re.IGNORECASE)
+
+
+class SaturatedError(Exception):
+    """Raised when every key/model is out of budget and the wait queue is full or the wait timed out."""
+
+    def __init__(self, message="RESOURCE_EXHAUSTED: every configured API key is out of quota"):
+        super().__init__(message)
+
+
+def is_quota_error(error):
+    text = str(error)
+    return "429" in text or "RESOURCE_EXHAUSTED" in text
+
+
+def is_key_error(error):
+    text = str(error)
+    return "API_KEY_INVALID" in text or "API key expired" in text or "API key not valid" in text
+
+
+class TokenBucket:
+    """Refills `rate_per_minute` units per minute up to `capacity` (one minute's worth by default)."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity or rate_per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 when they are available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def available(self, now):
+        self._refill(now)
+        return max(self.level, 0.0)
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+    def debit(self, amount):
+        # Settles the difference between estimated and actual usage; may go negative.
+        self.level -= amount
+
+
+class Lease:
+    """A reservation of one request on a key/model pair."""
+
+    def __init__(self, slot, model, tokens):
+        self.slot = slot
+        self.model = model
+        self.tokens = tokens
+
+    @property
+    def api_key(self):
+        return self.slot.api_key
+
+
+class _KeySlot:
+    def __init__(self, api_key, rpm, tpm):
+        self.api_key = api_key
+        self.fingerprint = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.exhausted_until = {}
+        self.disabled = False
+        self.in_flight = 0
+
+
+class RequestScheduler:
+    """Routes Gemini calls across a pool of API keys and candidate models.
+
+    Each key has requests-per-minute and tokens-per-minute buckets. A 429 marks
+    the key/model pair exhausted until its retry delay passes, and the call is
+    retried on the next pair with budget, preferring earlier models in the list.
+    Callers block in a bounded queue only when every pair is out of budget."""
+
+    def __init__(self, api_keys, models, clients, rpm=60, tpm=1000000,
+                 max_waiters=16, max_wait=30.0, exhausted_cooldown=60.0):
+        keys = [k for k in dict.fromkeys(api_keys) if k]
+        if not keys:
+            raise ValueError("RequestScheduler needs at least one API key")
+        self.models = list(models)
+        self.clients = clients
+        self.max_waiters = max_waiters
+        self.max_wait = max_wait
+        self.exhausted_cooldown = exhausted_cooldown
+        self._slots = [_KeySlot(k, rpm, tpm) for k in keys]
+        self._cond = threading.Condition()
+        self._waiters = 0
+        self.rejected = 0
+        self.failovers = 0
+
+    def acquire(self, tokens, avoid=None):
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            queued = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    lease, wait = self._reserve(tokens, now, avoid)
+                    if lease is not None:
+                        return lease
+                    if wait is None:
+                        raise SaturatedError("RESOURCE_EXHAUSTED: no usable API key is configured")
+                    if not queued:
+                        if self._waiters >= self.max_waiters:
+                            self.rejected += 1
+                            raise SaturatedError()
+                        self._waiters += 1
+                        queued = True
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise SaturatedError()
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                if queued:
+                    self._waiters -= 1
+
+    async def acquire_async(self, tokens, avoid=None):
+        """acquire() for the event loop: sleeps without holding a thread while every pair is out of budget."""
+        deadline = time.monotonic() + self.max_wait
+        queued = False
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    lease, wait = self._reserve(tokens, now, avoid)
+                    if lease is not None:
+                        return lease
+                    if wait is None:
+                        raise SaturatedError("RESOURCE_EXHAUSTED: no usable API key is configured")
+                    if not queued:
+                        if self._waiters >= self.max_waiters:
+                            self.rejected += 1
+                            raise SaturatedError()
+                        self._waiters += 1
+                        queued = True
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise SaturatedError()
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            if queued:
+                with self._cond:
+                    self._waiters -= 1
+
+    def _reserve(self, tokens, now, avoid=None):
+        """Takes budget from the best key/model pair, or returns how long until one frees up.
+
+        Pairs in `avoid` ((api_key, model) tuples) are only used when no other pair has budget."""
+        best_wait = None
+        fallback = None
+        for model in self.models:
+            candidates = []
+            for slot in self._slots:
+                if slot.disabled:
+                    continue
+                blocked = slot.exhausted_until.get(model, 0) - now
+                wait = max(blocked, slot.requests.wait_time(1, now), slot.tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    if avoid and (slot.api_key, model) in avoid:
+                        fallback = fallback or ([slot], model)
+                    else:
+                        candidates.append(slot)
+                elif best_wait is None or wait < best_wait:
+                    best_wait = wait
+            if candidates:
+                return self._lease(candidates, model, tokens, now), None
+        if fallback is not None:
+            return self._lease(fallback[0], fallback[1], tokens, now), None
+        return None, best_wait
+
+    def _lease(self, candidates, model, tokens, now):
+        # Spread load: prefer the key with the most token budget left, then the least busy one.
+        slot = max(candidates, key=lambda s: (s.tokens.level, -s.in_flight))
+        slot.requests.take(1, now)
+        slot.tokens.take(tokens, now)
+        slot.in_flight += 1
+        return Lease(slot, model, tokens)
+
+    def release(self, lease, used_tokens=None):
+        with self._cond:
+            lease.slot.in_flight -= 1
+            if used_tokens is not None and used_tokens > lease.tokens:
+                lease.slot.tokens.debit(used_tokens - lease.tokens)
+            self._cond.notify_all()
+
+    def report_exhausted(self, lease, error=None):
+        match = _RETRY_DELAY.search(str(error or ""))
+        cooldown = float(match.group(1)) if match else self.exhausted_cooldown
+        with self._cond:
+            lease.slot.exhausted_until[lease.model] = time.monotonic() + cooldown
+
+    def report_invalid(self, lease):
+        with self._cond:
+            lease.slot.disabled = True
+
+    def execute(self, call, tokens, avoid=None, on_lease=None):
+        """Runs call(client, model), failing over to other keys/models on quota or key errors.
+
+        call may return an object with usage_metadata to settle the token estimate.
+        `avoid` de-prioritizes (api_key, model) pairs, and on_lease(api_key, model)
+        is told which pair each attempt went to; hedged calls use both."""
+        last_error = None
+        attempts = len(self._slots) * len(self.models)
+        for attempt in range(attempts):
+            lease = self.acquire(tokens, avoid)
+            if on_lease is not None:
+                on_lease(lease.api_key, lease.model)
+            if attempt:
+                with self._cond:
+                    self.failovers += 1
+            used = None
+            try:
+                result = call(self.clients.get(lease.api_key), lease.model)
+                used = self._used_tokens(result)
+                return result
+            except Exception as e:
+                last_error = e
+                if not self._fail_over(lease, e):
+                    raise
+            finally:
+                self.release(lease, used)
+        raise last_error
+
+    async def execute_async(self, call, tokens, avoid=None, on_lease=None):
+        """execute() for a coroutine function call(client, model)."""
+        last_error = None
+        attempts = len(self._slots) * len(self.models)
+        for attempt in range(attempts):
+            lease = await self.acquire_async(tokens, avoid)
+            if on_lease is not None:
+                on_lease(lease.api_key, lease.model)
+            if attempt:
+                with self._cond:
+                    self.failovers += 1
+            used = None
+            try:
+                result = await call(self.clients.get(lease.api_key), lease.model)
+                used = self._used_tokens(result)
+                return result
+            except Exception as e:
+                last_error = e
+                if not self._fail_over(lease, e):
+                    raise
+            finally:
+                self.release(lease, used)
+        raise last_error
+
+    @staticmethod
+    def _used_tokens(result):
+        usage = getattr(result, "usage_metadata", None)
+        return getattr(usage, "total_token_count", None) if usage is not None else None
+
+    def _fail_over(self, lease, error):
+        """Marks the pair after a quota or key error; returns False for any other error."""
+        if is_quota_error(error):
+            self.report_exhausted(lease, error)
+        elif is_key_error(error):
+            self.report_invalid(lease)
+        else:
+            return False
+        return True
+
+    def stats(self):
+        now = time.monotonic()
+        with self._cond:
+            return {
+                "waiters": self._waiters,
+                "rejected": self.rejected,
+                "failovers": self.failovers,
+                "keys": [
+                    {
+                        "key": slot.fingerprint,
+                        "disabled": slot.disabled,
+                        "in_flight": slot.in_flight,
+                        "requests_available": round(slot.requests.available(now), 2),
+                        "tokens_available": round(slot.tokens.available(now)),
+                        "exhausted_models": sorted(m for m, until in slot.exhausted_until.items() if until > now),
+                    }
+                    for slot in self._slots
+                ],
+            }
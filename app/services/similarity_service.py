@@ -0,0 +1,363 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; the index file is then written without locking
+    fcntl = None
+
+from .cache_service import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MASK = np.uint64(0xFFFFFFFF)
+_MIX = np.uint64(0x100000001B3)
+# Candidates scored on their full signatures per lookup, taken in order of shared bands.
+_MAX_CANDIDATES = 64
+# Fixed so every worker, and every restart, hashes the same text to the same signature.
+_SEED = 1234
+# Entries (inputs and result) kept in memory when the index has no directory.
+_MEMORY_ENTRIES = 1024
+# Seconds between sweeps of expired entry files, at most.
+_SWEEP_INTERVAL = 60 * 60
+
+
+def shingles(text, size=3):
+    """32-bit hashes of the distinct word `size`-grams of the normalized, lowercased text."""
+    words = normalize_text(text).lower().split()
+    grams = {" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+    return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+class Match:
+    """A stored analysis whose inputs resemble the query's; `similarity` is the lower of the two estimates."""
+
+    def __init__(self, key, resume_similarity, jd_similarity):
+        self.key = key
+        self.resume_similarity = resume_similarity
+        self.jd_similarity = jd_similarity
+        self.similarity = min(resume_similarity, jd_similarity)
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of past analyses' inputs, with an LSH index to find near-duplicate submissions.
+
+    Each resume and JD gets a `num_perm`-value MinHash signature over its word
+    trigrams; matching values estimate the Jaccard similarity of the two
+    texts, so a reposted JD or a re-exported resume (a changed date, a moved
+    line) still scores close to 1.0. The signatures are cut into bands of
+    `rows` values from the resume plus the same `rows` from the JD, and any
+    stored analysis that shares a band with the query becomes a candidate;
+    the candidates sharing the most bands are then scored on their full
+    signatures. That keeps a lookup to a few binary searches over a sorted
+    band table however many analyses are stored.
+
+    With a directory, signatures are appended to a file every worker reads
+    from, and each analysis's inputs and result are kept beside it, so a
+    match does not depend on the analysis cache still holding the result.
+    Entries expire `ttl` seconds after they were written, like the cache's.
+    The file is compacted to the newest 3/4 of `max_entries` once it passes
+    `max_entries`.
+
+    A match at `threshold` or above may be served as is, and one at
+    `warm_threshold` or above seeds an incremental re-analysis. Both default
+    to 0 (off), since either reuses another submission's analysis."""
+
+    def __init__(self, directory=None, num_perm=64, rows=4, threshold=0.0, warm_threshold=0.0, max_entries=100000,
+                 ttl=24 * 60 * 60):
+        if num_perm % rows:
+            raise ValueError("num_perm must be a multiple of rows")
+        self.directory = directory
+        self.num_perm = num_perm
+        self.rows = rows
+        self.bands = num_perm // rows
+        self.threshold = threshold
+        self.warm_threshold = warm_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        rng = np.random.RandomState(_SEED)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._record = np.dtype([("key", "S64"), ("sig", "<u4", (2 * num_perm,))])
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._swept = time.time()
+        self._reset()
+        self.path = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.path = os.path.join(directory, f"minhash-{num_perm}.bin")
+            self._lock_path = os.path.join(directory, "minhash.lock")
+
+    # --- signatures ---------------------------------------------------------------------------------
+
+    def minhash(self, text):
+        hashes = shingles(text)
+        # Universal hashing (a*x + b) mod p, one permutation per column.
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MASK
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def signature(self, resume_text, job_description):
+        """The resume's signature followed by the JD's, as one array of 2 * num_perm values."""
+        return np.concatenate([self.minhash(resume_text), self.minhash(job_description)])
+
+    def _band_keys(self, sigs):
+        """One 64-bit key per band for each signature row; the band number is mixed in."""
+        n = len(sigs)
+        parts = sigs.reshape(n, 2, self.bands, self.rows).transpose(0, 2, 1, 3).reshape(n, self.bands, 2 * self.rows)
+        keys = np.tile(np.arange(1, self.bands + 1, dtype=np.uint64), (n, 1)) * _MIX
+        for column in range(2 * self.rows):
+            keys = (keys ^ parts[:, :, column].astype(np.uint64)) * _MIX
+        return keys
+
+    # --- lookups ------------------------------------------------------------------------------------
+
+    def find(self, signature):
+        """The most similar stored analysis at or above warm_threshold (threshold when that is 0), or None."""
+        floor = self.warm_threshold or self.threshold
+        if not floor:
+            return None
+        self._refresh()
+        query = self._band_keys(signature[None, :])[0]
+        with self._lock:
+            found = []
+            if len(self._sorted_keys):
+                lo = np.searchsorted(self._sorted_keys, query, side="left")
+                hi = np.searchsorted(self._sorted_keys, query, side="right")
+                found.extend(self._sorted_ids[start:end] for start, end in zip(lo, hi) if end > start)
+            if self._recent:
+                recent = [i for key in query.tolist() for i in self._recent.get(key, ())]
+                if recent:
+                    found.append(np.array(recent, dtype=np.uint32))
+            if not found:
+                return None
+            candidates, hits = np.unique(np.concatenate(found), return_counts=True)
+            if len(candidates) > _MAX_CANDIDATES:
+                # A near-duplicate shares most of its bands; chance collisions rarely share more than one.
+                candidates = candidates[np.argpartition(hits, -_MAX_CANDIDATES)[-_MAX_CANDIDATES:]]
+            stored = self._sigs[candidates]
+            resume = (stored[:, :self.num_perm] == signature[:self.num_perm]).mean(axis=1)
+            jd = (stored[:, self.num_perm:] == signature[self.num_perm:]).mean(axis=1)
+            score = np.minimum(resume, jd)
+            best = int(score.argmax())
+            if score[best] < floor:
+                return None
+            key = self._keys[candidates[best]].decode("ascii")
+        return Match(key, float(resume[best]), float(jd[best]))
+
+    def entry(self, key):
+        """{"resume_text", "job_description", "result"} stored for `key`, or None once it has expired."""
+        if not self.directory:
+            with self._lock:
+                expires, entry = self._entries.get(key, (0, None))
+            return entry if expires > time.time() else None
+        path = self._entry_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= time.time():
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {"entries": self._count, "bands": self.bands, "rows": self.rows}
+
+    # --- writes -------------------------------------------------------------------------------------
+
+    def add(self, key, signature, resume_text=None, job_description=None, result=None):
+        """Indexes the analysis stored under `key`; with its inputs and result, keeps them for matches to use."""
+        record = np.zeros(1, dtype=self._record)
+        record["key"] = key.encode("ascii")
+        record["sig"] = signature
+        entry = None
+        if resume_text is not None and job_description is not None and result is not None:
+            entry = {"resume_text": resume_text, "job_description": job_description, "result": result}
+        if not self.path:
+            with self._lock:
+                self._append(record)
+                if entry is not None:
+                    self._entries[key] = (time.time() + self.ttl, entry)
+                    while len(self._entries) > min(self.max_entries, _MEMORY_ENTRIES):
+                        self._entries.pop(next(iter(self._entries)))
+                if self._count > self.max_entries:
+                    keep = self.max_entries * 3 // 4
+                    records = np.zeros(keep, dtype=self._record)
+                    records["key"] = self._keys[self._count - keep:self._count]
+                    records["sig"] = self._sigs[self._count - keep:self._count]
+                    self._reset()
+                    self._append(records)
+            return
+        try:
+            if entry is not None:
+                self._write_json(self._entry_path(key), entry)
+            with self._file_lock(shared=True):
+                with open(self.path, "ab") as f:
+                    f.write(record.tobytes())
+                size = os.path.getsize(self.path)
+            if size > self.max_entries * self._record.itemsize:
+                self._compact()
+        except OSError as e:
+            logger.warning("[NEAR DUPLICATES] Index write failed: %s", e)
+        with self._lock:
+            sweep = self._swept + min(self.ttl, _SWEEP_INTERVAL) <= time.time()
+            if sweep:
+                self._swept = time.time()
+        if sweep:
+            self.sweep()
+
+    def sweep(self):
+        """Deletes entry files older than ttl, resume text and result included."""
+        if not self.directory:
+            return
+        now = time.time()
+        removed = 0
+        for root, _, files in os.walk(os.path.join(self.directory, "entries")):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) + self.ttl <= now:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    continue
+        if removed:
+            logger.info("[NEAR DUPLICATES] Swept %d expired entries", removed)
+
+    def _reset(self):
+        self._sigs = np.zeros((1024, 2 * self.num_perm), dtype=np.uint32)
+        self._keys = np.zeros(1024, dtype="S64")
+        self._count = 0
+        self._sorted_keys = np.zeros(0, dtype=np.uint64)
+        self._sorted_ids = np.zeros(0, dtype=np.uint32)
+        self._merged = 0
+        self._recent = {}
+        self._inode = None
+        self._offset = 0
+
+    def _append(self, records):
+        """Adds records to the in-memory index; the caller holds the lock."""
+        count = self._count + len(records)
+        if count > len(self._sigs):
+            capacity = max(count, 2 * len(self._sigs))
+            self._sigs = np.resize(self._sigs, (capacity, 2 * self.num_perm))
+            self._keys = np.resize(self._keys, capacity)
+        self._sigs[self._count:count] = records["sig"]
+        self._keys[self._count:count] = records["key"]
+        band_keys = self._band_keys(records["sig"])
+        self._count = count
+        if len(records) > 256 or count - self._merged > 1024:
+            self._merge()
+            return
+        for offset, keys in enumerate(band_keys.tolist()):
+            for key in keys:
+                self._recent.setdefault(key, []).append(count - len(records) + offset)
+
+    def _merge(self):
+        """Folds the recent entries into the sorted band table, which binary searches cover."""
+        new_keys = self._band_keys(self._sigs[self._merged:self._count]).ravel()
+        new_ids = np.repeat(np.arange(self._merged, self._count, dtype=np.uint32), self.bands)
+        order = np.argsort(new_keys, kind="stable")
+        new_keys, new_ids = new_keys[order], new_ids[order]
+        # A linear merge of two sorted runs, so folding in a batch never re-sorts the whole table.
+        at = np.searchsorted(self._sorted_keys, new_keys, side="right")
+        self._sorted_keys = np.insert(self._sorted_keys, at, new_keys)
+        self._sorted_ids = np.insert(self._sorted_ids, at, new_ids)
+        self._merged = self._count
+        self._recent = {}
+
+    # --- the shared file ----------------------------------------------------------------------------
+
+    def _refresh(self):
+        """Loads signatures other workers appended since the last lookup; reloads after a compaction."""
+        if not self.path:
+            return
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        with self._lock:
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._reset()
+                self._inode = st.st_ino
+            usable = st.st_size - (st.st_size - self._offset) % self._record.itemsize
+            if usable <= self._offset:
+                return
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read(usable - self._offset)
+            except OSError as e:
+                logger.warning("[NEAR DUPLICATES] Index read failed: %s", e)
+                return
+            data = data[:len(data) - len(data) % self._record.itemsize]
+            self._append(np.frombuffer(data, dtype=self._record))
+            self._offset += len(data)
+
+    def _compact(self):
+        with self._file_lock(shared=False):
+            size = os.path.getsize(self.path)
+            if size <= self.max_entries * self._record.itemsize:
+                return
+            records = np.fromfile(self.path, dtype=self._record, count=size // self._record.itemsize)
+            keep = self.max_entries * 3 // 4
+            kept = set(records["key"][-keep:].tolist())
+            for key in set(records["key"][:-keep].tolist()) - kept:
+                try:
+                    os.remove(self._entry_path(key.decode("ascii")))
+                except OSError:
+                    pass
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(records[-keep:].tobytes())
+            os.replace(tmp_path, self.path)
+        logger.info("[NEAR DUPLICATES] Compacted the index from %d to %d entries", len(records), keep)
+
+    def _file_lock(self, shared):
+        return _FileLock(self._lock_path, shared)
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, "entries", key[:2], f"{key}.json")
+
+    @staticmethod
+    def _write_json(path, value):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so a concurrent reader never sees a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+
+class _FileLock:
+    """flock on the index's lock file: shared while appending, exclusive while compacting.
+
+    An append therefore never lands in a file that a compaction is about to replace."""
+
+    def __init__(self, path, shared):
+        self.path = path
+        self.shared = shared
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
@@ -0,0 +1,113 @@
+import re
+
+_HYPHEN_BREAK = re.compile(r"(\w)-\n\s*([a-z])")
+_INLINE_SPACE = re.compile(r"[ \t\u00a0\u200b\f\v]+")
+_DIGITS = re.compile(r"\d+")
+_BULLETS = re.compile(r"^[\u2022\u25cf\u25aa\u25e6\u2023\u2043\u2219]\s*")
+
+TRUNCATION_MARKER = "[... truncated to fit the token budget ...]"
+
+
+def estimate_tokens(text):
+    """Cheap local token estimate (about four characters per token for English prose)."""
+    return len(text) // 4 + 1
+
+
+class CompactionResult:
+    """Compacted text plus what the compaction removed."""
+
+    def __init__(self, text, original_tokens, repeated_lines=0, truncated=False):
+        self.text = text
+        self.original_tokens = original_tokens
+        self.tokens = estimate_tokens(text)
+        self.repeated_lines = repeated_lines
+        self.truncated = truncated
+
+    def stats(self):
+        return {
+            "original_tokens": self.original_tokens,
+            "tokens": self.tokens,
+            "repeated_lines": self.repeated_lines,
+            "truncated": self.truncated,
+        }
+
+
+def _clean_page(text):
+    text = _HYPHEN_BREAK.sub(r"\1\2", text.replace("\r\n", "\n").replace("\r", "\n"))
+    lines = []
+    for line in text.split("\n"):
+        line = _BULLETS.sub("- ", _INLINE_SPACE.sub(" ", line).strip())
+        # Keep at most one blank line between blocks.
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def _signature(line):
+    # "Page 2 of 5" and "Page 3 of 5" are the same footer.
+    return _DIGITS.sub("#", line.lower())
+
+
+def _edges(lines, depth=2):
+    """(top, bottom) indices of the first and last few non-blank lines, where running headers and footers sit."""
+    filled = [i for i, line in enumerate(lines) if line]
+    if len(filled) <= 2 * depth:
+        return [], []  # Too short to tell a running header from content.
+    return filled[:depth], filled[-depth:]
+
+
+def _repeated_signatures(pages):
+    """Short header and footer lines that recur in the same place on at least half the pages (and at least two).
+
+    Returns a (top, bottom) pair of signature sets."""
+    if len(pages) < 2:
+        return set(), set()
+    counts = ({}, {})
+    for lines in pages:
+        for seen, indices in zip(counts, _edges(lines)):
+            for signature in {_signature(lines[i]) for i in indices if len(lines[i]) <= 100}:
+                seen[signature] = seen.get(signature, 0) + 1
+    needed = max(2, -(-len(pages) // 2))
+    return tuple({sig for sig, count in seen.items() if count >= needed} for seen in counts)
+
+
+def _truncate(text, max_tokens):
+    budget = max(0, (max_tokens - 1) * 4 - len(TRUNCATION_MARKER) - 1)
+    cut = text.rfind("\n", 0, budget)
+    return text[:cut if cut > budget // 2 else budget].rstrip() + "\n" + TRUNCATION_MARKER
+
+
+def compact_pages(pages, max_tokens=None):
+    """Normalizes extracted PDF text for prompting.
+
+    Joins words hyphenated across line breaks, collapses whitespace, drops
+    headers/footers repeated across pages and, when `max_tokens` is set, cuts
+    the text at a line boundary so its estimated size fits the budget."""
+    original_tokens = estimate_tokens("".join(pages))
+    cleaned = [_clean_page(page) for page in pages]
+    repeated_top, repeated_bottom = _repeated_signatures(cleaned)
+    dropped = 0
+    blocks = []
+    for lines in cleaned:
+        top, bottom = _edges(lines)
+        drop = {i for i in top if _signature(lines[i]) in repeated_top}
+        drop |= {i for i in bottom if _signature(lines[i]) in repeated_bottom}
+        dropped += len(drop)
+        kept = [line for i, line in enumerate(lines) if i not in drop]
+        block = "\n".join(kept).strip()
+        if block:
+            blocks.append(block)
+    text = "\n\n".join(blocks)
+
+    truncated = False
+    if max_tokens and estimate_tokens(text) > max_tokens:
+        text = _truncate(text, max_tokens)
+        truncated = True
+    return CompactionResult(text, original_tokens, repeated_lines=dropped, truncated=truncated)
+
+
+def compact_text(text, max_tokens=None):
+    """compact_pages() for text that is already a single block (pasted text, job descriptions)."""
+    return compact_pages([text or ""], max_tokens=max_tokens)
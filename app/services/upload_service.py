@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadStore:
+    """Uploaded PDFs stored by the SHA-256 of their content, each with an extracted-text sidecar.
+
+    Files live at <directory>/<key[:2]>/<key>.pdf and <key>.txt, so two users
+    uploading 'resume.pdf' never collide and the same file is stored once.
+    A retry reads the sidecar instead of extracting the PDF again. Entries
+    unused for `ttl` seconds are dropped, then the oldest ones until the store
+    is under max_bytes; only sharded entries are ever touched."""
+
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024, ttl=7 * 24 * 60 * 60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(data):
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def valid_key(key):
+        return bool(key) and bool(_KEY.match(key))
+
+    def _path(self, key, ext):
+        return os.path.join(self.directory, key[:2], f"{key}.{ext}")
+
+    def path(self, key):
+        """Path of the stored PDF, or None when the key is malformed, unknown or expired."""
+        if not self.valid_key(key):
+            return None
+        path = self._path(key, "pdf")
+        return path if self._fresh(path) else None
+
+    def get_text(self, key):
+        """The extracted-text sidecar, or None when there is none."""
+        if not self.valid_key(key):
+            return None
+        path = self._path(key, "txt")
+        if not self._fresh(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, data=None, text=None):
+        """Stores the PDF bytes and/or its text under `key`; existing files only have their age reset."""
+        if not self.valid_key(key):
+            raise ValueError(f"Invalid upload key: {key!r}")
+        written = False
+        for ext, payload in (("pdf", data), ("txt", text.encode("utf-8") if text is not None else None)):
+            path = self._path(key, ext)
+            if os.path.exists(path):
+                self._touch(path)
+            elif payload is not None:
+                try:
+                    self._write(path, payload)
+                    written = True
+                except OSError as e:
+                    logger.warning("[UPLOADS] Disk write failed: %s", e)
+        if written:
+            with self._lock:
+                self._writes_since_sweep += 1
+                sweep = self._writes_since_sweep >= 32
+                if sweep:
+                    self._writes_since_sweep = 0
+            if sweep:
+                self.sweep()
+        return key
+
+    def put_text(self, key, text):
+        return self.put(key, text=text)
+
+    def sweep(self):
+        """Drops entries unused for ttl seconds, then the least recently used until under max_bytes."""
+        now = time.time()
+        entries = {}
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if len(shard) != 2 or not os.path.isdir(shard_dir):
+                continue
+            for name in os.listdir(shard_dir):
+                key, _, ext = name.partition(".")
+                if ext not in ("pdf", "txt") or not self.valid_key(key):
+                    continue
+                path = os.path.join(shard_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                used, size, paths = entries.get(key, (0, 0, []))
+                entries[key] = (max(used, st.st_mtime), size + st.st_size, paths + [path])
+
+        total = 0
+        live = []
+        for key, (used, size, paths) in entries.items():
+            if used + self.ttl <= now:
+                self._remove(paths)
+            else:
+                live.append((used, size, paths))
+                total += size
+
+        live.sort()
+        for _, size, paths in live:
+            if total <= self.max_bytes:
+                break
+            self._remove(paths)
+            total -= size
+
+    def _fresh(self, path):
+        try:
+            return os.path.getmtime(path) + self.ttl > time.time()
+        except OSError:
+            return False
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _write(path, payload):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename so a concurrent reader never sees a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
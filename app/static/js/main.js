@@ -94,15 +94,127 @@ function showLoader() {
     messageInterval = setInterval(cycleLoadingMessages, 2000);
 }
 
+// === BACKGROUND JOBS ===
+// In 'async' submit mode the form is handed to /api/jobs and the page polls
+// until the analysis is stored, then opens the rendered result.
+const JOB_POLL_INTERVAL = 1500;
+
+function pollJob(jobId) {
+    fetch(`/api/jobs/${jobId}`)
+        .then(res => res.json())
+        .then(job => {
+            if (job.status === 'pending' || job.status === 'running') {
+                setTimeout(() => pollJob(jobId), JOB_POLL_INTERVAL);
+            } else {
+                window.location.href = job.result_url || `/jobs/${jobId}`;
+            }
+        })
+        .catch(() => setTimeout(() => pollJob(jobId), JOB_POLL_INTERVAL * 2));
+}
+
+// === STREAMED ANALYSIS ===
+// In 'stream' submit mode sections arrive over Server-Sent Events as soon as the
+// model finishes them; headline numbers are previewed on the loader and the full
+// report opens once the stored result is complete.
+const STREAM_SECTION_LABELS = {
+    candidate_info: data => `👤 ${data.name || 'Candidate'} — ${data.title || ''}`,
+    ats_analysis: data => `📊 ATS Score: ${data.overall_score}/100`,
+    recruiter_review: data => `👔 Recruiter Verdict: ${data.decision}`,
+    market_intel: data => `💰 Market Demand: ${data.market_demand}`,
+};
+
+function previewSection(name, data) {
+    const preview = document.getElementById('streamPreview');
+    if (!preview) return;
+    const label = STREAM_SECTION_LABELS[name]
+        ? STREAM_SECTION_LABELS[name](data)
+        : `✅ ${name.replace(/_/g, ' ')} ready`;
+    const pill = document.createElement('span');
+    pill.className = 'badge rounded-pill border border-glass px-3 py-2';
+    pill.textContent = label;
+    preview.appendChild(pill);
+
+    const msgElement = document.getElementById('loadingMessage');
+    if (name === 'ats_analysis' && msgElement) {
+        if (messageInterval) clearInterval(messageInterval);
+        msgElement.textContent = `ATS score ${data.overall_score}/100 — finishing the deep dives...`;
+    }
+}
+
+function handleStreamEvent(event, data, state) {
+    if (event === 'job') state.resultUrl = data.result_url;
+    if (event === 'section') previewSection(data.name, data.data);
+    if (event === 'done' || event === 'error') window.location.href = data.result_url || state.resultUrl;
+}
+
+function submitAsStream(targetForm) {
+    const state = { resultUrl: null };
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    return fetch('/api/analyze/stream', { method: 'POST', body: new FormData(targetForm) })
+        .then(res => {
+            if (!res.ok || !res.body) throw new Error('Streaming unavailable');
+            const reader = res.body.getReader();
+            const pump = () => reader.read().then(({ done, value }) => {
+                if (done) {
+                    if (state.resultUrl) window.location.href = state.resultUrl;
+                    return;
+                }
+                buffer += decoder.decode(value, { stream: true });
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    let event = 'message';
+                    let data = '';
+                    frame.split('\n').forEach(line => {
+                        if (line.startsWith('event: ')) event = line.slice(7);
+                        if (line.startsWith('data: ')) data += line.slice(6);
+                    });
+                    if (data) handleStreamEvent(event, JSON.parse(data), state);
+                }
+                return pump();
+            });
+            return pump();
+        })
+        .catch(() => {
+            // A job already exists once the stream opened; otherwise fall back to the classic POST
+            if (state.resultUrl) window.location.href = state.resultUrl;
+            else targetForm.submit();
+        });
+}
+
+function submitAsJob(targetForm, event) {
+    if (!window.fetch) return;
+    if (targetForm.dataset.submitMode === 'stream' && window.TextDecoder) {
+        event.preventDefault();
+        submitAsStream(targetForm);
+        return;
+    }
+    if (targetForm.dataset.submitMode !== 'async') return;
+    event.preventDefault();
+    fetch('/api/jobs', { method: 'POST', body: new FormData(targetForm) })
+        .then(res => res.json().then(body => ({ ok: res.ok, body })))
+        .then(({ ok, body }) => {
+            if (!ok || !body.job_id) throw new Error(body.error || 'Job submission failed');
+            history.replaceState(null, '', body.result_url);
+            pollJob(body.job_id);
+        })
+        // Fall back to the classic synchronous POST
+        .catch(() => targetForm.submit());
+}
+
 if (form) {
-    form.addEventListener('submit', () => {
+    form.addEventListener('submit', (event) => {
         showLoader();
+        submitAsJob(form, event);
     });
 }
 
 const apiForm = document.getElementById('apiKeyForm');
 if (apiForm) {
-    apiForm.addEventListener('submit', () => {
+    apiForm.addEventListener('submit', (event) => {
         // Hide modal
         const modalEl = document.getElementById('apiKeyModal');
         const modal = bootstrap.Modal.getInstance(modalEl);
@@ -111,9 +223,15 @@ if (apiForm) {
         }
         // Show loader
         showLoader();
+        submitAsJob(apiForm, event);
     });
 }
 
+if (window.PENDING_JOB_ID) {
+    showLoader();
+    pollJob(window.PENDING_JOB_ID);
+}
+
 // === HISTORY MANAGEMENT ===
 const HISTORY_KEY = 'resumeAnalyzerHistory';
 const MAX_HISTORY = 10;
@@ -194,6 +312,27 @@ function loadHistoryItem(id) {
     }
 }
 
+// === LAZY SCRIPT LOADING ===
+// Heavy libraries that only some clicks need are fetched on first use, not on every page view.
+const lazyScripts = {};
+
+function loadScript(name) {
+    if (!lazyScripts[name]) {
+        lazyScripts[name] = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = (window.LAZY_SCRIPTS || {})[name];
+            script.async = true;
+            script.onload = resolve;
+            script.onerror = () => {
+                delete lazyScripts[name];
+                reject(new Error(`Failed to load ${name}`));
+            };
+            document.head.appendChild(script);
+        });
+    }
+    return lazyScripts[name];
+}
+
 // === SHARE CARD GENERATION ===
 function generateShareCard() {
     const card = document.getElementById('shareCard');
@@ -214,7 +353,7 @@ function generateShareCard() {
     card.style.zIndex = '9999';
     document.body.appendChild(card);
 
-    html2canvas(card, { backgroundColor: '#050510', scale: 2 }).then(canvas => {
+    loadScript('html2canvas').then(() => html2canvas(card, { backgroundColor: '#050510', scale: 2 })).then(canvas => {
         card.style.position = 'fixed';
         card.style.left = '-9999px';
 
@@ -261,6 +400,10 @@ function downloadCoverLetter() {
 
 // Confetti Celebration Function
 function launchConfetti() {
+    loadScript('confetti').then(runConfetti).catch(err => console.warn('Confetti unavailable:', err));
+}
+
+function runConfetti() {
     const duration = 3000;
     const end = Date.now() + duration;
 
@@ -393,9 +536,12 @@ if (resultData && resultData.ats_analysis) {
     }, 500);
 }
 
-// High-Fidelity Download Report Function
+// Download Report: a server-rendered PDF for stored results, browser print otherwise
 function downloadReport(btn) {
-    // Simple Browser Print - Most Robust
+    if (window.REPORT_URL) {
+        window.location.href = window.REPORT_URL;
+        return;
+    }
     window.print();
 }
 
@@ -0,0 +1,13 @@
+"""uvicorn entry point that serves the real app over ASGI against the fake Gemini backend.
+
+    BENCH_LATENCY=1.0 uvicorn --workers 1 benchmarks.asgi:app
+"""
+from benchmarks import fake_genai
+
+fake_genai.install()
+
+from app import create_app  # noqa: E402  (the fake must be installed first)
+from app.asgi import AsgiApp  # noqa: E402
+
+flask_app = create_app()
+app = AsgiApp(flask_app, threads=flask_app.config["ASGI_THREADS"])
@@ -0,0 +1,77 @@
+"""Synthetic resume PDFs for the benchmarks, built with PyMuPDF."""
+import os
+import random
+
+import fitz  # PyMuPDF
+
+_ROLES = ["Software Engineer", "Senior Backend Engineer", "Data Engineer", "Platform Engineer", "ML Engineer"]
+_COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries"]
+_SKILLS = (
+    "Python Go Java SQL PostgreSQL Redis Kafka Spark Airflow Docker Kubernetes Terraform AWS GCP "
+    "React TypeScript gRPC GraphQL Prometheus Grafana CI/CD Linux"
+).split()
+_VERBS = ["Led", "Built", "Designed", "Migrated", "Scaled", "Automated", "Reduced", "Improved", "Shipped"]
+_OBJECTS = [
+    "the payments pipeline", "a multi-region event bus", "the search ranking service", "batch ETL jobs",
+    "the customer onboarding flow", "observability for 40 services", "the model serving stack",
+]
+
+JOB_DESCRIPTION = """Senior Backend Engineer
+
+We are looking for a Senior Backend Engineer with 5+ years of experience building distributed systems.
+Required: Python or Go, PostgreSQL, Kafka, Docker, Kubernetes, AWS. Experience operating services in production,
+designing APIs (REST, gRPC) and owning reliability (SLOs, incident response, observability with Prometheus/Grafana).
+Preferred: Terraform, Spark or Airflow, mentoring engineers, leading cross-team technical projects.
+"""
+
+
+def _bullet(rng):
+    return (
+        f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {rng.choice(_SKILLS)} and {rng.choice(_SKILLS)}, "
+        f"cutting latency by {rng.randint(10, 80)}% for {rng.randint(2, 900)}k users."
+    )
+
+
+def resume_lines(rng, pages):
+    """Plain-text lines for a resume long enough to fill about `pages` pages."""
+    name = f"Candidate {rng.randint(1000, 9999)}"
+    lines = [name, rng.choice(_ROLES), f"Skills: {', '.join(rng.sample(_SKILLS, 8))}", ""]
+    # About 45 lines fit on a page at the font size used below.
+    while len(lines) < pages * 45:
+        lines.append(f"{rng.choice(_ROLES)} - {rng.choice(_COMPANIES)} ({rng.randint(2010, 2020)}-{rng.randint(2021, 2025)})")
+        lines.extend(_bullet(rng) for _ in range(rng.randint(3, 6)))
+        lines.append("")
+    return name, lines
+
+
+def build_pdf(rng, pages):
+    """Returns PDF bytes with `pages` pages, including a running header and page-number footer."""
+    name, lines = resume_lines(rng, pages)
+    doc = fitz.open()
+    per_page = max(1, -(-len(lines) // pages))
+    for number in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 30), f"{name} - Resume", fontsize=8)
+        chunk = lines[number * per_page:(number + 1) * per_page]
+        page.insert_text((50, 60), "\n".join(chunk), fontsize=9)
+        page.insert_text((270, 820), f"Page {number + 1} of {pages}", fontsize=8)
+    data = doc.tobytes(deflate=True)
+    doc.close()
+    return data
+
+
+def generate_corpus(directory, count=30, min_pages=1, max_pages=30, seed=7):
+    """Writes `count` PDFs with page counts spread evenly over [min_pages, max_pages].
+
+    Returns a list of (path, pages). Existing files with the same name are reused."""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    corpus = []
+    for index in range(count):
+        pages = min_pages + (index * (max_pages - min_pages + 1) // count if count else 0)
+        path = os.path.join(directory, f"resume-{index:03d}-{pages:02d}p.pdf")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(build_pdf(rng, pages))
+        corpus.append((path, pages))
+    return corpus
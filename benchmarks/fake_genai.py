@@ -0,0 +1,148 @@
+"""Local stand-in for google.genai.Client used by the benchmarks.
+
+Responses are schema-valid JSON built from whatever response_schema the
+request carries, so full reports, section groups and JD profiles all work.
+Latency, jitter and failure rates are configurable through keyword arguments
+or BENCH_* environment variables (the latter reach gunicorn workers)."""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+from google import genai
+
+_WORDS = (
+    "led designed built migrated scaled reduced improved automated shipped owned mentored python kubernetes "
+    "latency throughput pipeline service customers revenue platform reliability observability stakeholders "
+    "roadmap architecture distributed data model deployment incident cost quarter team product growth"
+).split()
+
+
+class FakeUsage:
+    def __init__(self, prompt_tokens, response_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = response_tokens
+        self.total_token_count = prompt_tokens + response_tokens
+
+
+class FakeResponse:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class FakeSettings:
+    """Knobs for the fake backend; defaults come from the environment."""
+
+    def __init__(self, latency=None, jitter=None, error_rate=None, malformed_rate=None, words=None, seed=None):
+        env = os.environ
+        self.latency = float(latency if latency is not None else env.get("BENCH_LATENCY", 1.0))
+        self.jitter = float(jitter if jitter is not None else env.get("BENCH_JITTER", 0.25))
+        self.error_rate = float(error_rate if error_rate is not None else env.get("BENCH_ERROR_RATE", 0.0))
+        self.malformed_rate = float(malformed_rate if malformed_rate is not None else env.get("BENCH_MALFORMED_RATE", 0.0))
+        # Words per free-text field; long fields are what make real responses slow to generate.
+        self.words = int(words if words is not None else env.get("BENCH_WORDS", 40))
+        seed = seed if seed is not None else env.get("BENCH_SEED")
+        self.random = random.Random(int(seed) if seed not in (None, "") else None)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        """Returns (delay_seconds, outcome) where outcome is 'ok', 'quota' or 'malformed'."""
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            roll = self.random.random()
+        if roll < self.error_rate:
+            return delay * 0.1, "quota"
+        if roll < self.error_rate + self.malformed_rate:
+            return delay, "malformed"
+        return delay, "ok"
+
+
+def sample(schema, words=40, rng=random):
+    """A value that satisfies `schema` (the subset of JSON Schema the app's schemas use)."""
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: sample(prop, words, rng) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [sample(schema["items"], words, rng) for _ in range(3)]
+    if kind == "integer":
+        return rng.randint(0, 100)
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _schema_of(config):
+    if isinstance(config, dict):
+        return config.get("response_schema") or {"type": "object", "properties": {}}
+    return getattr(config, "response_schema", None) or {"type": "object", "properties": {}}
+
+
+class _Models:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def _respond(self, contents, config):
+        delay, outcome = self.settings.draw()
+        time.sleep(delay)
+        return self._build(contents, config, outcome)
+
+    def _build(self, contents, config, outcome):
+        if outcome == "quota":
+            raise RuntimeError("429 RESOURCE_EXHAUSTED. Quota exceeded (fake backend). {'retryDelay': '1s'}")
+        text = json.dumps(sample(_schema_of(config), self.settings.words))
+        if outcome == "malformed":
+            text = text[: len(text) // 2]
+        return text, FakeUsage(len(str(contents)) // 4, len(text) // 4)
+
+    def generate_content(self, model, contents, config=None):
+        text, usage = self._respond(contents, config)
+        return FakeResponse(text, usage)
+
+    def generate_content_stream(self, model, contents, config=None):
+        text, usage = self._respond(contents, config)
+        step = 256
+        for start in range(0, len(text), step):
+            last = start + step >= len(text)
+            yield FakeResponse(text[start:start + step], usage if last else None)
+
+    def list(self):
+        return []
+
+
+class _AsyncModels(_Models):
+    """client.aio.models: the same responses, awaited instead of slept."""
+
+    async def generate_content(self, model, contents, config=None):
+        delay, outcome = self.settings.draw()
+        await asyncio.sleep(delay)
+        return FakeResponse(*self._build(contents, config, outcome))
+
+
+class _Aio:
+    def __init__(self, settings):
+        self.models = _AsyncModels(settings)
+
+
+class FakeClient:
+    """Drop-in for genai.Client(api_key=...), including the async client at .aio."""
+
+    settings = None
+
+    def __init__(self, api_key=None, **kwargs):
+        if FakeClient.settings is None:
+            FakeClient.settings = FakeSettings()
+        self.models = _Models(FakeClient.settings)
+        self.aio = _Aio(FakeClient.settings)
+
+    def close(self):
+        pass
+
+
+def install(**settings):
+    """Replaces genai.Client process-wide; call before the app creates any clients."""
+    FakeClient.settings = FakeSettings(**settings)
+    genai.Client = FakeClient
+    return FakeClient.settings
@@ -0,0 +1,561 @@
+"""Offline benchmarks: PDF extraction, near-duplicate lookups and end-to-end latency under gunicorn or uvicorn.
+
+Nothing here calls the real Gemini API; the app runs against benchmarks.fake_genai.
+
+    python -m benchmarks.run extraction --out extraction.json
+    python -m benchmarks.run serve --workers 1,2,4 --concurrency 1,4,16 --out serve.json
+    python -m benchmarks.run serve --server uvicorn --workers 1 --concurrency 1,4,16 --out serve-asgi.json
+    python -m benchmarks.run similarity --entries 100000 --out similarity.json
+    python -m benchmarks.run compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.corpus import JOB_DESCRIPTION, generate_corpus, resume_lines
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+    return {
+        "min": round(ordered[0], 4),
+        "p50": pick(0.50),
+        "p90": pick(0.90),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 4),
+        "mean": round(statistics.fmean(ordered), 4),
+    }
+
+
+def _environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": time.time(),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# --- Extraction -----------------------------------------------------------------------------------
+
+def bench_extraction(corpus, parallel_min_pages, workers, repeat, layout=False):
+    from app.services.pdf_service import PDFService
+    from app.services.text_compaction import compact_pages
+
+    documents = []
+    for path, pages in corpus:
+        with open(path, "rb") as f:
+            documents.append((os.path.basename(path), pages, f.read()))
+
+    # Warm the process pool so its startup isn't billed to the first large document.
+    PDFService.extract(documents[-1][2], parallel_min_pages=parallel_min_pages, workers=workers)
+
+    per_document = []
+    total_pages = sum(pages for _, pages, _ in documents) * repeat
+    total_bytes = sum(len(data) for _, _, data in documents) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for name, pages, data in documents:
+            t0 = time.perf_counter()
+            result = PDFService.extract(data, parallel_min_pages=parallel_min_pages, workers=workers, layout=layout)
+            t1 = time.perf_counter()
+            compacted = compact_pages(result.pages)
+            sections = len(result.structured) if layout else None
+            t2 = time.perf_counter()
+            per_document.append({
+                "file": name,
+                "pages": pages,
+                "parallel": result.parallel,
+                "extract_s": round(t1 - t0, 5),
+                "compact_s": round(t2 - t1, 5),
+                "tokens": result.structured.tokens if layout else compacted.tokens,
+                "original_tokens": compacted.original_tokens,
+                "sections": sections,
+            })
+    elapsed = time.perf_counter() - started
+    return {
+        "parallel_min_pages": parallel_min_pages,
+        "workers": workers,
+        "layout": layout,
+        "documents": len(per_document),
+        "elapsed_s": round(elapsed, 4),
+        "pages_per_s": round(total_pages / elapsed, 2),
+        "documents_per_s": round(len(per_document) / elapsed, 2),
+        "mb_per_s": round(total_bytes / elapsed / 1e6, 3),
+        "extract_latency_s": percentiles([d["extract_s"] for d in per_document]),
+        "per_document": per_document,
+    }
+
+
+def run_extraction(args):
+    corpus = generate_corpus(args.corpus, args.documents, args.min_pages, args.max_pages, args.seed)
+    workers = args.extract_workers or os.cpu_count() or 1
+    return {
+        "benchmark": "extraction",
+        "environment": _environment(),
+        "corpus": {"documents": len(corpus), "pages": sum(p for _, p in corpus)},
+        "runs": [
+            bench_extraction(corpus, 0, workers, args.repeat),
+            bench_extraction(corpus, args.parallel_min_pages, workers, args.repeat),
+            bench_extraction(corpus, args.parallel_min_pages, workers, args.repeat, layout=True),
+        ],
+    }
+
+
+# --- Near-duplicate lookups -----------------------------------------------------------------------
+
+def run_similarity(args):
+    import random
+
+    import numpy as np
+
+    from app.services.similarity_service import NearDuplicateIndex
+
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix="resume-bench-similarity-")
+    # Lookups at the warm-start floor operators typically enable, NEAR_DUPLICATE_WARM_THRESHOLD=0.7.
+    index = NearDuplicateIndex(directory, warm_threshold=0.7, max_entries=args.entries + args.queries)
+    # A few JDs shared by many resumes, as when one posting is screened against a stack of applicants.
+    jds = [JOB_DESCRIPTION + f"\nTeam {n}: " + " ".join(rng.sample(_words(JOB_DESCRIPTION), 20)) for n in range(args.jds)]
+    jd_sigs = [index.minhash(jd) for jd in jds]
+
+    signing = 0.0
+    kept = []
+    for n in range(args.entries):
+        _, lines = resume_lines(rng, 1)
+        resume = "\n".join(lines)
+        t0 = time.perf_counter()
+        signature = np.concatenate([index.minhash(resume), jd_sigs[n % args.jds]])
+        signing += time.perf_counter() - t0
+        index.add(f"{n:064x}", signature)
+        if n % max(1, args.entries // args.queries) == 0 and len(kept) < args.queries:
+            kept.append((resume, jds[n % args.jds]))
+
+    # The first lookup loads the whole file, as a freshly started worker would.
+    started = time.perf_counter()
+    index.find(signature)
+    loading = time.perf_counter() - started
+
+    def timed(queries):
+        samples, found = [], 0
+        for signature in queries:
+            t0 = time.perf_counter()
+            match = index.find(signature)
+            samples.append(time.perf_counter() - t0)
+            found += match is not None
+        return samples, found
+
+    # Near duplicates: one edited line in the resume, the JD reposted with different whitespace.
+    near = []
+    signature_samples = []
+    for resume, jd in kept:
+        lines = resume.splitlines()
+        lines[rng.randrange(len(lines))] = "- Mentored four engineers through their first on-call rotation."
+        t0 = time.perf_counter()
+        near.append(index.signature("\n".join(lines), "  " + jd.replace("\n", "\n\n")))
+        signature_samples.append(time.perf_counter() - t0)
+    fresh = [index.signature("\n".join(resume_lines(rng, 1)[1]), jds[0]) for _ in range(args.queries)]
+    hits, hit_count = timed(near)
+    misses, miss_count = timed(fresh)
+    return {
+        "benchmark": "similarity",
+        "environment": _environment(),
+        "entries": args.entries,
+        "jds": args.jds,
+        "bands": index.bands,
+        "rows": index.rows,
+        "resume_minhash_ms": round(signing / args.entries * 1000, 4),
+        "load_s": round(loading, 4),
+        "signature_latency_s": percentiles(signature_samples),
+        "near_duplicate": {"queries": len(near), "found": hit_count, "latency_s": percentiles(hits)},
+        "unrelated": {"queries": len(fresh), "found": miss_count, "latency_s": percentiles(misses)},
+    }
+
+
+def _words(text):
+    return sorted(set(text.split()))
+
+
+# --- Serving under gunicorn -----------------------------------------------------------------------
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    for name, (filename, data) in files.items():
+        head = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            "Content-Type: application/pdf\r\n\r\n"
+        ).encode("utf-8")
+        parts.append(head + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class GunicornServer:
+    """Runs benchmarks.wsgi:app under gunicorn in a scratch data directory."""
+
+    name = "gunicorn"
+
+    def __init__(self, workers, threads, env):
+        self.port = _free_port()
+        self.workers = workers
+        self.threads = threads
+        self.env = env
+        self.process = None
+
+    def command(self):
+        return [
+            sys.executable, "-m", "gunicorn", "benchmarks.wsgi:app",
+            "--bind", f"127.0.0.1:{self.port}",
+            "--workers", str(self.workers),
+            "--threads", str(self.threads),
+            "--timeout", "300",
+            "--log-level", "warning",
+        ]
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.command(), cwd=ROOT, env=self.env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"{self.name} exited during startup")
+            try:
+                urllib.request.urlopen(self.url("/health"), timeout=2).read()
+                return self
+            except (urllib.error.URLError, ConnectionError, OSError):
+                time.sleep(0.2)
+        raise RuntimeError(f"{self.name} did not become ready")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def rss_bytes(self):
+        """Resident memory of the server and all its workers (Linux only; None elsewhere)."""
+        return _tree_rss(self.process.pid)
+
+
+class UvicornServer(GunicornServer):
+    """Runs benchmarks.asgi:app under uvicorn; each worker's thread pool is sized by ASGI_THREADS, not `threads`."""
+
+    name = "uvicorn"
+
+    def command(self):
+        return [
+            sys.executable, "-m", "uvicorn", "benchmarks.asgi:app",
+            "--host", "127.0.0.1",
+            "--port", str(self.port),
+            "--workers", str(self.workers),
+            "--log-level", "warning",
+            "--no-access-log",
+        ]
+
+
+SERVERS = {"gunicorn": GunicornServer, "uvicorn": UvicornServer}
+
+
+def _tree_rss(pid):
+    total = 0
+    pending = [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/status", "r", encoding="ascii") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children", "r", encoding="ascii") as f:
+                    pending.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        return total or None
+    return total
+
+
+class MemorySampler:
+    """Peak resident memory of a server while a load level runs."""
+
+    def __init__(self, server, interval=0.1):
+        self.server = server
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self.server.rss_bytes()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _request(url, body, content_type, timeout):
+    started = time.perf_counter()
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return time.perf_counter() - started, status
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 1) if value is not None else None
+
+
+def bench_level(server, payloads, path, concurrency, requests_per_level, timeout):
+    jobs = [payloads[i % len(payloads)] for i in range(requests_per_level)]
+    idle_rss = server.rss_bytes()
+    started = time.perf_counter()
+    with MemorySampler(server) as memory, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(lambda p: _request(server.url(path), p[0], p[1], timeout), jobs))
+    elapsed = time.perf_counter() - started
+    latencies = [seconds for seconds, status in outcomes if 200 <= status < 300]
+    statuses = {}
+    for _, status in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "concurrency": concurrency,
+        "requests": len(outcomes),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(outcomes) / elapsed, 3),
+        "statuses": statuses,
+        "latency_s": percentiles(latencies),
+        "rss_mb": {"idle": _mb(idle_rss), "peak": _mb(memory.peak)},
+    }
+
+
+def run_serve(args):
+    corpus = generate_corpus(args.corpus, args.documents, args.min_pages, args.max_pages, args.seed)
+    payloads = []
+    for index, (path, _) in enumerate(corpus):
+        with open(path, "rb") as f:
+            data = f.read()
+        # Distinct job descriptions keep the analysis cache from answering repeated uploads.
+        fields = {"job_description": f"{JOB_DESCRIPTION}\nRequisition {index}"}
+        payloads.append(_multipart(fields, {"resume": (os.path.basename(path), data)}))
+
+    scratch = tempfile.mkdtemp(prefix="bench-")
+    env = dict(
+        os.environ,
+        PYTHONPATH=ROOT,
+        DATA_FOLDER=scratch,
+        UPLOAD_FOLDER=os.path.join(scratch, "uploads"),
+        GOOGLE_API_KEY="bench-key",
+        GEMINI_RPM_PER_KEY="1000000",
+        GEMINI_TPM_PER_KEY="1000000000",
+        SCHEDULER_MAX_WAITERS="100000",
+        ANALYSIS_CACHE_SIZE="0" if not args.cache else os.environ.get("ANALYSIS_CACHE_SIZE", "256"),
+        BENCH_LATENCY=str(args.latency),
+        BENCH_JITTER=str(args.jitter),
+        BENCH_ERROR_RATE=str(args.error_rate),
+        BENCH_MALFORMED_RATE=str(args.malformed_rate),
+        BENCH_SEED=str(args.seed),
+    )
+
+    if args.server == "uvicorn":
+        # Under ASGI one worker holds many analyses; don't let the default per-process cap of 4 be the bottleneck.
+        env.setdefault("ADMISSION_MAX_IN_FLIGHT", str(max(args.concurrency)))
+    server_class = SERVERS[args.server]
+
+    runs = []
+    for workers in args.workers:
+        with server_class(workers, args.threads, env) as server:
+            levels = []
+            for concurrency in args.concurrency:
+                level = bench_level(server, payloads, args.path, concurrency, args.requests, args.timeout)
+                print(
+                    f"{args.server} workers={workers} threads={args.threads} concurrency={concurrency}: "
+                    f"{level['throughput_rps']} req/s, p95 {level['latency_s'].get('p95')}s, "
+                    f"peak rss {level['rss_mb']['peak']} MB, statuses {level['statuses']}",
+                    file=sys.stderr,
+                )
+                levels.append(level)
+            try:
+                metrics = urllib.request.urlopen(server.url("/metrics"), timeout=10).read().decode("utf-8")
+            except (urllib.error.URLError, OSError):
+                metrics = None
+        runs.append({"workers": workers, "threads": args.threads, "levels": levels, "metrics": metrics})
+
+    return {
+        "benchmark": "serve",
+        "server": args.server,
+        "environment": _environment(),
+        "backend": {
+            "latency_s": args.latency,
+            "jitter_s": args.jitter,
+            "error_rate": args.error_rate,
+            "malformed_rate": args.malformed_rate,
+        },
+        "path": args.path,
+        "runs": runs,
+    }
+
+
+# --- Comparing saved runs -------------------------------------------------------------------------
+
+def _headline(report):
+    """Flattens a report into {metric_name: value} for comparison."""
+    out = {}
+    if report.get("benchmark") == "extraction":
+        for run in report["runs"]:
+            label = f"extraction[parallel_min_pages={run['parallel_min_pages']}{', layout' if run.get('layout') else ''}]"
+            out[f"{label}.pages_per_s"] = run["pages_per_s"]
+            out[f"{label}.extract_p95_s"] = run["extract_latency_s"].get("p95")
+    elif report.get("benchmark") == "serve":
+        for run in report["runs"]:
+            for level in run["levels"]:
+                label = f"serve[w={run['workers']},t={run['threads']},c={level['concurrency']}]"
+                out[f"{label}.throughput_rps"] = level["throughput_rps"]
+                out[f"{label}.p50_s"] = level["latency_s"].get("p50")
+                out[f"{label}.p95_s"] = level["latency_s"].get("p95")
+                if level.get("rss_mb", {}).get("peak") is not None:
+                    out[f"{label}.peak_rss_mb"] = level["rss_mb"]["peak"]
+    elif report.get("benchmark") == "similarity":
+        label = f"similarity[entries={report['entries']}]"
+        out[f"{label}.hit_p99_s"] = report["near_duplicate"]["latency_s"].get("p99")
+        out[f"{label}.miss_p99_s"] = report["unrelated"]["latency_s"].get("p99")
+        out[f"{label}.recall"] = round(report["near_duplicate"]["found"] / max(1, report["near_duplicate"]["queries"]), 4)
+    return out
+
+
+def run_compare(args):
+    with open(args.before, "r", encoding="utf-8") as f:
+        before = _headline(json.load(f))
+    with open(args.after, "r", encoding="utf-8") as f:
+        after = _headline(json.load(f))
+    rows = []
+    for name in sorted(set(before) | set(after)):
+        old, new = before.get(name), after.get(name)
+        change = round((new - old) / old * 100, 1) if old and new is not None else None
+        rows.append({"metric": name, "before": old, "after": new, "change_pct": change})
+    for row in rows:
+        change = "" if row["change_pct"] is None else f"{row['change_pct']:+.1f}%"
+        print(f"{row['metric']:<60} {row['before']!s:>10} -> {row['after']!s:<10} {change}")
+    return {"benchmark": "compare", "before": args.before, "after": args.after, "rows": rows}
+
+
+def _int_list(value):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def corpus_options(p):
+        p.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "resume-bench-corpus"))
+        p.add_argument("--documents", type=int, default=30)
+        p.add_argument("--min-pages", type=int, default=1)
+        p.add_argument("--max-pages", type=int, default=30)
+        p.add_argument("--seed", type=int, default=7)
+        p.add_argument("--out", help="Write the JSON report here (default: stdout).")
+
+    p = sub.add_parser("extraction", help="PDF extraction and compaction throughput.")
+    corpus_options(p)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--parallel-min-pages", type=int, default=16)
+    p.add_argument("--extract-workers", type=int, default=None)
+    p.set_defaults(run=run_extraction)
+
+    p = sub.add_parser("serve", help="End-to-end latency, memory and scaling of the app under gunicorn or uvicorn.")
+    corpus_options(p)
+    p.add_argument("--workers", type=_int_list, default=[1, 2, 4], help="Comma-separated gunicorn worker counts.")
+    p.add_argument("--server", choices=sorted(SERVERS), default="gunicorn",
+                   help="gunicorn serves benchmarks.wsgi:app; uvicorn serves the ASGI app in benchmarks.asgi.")
+    p.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker.")
+    p.add_argument("--concurrency", type=_int_list, default=[1, 4, 16], help="Comma-separated client concurrency levels.")
+    p.add_argument("--requests", type=int, default=48, help="Requests per concurrency level.")
+    p.add_argument("--path", default="/")
+    p.add_argument("--timeout", type=float, default=300)
+    p.add_argument("--latency", type=float, default=1.0, help="Mean fake generation latency in seconds.")
+    p.add_argument("--jitter", type=float, default=0.25)
+    p.add_argument("--error-rate", type=float, default=0.0, help="Share of calls that fail with a 429.")
+    p.add_argument("--malformed-rate", type=float, default=0.0, help="Share of calls that return truncated JSON.")
+    p.add_argument("--cache", action="store_true", help="Leave the analysis cache enabled.")
+    p.set_defaults(run=run_serve)
+
+    p = sub.add_parser("similarity", help="Near-duplicate lookup latency against a large index.")
+    p.add_argument("--entries", type=int, default=100000)
+    p.add_argument("--jds", type=int, default=50, help="Distinct JDs the stored analyses are spread over.")
+    p.add_argument("--queries", type=int, default=1000)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--out")
+    p.set_defaults(run=run_similarity)
+
+    p = sub.add_parser("compare", help="Compare the headline numbers of two saved reports.")
+    p.add_argument("before")
+    p.add_argument("after")
+    p.add_argument("--out")
+    p.set_defaults(run=run_compare)
+
+    args = parser.parse_args(argv)
+    report = args.run(args)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    elif args.command != "compare":
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
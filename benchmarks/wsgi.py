@@ -0,0 +1,11 @@
+"""gunicorn entry point that serves the real app against the fake Gemini backend.
+
+    BENCH_LATENCY=1.0 gunicorn --workers 4 benchmarks.wsgi:app
+"""
+from benchmarks import fake_genai
+
+fake_genai.install()
+
+from app import create_app  # noqa: E402  (the fake must be installed first)
+
+app = create_app()
@@ -5,9 +5,139 @@ load_dotenv()
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
-    UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'uploads')
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'uploads')
+    DATA_FOLDER = os.environ.get('DATA_FOLDER') or os.path.join(os.path.abspath(os.path.dirname(__file__)), 'data')
     GOOGLE_API_KEY = os.environ.get('GOOGLE_API_KEY')
+    # Optional comma-separated pool of keys; calls are spread across them by quota
+    GOOGLE_API_KEYS = [k.strip() for k in os.environ.get('GOOGLE_API_KEYS', '').split(',') if k.strip()]
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload size
+    # Kept uploads are stored by content hash with their extracted text; entries unused for UPLOAD_TTL seconds
+    # are dropped, then the least recently used ones once the store exceeds UPLOAD_MAX_BYTES
+    UPLOAD_TTL = int(os.environ.get('UPLOAD_TTL', 7 * 24 * 60 * 60))
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 1024 * 1024 * 1024))
+
+    # PDFs with at least this many pages are extracted across a process pool (0 disables)
+    PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 16))
+    PDF_WORKERS = int(os.environ.get('PDF_WORKERS', os.cpu_count() or 1))
+    # Read resumes from positioned text lines: multi-column layouts come out one column at a time and the text is
+    # split into typed sections (summary, experience, skills, ...); 0 falls back to PyMuPDF's plain text order
+    PDF_LAYOUT = os.environ.get('PDF_LAYOUT', '1') != '0'
+
+    # Gemini clients are pooled per API key so connections are reused across requests
+    GENAI_CLIENT_POOL_SIZE = int(os.environ.get('GENAI_CLIENT_POOL_SIZE', 32))
+    GENAI_CLIENT_IDLE_TTL = int(os.environ.get('GENAI_CLIENT_IDLE_TTL', 15 * 60))
+
+    # Batch screening: analyses in flight per batch, batches running at once per process, and the only
+    # server directory tree that POST /api/batches may read from (unset disables directory batches)
+    BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 4))
+    BATCH_MAX_RUNNING = int(os.environ.get('BATCH_MAX_RUNNING', 1))
+    BATCH_ROOT = os.environ.get('BATCH_ROOT')
+    # Upload limit for the zip sent to POST /api/batches (every other route keeps MAX_CONTENT_LENGTH), and the
+    # largest single PDF a batch will read; a bigger one, or a zip member that inflates past it, is recorded as failed
+    BATCH_MAX_CONTENT_LENGTH = int(os.environ.get('BATCH_MAX_CONTENT_LENGTH', 512 * 1024 * 1024))
+    BATCH_MAX_PDF_BYTES = int(os.environ.get('BATCH_MAX_PDF_BYTES', 20 * 1024 * 1024))
+    # Local pre-screen gate for batches: only candidates scoring at least PRESCREEN_THRESHOLD (0-100) and within
+    # the best PRESCREEN_TOP_K get a full LLM analysis. Both unset means every candidate is analyzed.
+    PRESCREEN_THRESHOLD = int(os.environ['PRESCREEN_THRESHOLD']) if os.environ.get('PRESCREEN_THRESHOLD') else None
+    PRESCREEN_TOP_K = int(os.environ['PRESCREEN_TOP_K']) if os.environ.get('PRESCREEN_TOP_K') else None
+
+    # Quota-aware scheduling across GOOGLE_API_KEYS (or GOOGLE_API_KEY) and candidate models, in preference order
+    GEMINI_MODELS = [m.strip() for m in os.environ.get('GEMINI_MODELS', 'gemini-2.5-flash,gemini-2.5-flash-lite').split(',') if m.strip()]
+    GEMINI_RPM_PER_KEY = int(os.environ.get('GEMINI_RPM_PER_KEY', 60))
+    GEMINI_TPM_PER_KEY = int(os.environ.get('GEMINI_TPM_PER_KEY', 1000000))
+    SCHEDULER_MAX_WAITERS = int(os.environ.get('SCHEDULER_MAX_WAITERS', 16))
+    SCHEDULER_MAX_WAIT = float(os.environ.get('SCHEDULER_MAX_WAIT', 30))
+
+    # Call policy for Gemini requests: every analysis gets GEMINI_DEADLINE seconds in total, each call at most
+    # GEMINI_CALL_TIMEOUT of it, and transient errors (timeouts, 5xx) are retried up to GEMINI_MAX_ATTEMPTS times
+    # with full-jitter exponential backoff. With GEMINI_HEDGE_PERCENTILE set (e.g. 95), a call still running after
+    # that percentile of recent latencies (at least GEMINI_HEDGE_MIN_DELAY) is duplicated to another key/model
+    # pair and the first answer wins; 0 disables hedging. At most GEMINI_HEDGE_WORKERS backups are in flight at
+    # once; past that a slow call is left to finish on its own rather than queue a backup behind the others
+    GEMINI_DEADLINE = float(os.environ.get('GEMINI_DEADLINE', 120))
+    GEMINI_CALL_TIMEOUT = float(os.environ.get('GEMINI_CALL_TIMEOUT', 90))
+    GEMINI_MAX_ATTEMPTS = int(os.environ.get('GEMINI_MAX_ATTEMPTS', 3))
+    GEMINI_BACKOFF_BASE = float(os.environ.get('GEMINI_BACKOFF_BASE', 0.5))
+    GEMINI_BACKOFF_MAX = float(os.environ.get('GEMINI_BACKOFF_MAX', 8))
+    GEMINI_HEDGE_PERCENTILE = float(os.environ.get('GEMINI_HEDGE_PERCENTILE', 0))
+    GEMINI_HEDGE_MIN_SAMPLES = int(os.environ.get('GEMINI_HEDGE_MIN_SAMPLES', 20))
+    GEMINI_HEDGE_MIN_DELAY = float(os.environ.get('GEMINI_HEDGE_MIN_DELAY', 1.0))
+    GEMINI_HEDGE_WORKERS = int(os.environ.get('GEMINI_HEDGE_WORKERS', 16))
+
+    # Seconds between background refreshes of the cached model catalog
+    MODEL_CATALOG_TTL = int(os.environ.get('MODEL_CATALOG_TTL', 60 * 60))
+
+    # Each worker writes its metrics snapshot to METRICS_DIR (default DATA_FOLDER/metrics) at most every
+    # METRICS_FLUSH_INTERVAL seconds; /metrics sums the snapshots of all workers
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+    # Content-hashed copies of app/static (plus .gz/.br variants) live in ASSETS_DIR (default DATA_FOLDER/assets)
+    # and are served from /assets with a far-future max-age; ASSETS_AUTO_BUILD rebuilds them at startup when stale
+    ASSETS_DIR = os.environ.get('ASSETS_DIR')
+    ASSETS_AUTO_BUILD = os.environ.get('ASSETS_AUTO_BUILD', '1') != '0'
+    ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE', 365 * 24 * 60 * 60))
+
+    # Thread pool of each ASGI worker (`uvicorn asgi:app`): runs every non-async route plus PDF extraction and other
+    # blocking steps of the async analysis route. Analyses themselves wait on the event loop, so under ASGI raise
+    # ADMISSION_MAX_IN_FLIGHT to the number of concurrent analyses one worker should hold (dozens, not 4)
+    ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+
+    # Admission control for interactive analyses (form POST and stream): at most ADMISSION_MAX_IN_FLIGHT run per
+    # process and ADMISSION_GLOBAL_MAX per host (0 = no host-wide cap), ADMISSION_MAX_QUEUE more wait up to
+    # ADMISSION_QUEUE_TIMEOUT seconds, and the rest get an immediate 503 with Retry-After. ADMISSION_PER_CLIENT
+    # caps running plus queued analyses per client address (0 disables)
+    ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT', 4))
+    ADMISSION_MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', 8))
+    ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', 10))
+    ADMISSION_GLOBAL_MAX = int(os.environ.get('ADMISSION_GLOBAL_MAX', 0))
+    ADMISSION_PER_CLIENT = int(os.environ.get('ADMISSION_PER_CLIENT', 0))
+
+    # 'single' generates the whole report in one request; 'parallel' generates section groups concurrently
+    ANALYSIS_EXECUTION_MODE = os.environ.get('ANALYSIS_EXECUTION_MODE', 'single')
+
+    # Analysis cache: in-process LRU, plus an on-disk tier shared by all workers when a directory is set
+    ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 256))
+    ANALYSIS_CACHE_TTL = int(os.environ.get('ANALYSIS_CACHE_TTL', 24 * 60 * 60))
+    ANALYSIS_CACHE_DIR = os.environ.get('ANALYSIS_CACHE_DIR')
+    ANALYSIS_CACHE_MAX_BYTES = int(os.environ.get('ANALYSIS_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+    # Near-duplicate submissions (a reposted JD, a re-exported resume) are matched by MinHash similarity of both inputs:
+    # at NEAR_DUPLICATE_WARM_THRESHOLD or above the earlier analysis seeds an incremental re-analysis, and at
+    # NEAR_DUPLICATE_THRESHOLD or above it is served as is. Both reuse another submitter's analysis, so both are off
+    # (0) unless set, e.g. 0.7 and 0.9.
+    # Signatures, inputs and results are kept in DATA_FOLDER/near_duplicates and expire after ANALYSIS_CACHE_TTL
+    NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0))
+    NEAR_DUPLICATE_WARM_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_WARM_THRESHOLD', 0))
+    NEAR_DUPLICATE_MAX_ENTRIES = int(os.environ.get('NEAR_DUPLICATE_MAX_ENTRIES', 100000))
+
+    # A batch distills its job description (if at least JD_PROFILE_MIN_CHARS long) once into a structured profile
+    # (skills, keywords, experience band) that replaces the raw JD in every analysis prompt of the batch. Single
+    # analyses reuse a profile already built but never wait to build one; 0 disables profiling
+    JD_PROFILE_MIN_CHARS = int(os.environ.get('JD_PROFILE_MIN_CHARS', 600))
+
+    # A resubmission from a result page regenerates only the report sections that depend on what changed, as long as
+    # neither the resume nor the JD changed by more than this share of their words (0 always re-analyzes in full)
+    INCREMENTAL_MAX_CHANGE = float(os.environ.get('INCREMENTAL_MAX_CHANGE', 0.35))
+
+    # Estimated-token budgets for the compacted resume and job description in each prompt (0 disables)
+    RESUME_TOKEN_BUDGET = int(os.environ.get('RESUME_TOKEN_BUDGET', 8000))
+    JD_TOKEN_BUDGET = int(os.environ.get('JD_TOKEN_BUDGET', 3000))
+
+    # How the page submits analyses: 'sync' is the classic form POST, 'async' submits a background job and polls it,
+    # 'stream' reads sections over Server-Sent Events as they are generated
+    SUBMIT_MODE = os.environ.get('SUBMIT_MODE', 'sync')
+    JOB_DB_PATH = os.environ.get('JOB_DB_PATH') or os.path.join(DATA_FOLDER, 'jobs.sqlite3')
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+    JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', 32))
+    JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 600))
+    # Jobs (resume text and report included) are deleted this many seconds after their last update; 0 keeps them
+    JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 7 * 24 * 60 * 60))
+    # Cache-Control max-age for finished results at /results/<id> and /api/results/<id> (private: browser cache only)
+    RESULT_CACHE_MAX_AGE = int(os.environ.get('RESULT_CACHE_MAX_AGE', 60 * 60))
+    # Server-rendered PDF reports are kept in DATA_FOLDER/reports up to this many bytes
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 128 * 1024 * 1024))
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,12 @@
+import pytest
+
+from app.services.client_registry import ClientRegistry
+from benchmarks.fake_genai import FakeClient, FakeSettings
+
+
+@pytest.fixture
+def fake_clients():
+    """A ClientRegistry of benchmarks.fake_genai clients that answer at once."""
+    FakeClient.settings = FakeSettings(latency=0, jitter=0, error_rate=0, malformed_rate=0, words=3, seed=0)
+    yield ClientRegistry(factory=FakeClient)
+    FakeClient.settings = None
@@ -0,0 +1,116 @@
+import random
+import threading
+
+import httpx
+import pytest
+from google.genai import errors as genai_errors
+
+from app.services.call_policy import CallPolicy, Deadline, DeadlineExceededError, is_transient
+
+
+def api_error(cls, code, status):
+    return cls(code, {"error": {"message": status.lower(), "status": status}})
+
+
+@pytest.mark.parametrize("error, transient", [
+    (api_error(genai_errors.ServerError, 503, "UNAVAILABLE"), True),
+    (api_error(genai_errors.ClientError, 408, "DEADLINE_EXCEEDED"), True),
+    (api_error(genai_errors.ClientError, 429, "RESOURCE_EXHAUSTED"), False),
+    (api_error(genai_errors.ClientError, 400, "INVALID_ARGUMENT"), False),
+    (TimeoutError("read timed out"), True),
+    (httpx.ConnectError("connection refused"), True),
+    (DeadlineExceededError("deadline"), False),
+    (ValueError("503 in a message is not a status"), False),
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def policy(**kwargs):
+    return CallPolicy(backoff_base=0, rng=random.Random(0), **kwargs)
+
+
+def test_transient_errors_are_retried():
+    outcomes = [TimeoutError("slow"), api_error(genai_errors.ServerError, 500, "INTERNAL"), "ok"]
+
+    def attempt(timeout):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy(max_attempts=3).run(attempt) == "ok"
+
+
+def test_the_last_attempt_is_raised():
+    calls = []
+
+    def attempt(timeout):
+        calls.append(timeout)
+        raise TimeoutError("slow")
+
+    with pytest.raises(TimeoutError):
+        policy(max_attempts=2).run(attempt)
+    assert len(calls) == 2
+
+
+def test_permanent_errors_are_not_retried():
+    calls = []
+
+    def attempt(timeout):
+        calls.append(timeout)
+        raise api_error(genai_errors.ClientError, 400, "INVALID_ARGUMENT")
+
+    with pytest.raises(genai_errors.ClientError):
+        policy().run(attempt)
+    assert len(calls) == 1
+
+
+def test_attempt_timeout_is_capped_by_the_deadline():
+    timeouts = []
+    policy(attempt_timeout=90).run(lambda timeout: timeouts.append(timeout), Deadline(5))
+
+    assert 0 < timeouts[0] <= 5
+
+
+def test_expired_deadline_is_not_attempted():
+    with pytest.raises(DeadlineExceededError):
+        policy().run(lambda timeout: "ok", Deadline(-1))
+
+
+def hedging_policy(**kwargs):
+    p = policy(hedge_percentile=50, hedge_min_samples=1, hedge_min_delay=0.01, **kwargs)
+    p.latency.record("default", 0.01)
+    return p
+
+
+def test_a_slow_primary_is_hedged_and_the_backup_wins():
+    release = threading.Event()
+
+    def slow(timeout):
+        release.wait(5)
+        return "primary"
+
+    try:
+        p = hedging_policy()
+        assert p.run(slow, hedge=lambda timeout: "backup") == "backup"
+        assert 'hedged_calls_total{outcome="hedge_won"} 1' in p.metrics.render()
+    finally:
+        release.set()
+
+
+def test_no_backup_is_sent_without_an_idle_worker():
+    release = threading.Event()
+    p = hedging_policy(hedge_workers=1)
+    assert p._backup_slots.acquire(blocking=False)
+
+    def slow(timeout):
+        release.wait(0.2)
+        return "primary"
+
+    try:
+        assert p.run(slow, hedge=lambda timeout: "backup") == "primary"
+        assert 'hedged_calls_total{outcome="skipped"} 1' in p.metrics.render()
+    finally:
+        p._backup_slots.release()
+        release.set()
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from app.services.json_stream import TopLevelObjectStream, salvage_members
+
+DOCUMENT = {
+    "candidate_info": {"name": "Jane \"JD\" Doe", "links": ["a,b", "{c}"]},
+    "ats_analysis": {"score": 82, "keywords": [["python", 3], ["go", 1]]},
+    "summary": "Commas, colons: and \\ escapes } inside strings",
+    "empty": [],
+    "flag": True,
+}
+
+
+def feed_in_chunks(parser, text, size):
+    members = []
+    for start in range(0, len(text), size):
+        members.extend(parser.feed(text[start:start + size]))
+    return members
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 64, 10000])
+def test_members_are_emitted_in_order_whatever_the_chunking(size):
+    parser = TopLevelObjectStream()
+
+    members = feed_in_chunks(parser, json.dumps(DOCUMENT, indent=2), size)
+
+    assert members == list(DOCUMENT.items())
+    assert parser.completed == DOCUMENT
+
+
+def test_a_member_is_emitted_as_soon_as_its_value_completes():
+    parser = TopLevelObjectStream()
+    text = json.dumps(DOCUMENT)
+    cut = text.index('"ats_analysis"')
+
+    assert parser.feed(text[:cut]) == [("candidate_info", DOCUMENT["candidate_info"])]
+    assert parser.feed(text[cut:cut + 10]) == []
+
+
+def test_strict_parser_raises_on_an_invalid_value():
+    with pytest.raises(ValueError):
+        TopLevelObjectStream().feed('{"a": [1, 2,], "b": 1}')
+
+
+def test_non_strict_parser_skips_an_invalid_value():
+    parser = TopLevelObjectStream(strict=False)
+
+    members = parser.feed('{"a": [1, 2,], "b": 1}')
+
+    assert members == [("b", 1)]
+    assert parser.invalid == {"a"}
+
+
+def test_salvage_keeps_complete_members_of_a_truncated_document():
+    text = json.dumps(DOCUMENT)
+    truncated = "Here is the report:\n" + text[:text.index('"empty"') + 10]
+
+    members, invalid = salvage_members(truncated)
+
+    assert members == {name: DOCUMENT[name] for name in ("candidate_info", "ats_analysis", "summary")}
+    assert invalid == set()
+
+
+def test_salvage_without_an_object():
+    assert salvage_members("no json here") == ({}, set())
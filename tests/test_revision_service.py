@@ -0,0 +1,72 @@
+from app.services.revision_service import RevisionPlanner
+
+SECTIONS = [
+    "candidate_info", "ats_analysis", "market_intel", "advanced_insights", "recruiter_review",
+    "resume_tailoring", "skill_gap_analysis", "interview_prep", "career_roadmap",
+]
+
+RESUME = """Jane Doe
+jane@example.com
+
+Summary
+Backend engineer with eight years of experience building payment and logistics platforms.
+
+Experience
+Senior Engineer, Acme Corp. Led the migration of the billing service to event sourcing.
+Engineer, Globex. Built the shipment tracking API used by forty thousand merchants.
+
+Skills
+Python, Go, PostgreSQL, Kafka, Kubernetes, Terraform
+
+Projects
+Open source contributor to a Prometheus exporter for Kafka consumer lag.
+
+Education
+BSc Computer Science, State University
+"""
+
+JD = """We are hiring a senior backend engineer to own our payments platform. You will design
+event-driven services in Python or Go, run them on Kubernetes and mentor a small team.
+Experience with Kafka and PostgreSQL at scale is required; Terraform is a plus."""
+
+
+def previous(resume=RESUME, jd=JD):
+    return {"resume_text": resume, "job_description": jd, "result": {name: {} for name in SECTIONS}}
+
+
+def test_skills_edit_regenerates_roadmap_and_insights():
+    plan = RevisionPlanner(SECTIONS).plan(previous(), RESUME.replace("Terraform", "Terraform, Rust"), JD)
+
+    assert plan.changed == ["skills"]
+    assert "career_roadmap" in plan.regenerate
+    assert "advanced_insights" in plan.regenerate
+    assert "candidate_info" in plan.reuse
+
+
+def test_jd_edit_regenerates_roadmap_and_insights():
+    plan = RevisionPlanner(SECTIONS).plan(previous(), RESUME, JD.replace("Terraform is a plus", "Rust is a plus"))
+
+    assert plan.changed == ["job_description"]
+    assert "career_roadmap" in plan.regenerate
+    assert "advanced_insights" in plan.regenerate
+    assert plan.reuse == ["candidate_info", "market_intel"]
+
+
+def test_unchanged_submission_reuses_everything():
+    plan = RevisionPlanner(SECTIONS).plan(previous(), RESUME, JD)
+
+    assert plan.regenerate == []
+    assert plan.reuse == SECTIONS
+
+
+def test_failed_sections_are_regenerated():
+    earlier = previous()
+    earlier["result"]["meta"] = {"section_errors": {"market_intel": "timeout"}}
+
+    plan = RevisionPlanner(SECTIONS).plan(earlier, RESUME, JD)
+
+    assert plan.regenerate == ["market_intel"]
+
+
+def test_large_change_is_a_new_submission():
+    assert RevisionPlanner(SECTIONS).plan(previous(), "An entirely different resume.", JD) is None
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from app.services.scheduler_service import RequestScheduler, SaturatedError
+
+SCHEMA = {"type": "object", "properties": {"score": {"type": "integer"}}}
+QUOTA = RuntimeError("429 RESOURCE_EXHAUSTED. {'retryDelay': '30s'}")
+
+
+def generate(client, model):
+    return client.models.generate_content(model=model, contents="prompt", config={"response_schema": SCHEMA})
+
+
+def failing(pairs, error=QUOTA):
+    """call(client, model) that raises `error` on the (api_key, model) pairs in `pairs` and records every lease."""
+    leases = []
+
+    def call(client, model):
+        if leases[-1] in pairs:
+            raise error
+        return generate(client, model)
+
+    return call, lambda key, model: leases.append((key, model)), leases
+
+
+def exhausted(scheduler):
+    return [slot["exhausted_models"] for slot in scheduler.stats()["keys"]]
+
+
+def test_quota_error_fails_over_to_the_next_key(fake_clients):
+    scheduler = RequestScheduler(["k1", "k2"], ["primary", "lite"], fake_clients)
+    call, on_lease, leases = failing({("k1", "primary")})
+
+    response = scheduler.execute(call, 10, on_lease=on_lease)
+
+    assert response.text
+    assert leases == [("k1", "primary"), ("k2", "primary")]
+    assert scheduler.stats()["failovers"] == 1
+    assert exhausted(scheduler) == [["primary"], []]
+
+
+def test_fails_over_to_the_next_model_once_every_key_is_exhausted(fake_clients):
+    scheduler = RequestScheduler(["k1", "k2"], ["primary", "lite"], fake_clients)
+    call, on_lease, leases = failing({("k1", "primary"), ("k2", "primary")})
+
+    scheduler.execute(call, 10, on_lease=on_lease)
+
+    assert [model for _, model in leases] == ["primary", "primary", "lite"]
+    assert scheduler.stats()["failovers"] == 2
+    # The cooldown holds: the next call goes straight to the lite model.
+    call, on_lease, leases = failing(set())
+    scheduler.execute(call, 10, on_lease=on_lease)
+    assert leases[0][1] == "lite"
+
+
+def test_invalid_key_is_disabled(fake_clients):
+    scheduler = RequestScheduler(["k1", "k2"], ["primary"], fake_clients)
+    call, on_lease, leases = failing({("k1", "primary")}, RuntimeError("400 API_KEY_INVALID"))
+
+    scheduler.execute(call, 10, on_lease=on_lease)
+
+    assert [slot["disabled"] for slot in scheduler.stats()["keys"]] == [True, False]
+
+
+def test_other_errors_are_not_failed_over(fake_clients):
+    scheduler = RequestScheduler(["k1", "k2"], ["primary"], fake_clients)
+    call, on_lease, leases = failing({("k1", "primary"), ("k2", "primary")}, ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        scheduler.execute(call, 10, on_lease=on_lease)
+    assert len(leases) == 1
+    assert scheduler.stats()["failovers"] == 0
+
+
+def test_every_pair_exhausted_raises_the_last_quota_error(fake_clients):
+    scheduler = RequestScheduler(["k1"], ["primary", "lite"], fake_clients, max_wait=0)
+    call, on_lease, leases = failing({("k1", "primary"), ("k1", "lite")})
+
+    with pytest.raises(RuntimeError, match="RESOURCE_EXHAUSTED"):
+        scheduler.execute(call, 10, on_lease=on_lease)
+    assert len(leases) == 2
+    with pytest.raises(SaturatedError):
+        scheduler.execute(generate, 10)
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_saturated_when_the_wait_queue_is_full(fake_clients):
+    scheduler = RequestScheduler(["k1"], ["primary"], fake_clients, rpm=1, max_waiters=0)
+    scheduler.execute(generate, 10)
+
+    with pytest.raises(SaturatedError):
+        scheduler.execute(generate, 10)
+    assert scheduler.stats()["rejected"] == 1
+
+
+def test_saturated_after_max_wait(fake_clients):
+    scheduler = RequestScheduler(["k1"], ["primary"], fake_clients, rpm=1, max_wait=0.05)
+    scheduler.execute(generate, 10)
+
+    with pytest.raises(SaturatedError):
+        scheduler.execute(generate, 10)
+    assert scheduler.stats()["waiters"] == 0
+
+
+async def _execute_async(scheduler, call, on_lease):
+    async def acall(client, model):
+        return call(client, model)
+
+    return await scheduler.execute_async(acall, 10, on_lease=on_lease)
+
+
+def test_async_execute_fails_over(fake_clients):
+    scheduler = RequestScheduler(["k1"], ["primary", "lite"], fake_clients)
+    call, on_lease, leases = failing({("k1", "primary")})
+
+    response = asyncio.run(_execute_async(scheduler, call, on_lease))
+
+    assert response.text
+    assert leases == [("k1", "primary"), ("k1", "lite")]
+    assert scheduler.stats()["failovers"] == 1
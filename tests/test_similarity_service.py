@@ -0,0 +1,89 @@
+import os
+import random
+import time
+
+from app.services.similarity_service import NearDuplicateIndex
+
+JD = "Senior backend engineer for the payments platform. Python, Go, Kafka and PostgreSQL at scale. " * 3
+
+
+def resume(seed, lines=30):
+    rng = random.Random(seed)
+    words = [f"word{n}" for n in range(2000)]
+    return "\n".join(" ".join(rng.choice(words) for _ in range(12)) for _ in range(lines))
+
+
+def key(n):
+    return f"{n:064x}"
+
+
+def edited(text):
+    """The same resume with one line rewritten and different whitespace."""
+    lines = text.splitlines()
+    lines[3] = "Mentored four engineers through their first on-call rotation."
+    return "\n\n".join(lines)
+
+
+def test_finds_a_near_duplicate_and_ignores_unrelated_submissions(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path), warm_threshold=0.7)
+    for n in range(50):
+        index.add(key(n), index.signature(resume(n), JD), resume(n), JD, {"n": n})
+
+    match = index.find(index.signature(edited(resume(7)), "  " + JD.upper()))
+
+    assert match.key == key(7)
+    assert match.similarity >= 0.7
+    assert index.find(index.signature(resume(999), JD)) is None
+
+
+def test_nothing_is_found_when_both_thresholds_are_off():
+    index = NearDuplicateIndex()
+    signature = index.signature(resume(1), JD)
+    index.add(key(1), signature, resume(1), JD, {"n": 1})
+
+    assert index.find(signature) is None
+
+
+def test_entries_are_shared_through_the_directory(tmp_path):
+    writer = NearDuplicateIndex(str(tmp_path), warm_threshold=0.7)
+    writer.add(key(1), writer.signature(resume(1), JD), resume(1), JD, {"n": 1})
+
+    reader = NearDuplicateIndex(str(tmp_path), warm_threshold=0.7)
+    match = reader.find(reader.signature(resume(1), JD))
+
+    assert match.key == key(1)
+    assert reader.entry(key(1)) == {"resume_text": resume(1), "job_description": JD, "result": {"n": 1}}
+
+
+def test_expired_entries_are_dropped_on_read_and_swept(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path), warm_threshold=0.7, ttl=60)
+    signature = index.signature(resume(1), JD)
+    for n in (1, 2):
+        index.add(key(n), signature, resume(n), JD, {"n": n})
+    past = time.time() - 120
+    for n in (1, 2):
+        os.utime(index._entry_path(key(n)), (past, past))
+
+    assert index.entry(key(1)) is None
+    assert not os.path.exists(index._entry_path(key(1)))
+    index.sweep()
+    assert not os.path.exists(index._entry_path(key(2)))
+
+
+def test_in_memory_entries_expire():
+    index = NearDuplicateIndex(warm_threshold=0.7, ttl=0)
+    index.add(key(1), index.signature(resume(1), JD), resume(1), JD, {"n": 1})
+
+    assert index.entry(key(1)) is None
+
+
+def test_compaction_keeps_the_newest_entries(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path), warm_threshold=0.7, max_entries=8)
+    for n in range(9):
+        index.add(key(n), index.signature(resume(n), JD), resume(n), JD, {"n": n})
+
+    reader = NearDuplicateIndex(str(tmp_path), warm_threshold=0.7, max_entries=8)
+    assert reader.find(reader.signature(resume(8), JD)).key == key(8)
+    assert reader.find(reader.signature(resume(0), JD)) is None
+    assert reader.entry(key(0)) is None
+    assert reader.stats()["entries"] == 6